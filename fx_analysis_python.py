@@ -13,7 +13,14 @@
 """
 
 import os
+import glob
 import shutil
+import hashlib
+import io
+import struct
+import tempfile
+import sqlite3
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Any
@@ -22,16 +29,1636 @@ import csv
 import traceback
 import re
 import sys
+import json
+import time
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
-# ログ設定
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ログ設定（ハンドラの設定は各エントリーポイントでconfigure_loggingを呼んで行う）
 logger = logging.getLogger(__name__)
 
 
+def configure_logging(level: int = logging.INFO) -> None:
+    """
+    ログ出力の設定（エントリーポイントから1回だけ呼ぶ）
+    
+    Args:
+        level: ログレベル
+    """
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# PF集計のキー列（ポイント名×曜日×ランキング）
+PF_KEY_COLUMNS = ['ポイント名', '取引日_曜日', 'ポイント値']
+
+# 総利益・総損失の丸め桁数（浮動小数点の集計誤差を除く）
+PF_TOTAL_DECIMALS = 6
+
+
+def compute_profit_factor(total_profit, total_loss):
+    """
+    プロフィットファクターを一括計算
+    
+    総損失が0の場合は、総利益がプラスなら999.9、それ以外は0とする。
+    損益pipsは0.1単位のため、集計順や累積和の差分による浮動小数点誤差で閾値ちょうどのPFが
+    閾値を下回らないよう、総利益・総損失を小数6桁に丸めてから割る
+    
+    Args:
+        total_profit: 総利益（配列またはスカラー）
+        total_loss: 総損失の絶対値（配列またはスカラー）
+        
+    Returns:
+        プロフィットファクター（numpy配列）
+    """
+    total_profit = np.round(np.asarray(total_profit, dtype=float), PF_TOTAL_DECIMALS)
+    total_loss = np.round(np.asarray(total_loss, dtype=float), PF_TOTAL_DECIMALS)
+    ratio = np.divide(total_profit, total_loss, out=np.zeros_like(total_profit), where=total_loss != 0)
+    no_loss_pf = np.where(total_profit > 0, 999.9, 0.0)
+    return np.where(total_loss == 0, no_loss_pf, ratio)
+
+
+def partial_pf_aggregate(trades_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    取引明細をポイント名×曜日×ランキング単位で集計（PF計算前の中間集計）
+    
+    中間集計同士はcombine_pf_aggregatesで結合できる（チャンク処理用）
+    
+    Args:
+        trades_df: レポート2形式の取引明細
+        
+    Returns:
+        中間集計（PF_KEY_COLUMNS + total_profit, total_loss, trades, profit_pips）
+    """
+    profit_pips = pd.to_numeric(trades_df['損益pipsのSUM'], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    work = pd.DataFrame({
+        'ポイント名': trades_df['ポイント名'].to_numpy(),
+        '取引日_曜日': trades_df['取引日_曜日'].to_numpy(),
+        'ポイント値': trades_df['ポイント値'].to_numpy().astype(np.int64),
+        'profit': np.where(profit_pips > 0, profit_pips, 0.0),
+        'loss': np.where(profit_pips > 0, 0.0, -profit_pips),
+        'profit_pips': profit_pips
+    })
+    return work.groupby(PF_KEY_COLUMNS, sort=False).agg(
+        total_profit=('profit', 'sum'),
+        total_loss=('loss', 'sum'),
+        trades=('profit_pips', 'size'),
+        profit_pips=('profit_pips', 'last')
+    ).reset_index()
+
+
+def combine_pf_aggregates(aggregates: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    中間集計を結合（profit_pipsは後の集計の値を優先）
+    
+    Args:
+        aggregates: partial_pf_aggregateの結果（取引明細の順）
+        
+    Returns:
+        結合した中間集計
+    """
+    combined = pd.concat(aggregates, ignore_index=True)
+    return combined.groupby(PF_KEY_COLUMNS, sort=False).agg(
+        total_profit=('total_profit', 'sum'),
+        total_loss=('total_loss', 'sum'),
+        trades=('trades', 'sum'),
+        profit_pips=('profit_pips', 'last')
+    ).reset_index()
+
+
+def build_pf_table(trades_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    取引明細からポイント名×曜日×ランキング単位のPFテーブルを作成
+    
+    Args:
+        trades_df: レポート2形式の取引明細（分析対象期間でフィルタ済み）
+        
+    Returns:
+        PFテーブル（PF_KEY_COLUMNS + total_profit, total_loss, trades, profit_pips, pf）
+        総利益・総損失はPFCubeの集計値と一致するよう小数6桁に丸める
+    """
+    pf_table = partial_pf_aggregate(trades_df)
+    pf_table[['total_profit', 'total_loss']] = pf_table[['total_profit', 'total_loss']].round(PF_TOTAL_DECIMALS)
+    pf_table['pf'] = compute_profit_factor(pf_table['total_profit'], pf_table['total_loss'])
+    return pf_table
+
+
+def bootstrap_pf_intervals(trades_df: pd.DataFrame, n_resamples: int = 1000, confidence: float = 0.90,
+                           seed: int = 0, min_trades: int = 5,
+                           block_elements: int = 5000000) -> pd.DataFrame:
+    """
+    全セル（ポイント名×曜日×ランキング）のPF信頼区間をブートストラップで一括計算
+    
+    取引をセル順に並べ、各再標本で全セル分の取引を一度に復元抽出する。
+    乱数は再標本のブロック単位でまとめて生成する（ブロックサイズによらず結果は同じ）。
+    再標本の総損失が0の場合はPFを999.9とする。取引回数がmin_trades未満のセルは
+    根拠不足として下限を0とする。
+    
+    Args:
+        trades_df: レポート2形式の取引明細（分析対象期間でフィルタ済み）
+        n_resamples: 再標本数
+        confidence: 信頼水準（0.90なら5%〜95%点）
+        seed: 乱数シード
+        min_trades: 下限を計算する最小取引回数
+        block_elements: 1ブロックで生成する乱数の上限個数（メモリ使用量の調整用）
+        
+    Returns:
+        PF_KEY_COLUMNS + pf_lower, pf_upper
+    """
+    keys = pd.MultiIndex.from_arrays([
+        trades_df['ポイント名'].to_numpy(),
+        trades_df['取引日_曜日'].to_numpy(),
+        trades_df['ポイント値'].to_numpy().astype(np.int64)
+    ], names=PF_KEY_COLUMNS)
+    cell_codes, cell_keys = pd.factorize(keys)
+    intervals = pd.DataFrame(list(cell_keys), columns=PF_KEY_COLUMNS)
+    if len(intervals) == 0:
+        return intervals.assign(pf_lower=pd.Series(dtype=float), pf_upper=pd.Series(dtype=float))
+    
+    # セル順に並べ替え、各取引スロットに所属セルの開始位置と件数を持たせる
+    order = np.argsort(cell_codes, kind='stable')
+    pips = pd.to_numeric(trades_df['損益pipsのSUM'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float32)[order]
+    counts = np.bincount(cell_codes, minlength=len(intervals))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    slot_start = np.repeat(starts, counts).astype(np.int32)
+    slot_count = np.repeat(counts, counts).astype(np.float32)
+    slot_last = np.repeat(counts - 1, counts).astype(np.int32)
+    
+    rng = np.random.default_rng(seed)
+    n_trades = len(pips)
+    block_size = max(1, block_elements // max(n_trades, 1))
+    resampled_pf = np.empty((n_resamples, len(intervals)))
+    for block_start in range(0, n_resamples, block_size):
+        block = min(block_size, n_resamples - block_start)
+        draws = (rng.random((block, n_trades), dtype=np.float32) * slot_count).astype(np.int32)
+        # float32の丸めでセルの件数ちょうどになった場合は末尾に丸める
+        np.minimum(draws, slot_last, out=draws)
+        draws += slot_start
+        values = pips[draws]
+        total = np.add.reduceat(values, starts, axis=1, dtype=np.float64)
+        profit = np.add.reduceat(np.maximum(values, 0.0, out=values), starts, axis=1, dtype=np.float64)
+        resampled_pf[block_start:block_start + block] = compute_profit_factor(profit, profit - total)
+    
+    alpha = (1.0 - confidence) / 2.0
+    lower, upper = np.quantile(resampled_pf, [alpha, 1.0 - alpha], axis=0)
+    intervals['pf_lower'] = np.where(counts >= min_trades, lower, 0.0)
+    intervals['pf_upper'] = upper
+    return intervals
+
+
+def parse_percent_column(df: pd.DataFrame, column: str) -> np.ndarray:
+    """
+    パーセント文字列の列を浮動小数点に一括変換（'61.77%' → 0.6177）
+    
+    Args:
+        df: 対象DataFrame
+        column: 列名（存在しない場合は0.0）
+        
+    Returns:
+        変換後の値（numpy配列、欠損値は0.0）
+    """
+    if column not in df.columns:
+        return np.zeros(len(df))
+    series = df[column]
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float).fillna(0.0).to_numpy()
+    # 勝率の文字列は重複が多いため、一意な値のみ変換してコードで展開
+    codes, uniques = pd.factorize(series)
+    text = pd.Series(uniques).astype('string')
+    has_percent = text.str.contains('%', regex=False).fillna(False).to_numpy(dtype=bool)
+    values = pd.to_numeric(text.str.strip('%'), errors='coerce').to_numpy(dtype=float)
+    values = np.nan_to_num(np.where(has_percent, values / 100.0, values), nan=0.0)
+    # 欠損値のコード-1は末尾の0.0に対応
+    return np.append(values, 0.0)[codes]
+
+
+def time_to_minutes_array(times: pd.Series) -> np.ndarray:
+    """
+    'H:MM:SS'形式の時刻列を分単位の数値に一括変換
+    
+    0時台は24時台として扱う（日付をまたぐケース）
+    
+    Args:
+        times: 時刻文字列の列
+        
+    Returns:
+        分単位の時刻（numpy配列）
+    """
+    times = pd.Series(times)
+    if isinstance(times.dtype, pd.CategoricalDtype):
+        # カテゴリごとに1回だけ変換してコードで展開（欠損値のコード-1は末尾の'nan'に対応）
+        categories = pd.Series(list(times.cat.categories.astype(str)) + ['nan'])
+        return time_to_minutes_array(categories)[times.cat.codes.to_numpy()]
+    parts = times.astype(str).str.split(':', expand=True)
+    if parts.shape[1] < 2:
+        return np.zeros(len(parts), dtype=np.int64)
+    hours = pd.to_numeric(parts[0], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+    minutes = pd.to_numeric(parts[1], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+    hours = np.where(hours == 0, 24, hours)
+    return hours * 60 + minutes
+
+
+def schedule_non_overlapping(starts: np.ndarray, ends: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    重み付き区間スケジューリング（互いに重ならない区間の重み合計を最大化）
+    
+    区間を終了時刻でソートし、各区間の直前に両立できる区間を二分探索で求めて動的計画法で解く（O(n log n)）。
+    終了時刻と開始時刻が等しい区間同士は重ならないものとする
+    
+    Args:
+        starts: 区間の開始位置
+        ends: 区間の終了位置（開始位置より大きいこと）
+        weights: 区間の重み（0以下の区間は選ばない）
+        
+    Returns:
+        選んだ区間のマスク（入力順）
+    """
+    n = len(starts)
+    chosen = np.zeros(n, dtype=bool)
+    if n == 0:
+        return chosen
+    
+    order = np.lexsort((starts, ends))
+    sorted_starts = np.asarray(starts)[order]
+    sorted_ends = np.asarray(ends)[order]
+    sorted_weights = np.asarray(weights, dtype=float)[order]
+    
+    # compatible[j]: 区間jより前に終わる区間の数（best[compatible[j]]が区間jと両立する最適値）
+    compatible = np.searchsorted(sorted_ends, sorted_starts, side='right')
+    best = np.zeros(n + 1)
+    for j in range(n):
+        take = sorted_weights[j] + best[compatible[j]]
+        best[j + 1] = take if take > best[j] else best[j]
+    
+    # 最適値から選んだ区間を復元
+    j = n
+    while j > 0:
+        if sorted_weights[j - 1] + best[compatible[j - 1]] > best[j - 1]:
+            chosen[order[j - 1]] = True
+            j = compatible[j - 1]
+        else:
+            j -= 1
+    return chosen
+
+
+def evaluate_selection_grid(candidates: pd.DataFrame, pf_thresholds: List[float],
+                            max_results_grid: List[int], target_patterns: List[str]) -> pd.DataFrame:
+    """
+    共通の候補テーブルからPF閾値×最大表示件数の全組み合わせの選定結果を集計
+    
+    曜日×評価パターンごとに候補をPF降順に1回だけ並べ、閾値以上の件数を二分探索、
+    上位k件の損益合計を累積和で求める。rank_by='pf'かつnon_overlapping=Falseの
+    select_optimal_frameと同じ選定結果になる（PF下限順・保有時間の重複除外には対応しない）
+    
+    Args:
+        candidates: FXAnalysisEngine.join_points_with_pfの結合結果
+        pf_thresholds: PF閾値の候補
+        max_results_grid: 最大表示件数の候補
+        target_patterns: 集計対象の評価パターン
+        
+    Returns:
+        組み合わせ×評価パターンごとの選定件数と週間合計損益
+    """
+    thresholds = np.asarray(pf_thresholds, dtype=float)
+    max_results = np.asarray(max_results_grid, dtype=np.int64)
+    selected_points = np.zeros((len(target_patterns), len(thresholds), len(max_results)), dtype=np.int64)
+    weekly_pips = np.zeros(selected_points.shape)
+    
+    ordered = candidates.sort_values(['pf', 'point_order'], ascending=[False, True], kind='stable')
+    for (pattern, _), group in ordered.groupby(['point_name', 'weekday'], sort=False, observed=True):
+        if pattern not in target_patterns:
+            continue
+        p = target_patterns.index(pattern)
+        # PF降順なので閾値以上の候補は先頭からの連続区間になる
+        n_above = np.searchsorted(-group['pf'].to_numpy(), -thresholds, side='right')
+        cum_pips = np.concatenate([[0.0], np.cumsum(group['profit_pips'].to_numpy(dtype=float))])
+        n_selected = np.minimum(n_above[:, None], max_results[None, :])
+        selected_points[p] += n_selected
+        weekly_pips[p] += cum_pips[n_selected]
+    
+    index = pd.MultiIndex.from_product(
+        [target_patterns, thresholds, max_results], names=['pattern', 'pf_threshold', 'max_results']
+    )
+    return pd.DataFrame({
+        'selected_points': selected_points.ravel(),
+        'weekly_pips': weekly_pips.ravel()
+    }, index=index).reset_index()
+
+
+def _sweep_analysis_weeks(task: Tuple[int, pd.DataFrame, List[float], List[int], List[str]]) -> pd.DataFrame:
+    """
+    パラメータスイープの1分析期間分を評価（プロセスプール用）
+    """
+    weeks, candidates, pf_thresholds, max_results_grid, target_patterns = task
+    grid = evaluate_selection_grid(candidates, pf_thresholds, max_results_grid, target_patterns)
+    grid.insert(0, 'analysis_weeks', weeks)
+    return grid
+
+
+
+# 解析済み入力キャッシュ（列形式バイナリ）のスキーマバージョン（型変換の仕様を変えたら更新）
+CACHE_SCHEMA_VERSION = 3
+
+# 解析済み入力キャッシュの保存先（基準日ディレクトリ内）
+CACHE_DIR_NAME = '.parsed_cache'
+
+# レポート2のチャンク読み込みで使用する列と型
+REPORT2_STREAM_DTYPES = {
+    'ポイント名': 'category',
+    'ポイント値': 'int16',
+    '取引日': 'str',
+    '取引日_曜日': 'category',
+    '損益pipsのSUM': 'float64'
+}
+
+# 出力形式と拡張子（binaryはpyarrowがあればfeather、なければpickle）
+OUTPUT_FORMATS = {
+    'csv': '.csv',     # 曜日別・評価パターン横並びのCSV
+    'tsv': '.txt',     # 要件定義書 6.出力仕様のタブ区切り（アイコン・週合計・曜日別合計付き）
+    'jsonl': '.jsonl', # 1ポイント = 1行のJSON Lines
+    'binary': None     # 列形式バイナリ
+}
+
+# 評価パターンの組（pattern_setで名前を指定、または評価パターンのリストを直接指定）
+PATTERN_SETS = {
+    'basic': ['利益効率ポイント', '勝率重視ポイント', '時間効率ポイント', '最大利益ポイント'],
+    'us': ['利益効率ポイントUS', '勝率重視ポイントUS', '時間効率ポイントUS', '最大利益ポイントUS'],
+    'all': ['利益効率ポイント', '勝率重視ポイント', '時間効率ポイント', '最大利益ポイント',
+            '利益効率ポイントUS', '勝率重視ポイントUS', '時間効率ポイントUS', '最大利益ポイントUS']
+}
+
+# 通貨ユニバース（通貨コード: その通貨を含むペア、リスト: 指定したペアのみ、None: 全ペア）
+CURRENCY_UNIVERSES = {
+    'jpy_cross': 'JPY',
+    'usd': 'USD',
+    'all': None
+}
+
+# 既定の通貨ユニバース（出力ファイル名にユニバース名を付けない）
+DEFAULT_UNIVERSE = 'jpy_cross'
+
+# 分析結果キャッシュの保存先（基準日ディレクトリ内）
+RESULT_CACHE_DIR_NAME = '.result_cache'
+
+# トレードストア使用時に基準日ディレクトリに残すマニフェスト（レポート2の代わり）
+TRADE_MANIFEST_NAME = 'trade_manifest.json'
+
+# 入力ファイル名のパターン（要件定義書 要件-FILE-001）
+REPORT1_PATTERN = '週刊アノマリーFXレポート_*分析レポート.csv'
+REPORT2_PATTERN = 'アノマリーFXポイント別損益明細*ポイント別損益明細*.csv'
+
+# 入力ファイルの必須列（ヘッダのみで検証する）
+REPORT1_REQUIRED_COLUMNS = ['基準日', '方向', '銘柄', 'エントリー時刻', 'クローズ時刻']
+REPORT2_REQUIRED_COLUMNS = ['ポイント名', 'ポイント値', '取引日', '損益pipsのSUM']
+
+# 入力ファイルのカタログ（作業ディレクトリ直下）
+REPORT_CATALOG_NAME = '.report_catalog.json'
+
+# レポート1の勝率列（パーセント文字列 → 小数）
+WIN_RATE_COLUMNS = ['勝率_30日', '勝率_90日', '勝率_365日', '勝率_平均']
+
+# レポート1の繰り返しの多い文字列列（カテゴリ型で保持）
+REPORT1_CATEGORY_COLUMNS = ['銘柄', '方向', '日方向', 'エントリー時刻', 'クローズ時刻']
+
+# レポート1の平均スプレッド列（再シミュレーションの取引コスト）
+SPREAD_COLUMN = '平均スプレッドpips_平均'
+
+# 1分足の列形式キャッシュの保存先（1分足ディレクトリ内）
+OHLC_CACHE_DIR_NAME = '.ohlc_cache'
+
+
+def file_content_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    ファイル内容のハッシュ値を計算
+    
+    Args:
+        path: ファイルパス
+        chunk_size: 読み込み単位（バイト）
+        
+    Returns:
+        SHA-256ハッシュ（16進文字列）
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_report1(report1_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    レポート1の型変換（勝率列をfloat32の小数、通貨ペア・方向・時刻列をカテゴリ型に変換）
+    
+    Args:
+        report1_df: CSVから読み込んだレポート1
+        
+    Returns:
+        型変換済みのレポート1
+    """
+    for column in WIN_RATE_COLUMNS:
+        if column in report1_df.columns:
+            report1_df[column] = parse_percent_column(report1_df, column).astype(np.float32)
+    for column in REPORT1_CATEGORY_COLUMNS:
+        if column in report1_df.columns:
+            report1_df[column] = report1_df[column].astype('category')
+    return report1_df
+
+
+def parse_report2(report2_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    レポート2の型変換（取引日を日付、ポイント値を整数、損益を浮動小数点に変換）
+    
+    Args:
+        report2_df: CSVから読み込んだレポート2
+        
+    Returns:
+        型変換済みのレポート2
+    """
+    report2_df['取引日'] = pd.to_datetime(report2_df['取引日'])
+    report2_df['ポイント値'] = report2_df['ポイント値'].astype(np.int64)
+    report2_df['損益pipsのSUM'] = pd.to_numeric(report2_df['損益pipsのSUM'], errors='coerce')
+    return report2_df
+
+
+def _cache_format() -> str:
+    """
+    キャッシュの保存形式（pyarrowがあればfeather、なければpickle）
+    """
+    try:
+        import pyarrow  # noqa: F401
+        return 'feather'
+    except ImportError:
+        return 'pickle'
+
+
+def primary_output(output_files: Dict[str, str]) -> str:
+    """
+    代表の出力ファイル（CSVがあればCSV、なければ最初の形式）
+    
+    Args:
+        output_files: 出力形式 → 出力ファイルパス
+        
+    Returns:
+        出力ファイルパス
+    """
+    return output_files.get('csv') or next(iter(output_files.values()))
+
+
+def currency_universe_mask(currencies: pd.Series, universe) -> np.ndarray:
+    """
+    通貨ペアが通貨ユニバースに含まれるかを判定（判定はカテゴリごとに1回）
+    
+    Args:
+        currencies: 通貨ペアの列
+        universe: 通貨コード（そのコードを含むペア）、通貨ペアのリスト、またはNone（全ペア）
+        
+    Returns:
+        判定結果（bool配列）
+    """
+    currencies = currencies.astype('category')
+    categories = currencies.cat.categories.astype(str)
+    if universe is None:
+        in_universe = np.ones(len(categories), dtype=bool)
+    elif isinstance(universe, str):
+        in_universe = np.asarray(categories.str.startswith(universe) | categories.str.endswith(universe))
+    else:
+        in_universe = np.asarray(categories.isin(list(universe)))
+    # 欠損値（コード-1）は末尾のFalseを参照する
+    return np.append(in_universe, False)[currencies.cat.codes.to_numpy()]
+
+
+def load_parsed_csv(path: str, parser, cache_dir: str = None) -> pd.DataFrame:
+    """
+    CSVを型変換済みのDataFrameとして読み込む（キャッシュがあればCSVを解析しない）
+    
+    キャッシュはファイル内容のハッシュとCACHE_SCHEMA_VERSIONをキーとし、
+    元ファイルが変わると自動的に作り直す
+    
+    Args:
+        path: CSVファイルパス
+        parser: 読み込み後の型変換関数（parse_report1 / parse_report2）
+        cache_dir: キャッシュ保存先（Noneの場合はキャッシュを使わない）
+        
+    Returns:
+        型変換済みのDataFrame
+    """
+    if cache_dir is None:
+        return parser(pd.read_csv(path, encoding='utf-8-sig'))
+    
+    cache_format = _cache_format()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    prefix = f"{stem}.v{CACHE_SCHEMA_VERSION}."
+    cache_file = os.path.join(cache_dir, f"{prefix}{file_content_hash(path)}.{cache_format}")
+    
+    if os.path.exists(cache_file):
+        logger.info(f"解析済みキャッシュを使用します: {cache_file}")
+        if cache_format == 'feather':
+            return pd.read_feather(cache_file)
+        return pd.read_pickle(cache_file)
+    
+    df = parser(pd.read_csv(path, encoding='utf-8-sig')).reset_index(drop=True)
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    # 同じファイルの古いキャッシュを削除
+    for name in os.listdir(cache_dir):
+        if name.startswith(f"{stem}.") and os.path.join(cache_dir, name) != cache_file:
+            os.remove(os.path.join(cache_dir, name))
+    
+    temp_file = f"{cache_file}.tmp"
+    if cache_format == 'feather':
+        df.to_feather(temp_file)
+    else:
+        df.to_pickle(temp_file)
+    os.replace(temp_file, cache_file)
+    logger.info(f"解析済みキャッシュを作成しました: {cache_file}")
+    return df
+
+
+class PipelineMetrics:
+    """
+    処理段階ごとの計測（実行時間・CPU時間・メモリ・入出力行数）
+    
+    CPU時間は段階を実行したスレッドの時間（StageGraphで並行実行した段階同士は合算されない）。
+    process_peak_rss_mbはプロセス起動からの最大RSS（最高水位）で、最大の段階より後は同じ値になる。
+    段階ごとの増分はpeak_rss_growth_mb（段階中に最高水位が上がった量、上がらなければ0）で見る
+    
+    profile_stageを指定した段階のみ、cProfileとtracemallocによる詳細計測を行う
+    """
+    
+    def __init__(self, profile_stage: str = None, profile_dir: str = '.'):
+        """
+        初期化
+        
+        Args:
+            profile_stage: 詳細計測する段階名（Noneの場合は行わない）
+            profile_dir: cProfile結果の保存先
+        """
+        self.profile_stage = profile_stage
+        self.profile_dir = profile_dir
+        self.records = []
+    
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        """
+        1段階を計測するコンテキストマネージャ
+        
+        計測結果の辞書を返すので、処理後にrows_outを設定する
+        
+        Args:
+            name: 段階名
+            rows_in: 入力行数
+        """
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        profiler = None
+        if name == self.profile_stage:
+            profiler = cProfile.Profile()
+            tracemalloc.start()
+            profiler.enable()
+        
+        rss_start = _peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            record['wall_time_sec'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_time_sec'] = round(time.thread_time() - cpu_start, 6)
+            record['process_peak_rss_mb'] = _peak_rss_mb()
+            record['peak_rss_growth_mb'] = None if rss_start is None \
+                else round(record['process_peak_rss_mb'] - rss_start, 3)
+            
+            if profiler is not None:
+                profiler.disable()
+                snapshot = tracemalloc.take_snapshot()
+                record['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 3)
+                tracemalloc.stop()
+                profile_file = os.path.join(self.profile_dir, f"profile_{name}.prof")
+                profiler.dump_stats(profile_file)
+                record['profile_file'] = profile_file
+                record['top_allocations'] = [str(stat) for stat in snapshot.statistics('lineno')[:10]]
+            
+            self.records.append(record)
+            logger.info(
+                f"[{name}] {record['wall_time_sec']:.3f}秒 (CPU {record['cpu_time_sec']:.3f}秒), "
+                f"行数 {rows_in} -> {record['rows_out']}"
+            )
+    
+    def write_jsonl(self, path: str, **fields) -> None:
+        """
+        計測結果をJSON Lines形式で追記（1段階 = 1行）
+        
+        Args:
+            path: 出力ファイルパス
+            **fields: 各行に付与する項目（基準日など）
+        """
+        timestamp = datetime.now().isoformat(timespec='seconds')
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps({'timestamp': timestamp, **fields, **record}, ensure_ascii=False) + '\n')
+
+
+def _peak_rss_mb() -> float:
+    """
+    プロセス起動からのピークメモリ使用量（最大RSS、MB、取得できない環境ではNone）
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linuxはキロバイト、macOSはバイト単位
+    return round(peak / 1e6 if sys.platform == 'darwin' else peak / 1e3, 3)
+
+
+class PipelineStage:
+    """
+    処理段階の定義（入力名・出力名と処理関数）
+    """
+    
+    def __init__(self, name: str, func, inputs: List[str] = None, outputs: List[str] = None, rows_out=None):
+        """
+        初期化
+        
+        Args:
+            name: 段階名（計測結果の段階名）
+            func: 処理関数（入力名をキーワード引数で受け取り、出力名 → 値の辞書を返す）
+            inputs: 入力名
+            outputs: 出力名
+            rows_out: 出力から出力行数を求める関数（Noneの場合はDataFrame出力の行数合計）
+        """
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs or [])
+        self.outputs = list(outputs or [])
+        self.rows_out = rows_out
+
+
+class StageGraph:
+    """
+    処理段階の依存グラフ
+    
+    各段階は入力・出力の名前で依存関係を宣言し、入力がそろった段階から
+    スレッドプールで並行実行する（CSV読み込みやPF集計などGILを解放する処理が重なる）
+    """
+    
+    def __init__(self, metrics: PipelineMetrics, max_workers: int = 4):
+        """
+        初期化
+        
+        Args:
+            metrics: 段階別計測
+            max_workers: 同時に実行する段階数の上限
+        """
+        self.metrics = metrics
+        self.max_workers = max_workers
+        self.stages: List[PipelineStage] = []
+    
+    def add(self, name: str, func, inputs: List[str] = None, outputs: List[str] = None, rows_out=None) -> None:
+        """
+        段階を追加（引数はPipelineStageと同じ）
+        """
+        self.stages.append(PipelineStage(name, func, inputs, outputs, rows_out))
+    
+    def _run_stage(self, stage: PipelineStage, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        1段階を計測しながら実行
+        """
+        rows_in = sum(len(value) for value in inputs.values() if isinstance(value, pd.DataFrame))
+        with self.metrics.stage(stage.name, rows_in=rows_in or None) as record:
+            outputs = stage.func(**inputs) or {}
+            missing = [name for name in stage.outputs if name not in outputs]
+            if missing:
+                raise ValueError(f"段階{stage.name}の出力がありません: {missing}")
+            if stage.rows_out is not None:
+                record['rows_out'] = stage.rows_out(outputs)
+            else:
+                record['rows_out'] = sum(len(value) for value in outputs.values() if isinstance(value, pd.DataFrame))
+        return outputs
+    
+    def run(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        グラフを実行
+        
+        出力がすべて与えられている段階（キャッシュ済みなど）は実行しない
+        
+        Args:
+            values: 初期値（入力名 → 値）
+            
+        Returns:
+            初期値と全段階の出力
+        """
+        values = dict(values)
+        pending = [stage for stage in self.stages
+                   if not stage.outputs or not all(name in values for name in stage.outputs)]
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for stage in [stage for stage in pending if all(name in values for name in stage.inputs)]:
+                    pending.remove(stage)
+                    inputs = {name: values[name] for name in stage.inputs}
+                    running[executor.submit(self._run_stage, stage, inputs)] = stage
+                if not running:
+                    raise ValueError(f"入力がそろわない段階があります: {[stage.name for stage in pending]}")
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    values.update(future.result())
+        return values
+
+
+class PFCube:
+    """
+    週単位の損益累積和キューブ（ポイント名×曜日×ランキング×週）
+    
+    任意の評価日・任意の週数の直近期間のPFを、累積和の差分で定数時間に求める。
+    週は月曜始まり・日曜終わりで区切る。各セルは自分の曜日にしか取引がないため、
+    評価日以前の直近のその曜日を含む週から遡ってN週分を集計すれば、
+    評価日を最終日とするN×7日の期間（get_analysis_period）と同じ取引を集計できる。
+    profit_pipsは期間内で最も新しい週の最後の取引の損益とする。
+    """
+    
+    # 週番号の起点（月曜日）
+    WEEK_ORIGIN = pd.Timestamp('1970-01-05')
+    
+    WEEKDAYS = ['月', '火', '水', '木', '金', '土', '日']
+    
+    def __init__(self, cells: pd.DataFrame, first_week: int, cum_profit: np.ndarray,
+                 cum_loss: np.ndarray, cum_trades: np.ndarray, week_last_pips: np.ndarray,
+                 last_trade_week: np.ndarray):
+        """
+        初期化（通常はfrom_tradesで作成する）
+        
+        Args:
+            cells: セル定義（PF_KEY_COLUMNS、行番号がセル番号）
+            first_week: 先頭週の週番号
+            cum_profit: 総利益の累積和（セル数×(週数+1)）
+            cum_loss: 総損失の累積和（セル数×(週数+1)）
+            cum_trades: 取引回数の累積和（セル数×(週数+1)）
+            week_last_pips: 各週の最後の取引の損益pips（セル数×週数）
+            last_trade_week: 各週時点で直近に取引があった週の位置（取引なしは-1）
+        """
+        self.cells = cells.reset_index(drop=True)
+        self.first_week = first_week
+        self.n_weeks = cum_profit.shape[1] - 1
+        self.cum_profit = cum_profit
+        self.cum_loss = cum_loss
+        self.cum_trades = cum_trades
+        self.week_last_pips = week_last_pips
+        self.last_trade_week = last_trade_week
+        self._cell_lookup = {key: i for i, key in enumerate(zip(*(self.cells[col] for col in PF_KEY_COLUMNS)))}
+        # セルの曜日番号（月=0〜日=6、不明な曜日は-1）
+        self._weekday_codes = pd.Categorical(self.cells['取引日_曜日'], categories=self.WEEKDAYS).codes.astype(np.int64)
+    
+    @classmethod
+    def week_number(cls, dates) -> np.ndarray:
+        """
+        日付を週番号に変換
+        
+        Args:
+            dates: 日付（配列またはスカラー）
+            
+        Returns:
+            週番号（numpy配列）
+        """
+        days = (pd.to_datetime(pd.Series(np.atleast_1d(dates))) - cls.WEEK_ORIGIN).dt.days.to_numpy()
+        return np.floor_divide(days, 7)
+    
+    @classmethod
+    def from_trades(cls, report2_df: pd.DataFrame) -> 'PFCube':
+        """
+        レポート2の取引明細からキューブを作成
+        
+        Args:
+            report2_df: レポート2のDataFrame
+            
+        Returns:
+            PFCube
+        """
+        dates = pd.to_datetime(report2_df['取引日'], errors='coerce')
+        valid = dates.notna().to_numpy()
+        trades_df = report2_df[valid]
+        
+        profit_pips = pd.to_numeric(trades_df['損益pipsのSUM'], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        keys = pd.MultiIndex.from_arrays([
+            trades_df['ポイント名'].to_numpy(),
+            trades_df['取引日_曜日'].to_numpy(),
+            trades_df['ポイント値'].to_numpy().astype(np.int64)
+        ], names=PF_KEY_COLUMNS)
+        cell_codes, cell_keys = pd.factorize(keys)
+        cells = pd.DataFrame(list(cell_keys), columns=PF_KEY_COLUMNS)
+        
+        week_ids = cls.week_number(dates[valid])
+        first_week = int(week_ids.min()) if len(week_ids) else 0
+        n_weeks = int(week_ids.max()) - first_week + 1 if len(week_ids) else 0
+        n_cells = len(cells)
+        flat = cell_codes * n_weeks + (week_ids - first_week)
+        size = n_cells * n_weeks
+        
+        def bucket(weights):
+            return np.bincount(flat, weights=weights, minlength=size).reshape(n_cells, n_weeks)
+        
+        def cumulative(values):
+            result = np.zeros((n_cells, n_weeks + 1))
+            np.cumsum(values, axis=1, out=result[:, 1:])
+            return result
+        
+        trades = bucket(None)
+        week_last_pips = np.zeros(size)
+        if len(flat):
+            last_rows = pd.Series(np.arange(len(flat))).groupby(flat).max()
+            week_last_pips[last_rows.index.to_numpy()] = profit_pips[last_rows.to_numpy()]
+        
+        week_positions = np.where(trades > 0, np.arange(n_weeks), -1)
+        last_trade_week = np.maximum.accumulate(week_positions, axis=1) if n_weeks else week_positions
+        
+        cube = cls(
+            cells=cells,
+            first_week=first_week,
+            cum_profit=cumulative(bucket(np.where(profit_pips > 0, profit_pips, 0.0))),
+            cum_loss=cumulative(bucket(np.where(profit_pips > 0, 0.0, -profit_pips))),
+            cum_trades=cumulative(trades),
+            week_last_pips=week_last_pips.reshape(n_cells, n_weeks),
+            last_trade_week=last_trade_week
+        )
+        logger.info(f"PFキューブ作成完了: {n_cells}セル × {n_weeks}週")
+        return cube
+    
+    def extend(self, trades_df: pd.DataFrame) -> 'PFCube':
+        """
+        追加の取引明細を畳み込んだキューブを作成（既存分は再集計しない）
+        
+        Args:
+            trades_df: 追加分の取引明細（既存分より新しい取引）
+            
+        Returns:
+            追加分を反映したPFCube
+        """
+        addition = PFCube.from_trades(trades_df)
+        if len(addition.cells) == 0:
+            return self
+        if len(self.cells) == 0:
+            return addition
+        
+        cells = pd.concat([self.cells, addition.cells], ignore_index=True).drop_duplicates(
+            PF_KEY_COLUMNS, ignore_index=True
+        )
+        cell_lookup = {key: i for i, key in enumerate(zip(*(cells[col] for col in PF_KEY_COLUMNS)))}
+        first_week = min(self.first_week, addition.first_week)
+        last_week = max(self.first_week + self.n_weeks, addition.first_week + addition.n_weeks)
+        n_weeks = last_week - first_week
+        
+        buckets = {name: np.zeros((len(cells), n_weeks)) for name in ('profit', 'loss', 'trades')}
+        week_last_pips = np.zeros((len(cells), n_weeks))
+        for cube in (self, addition):
+            rows = np.array([cell_lookup[key] for key in cube._cell_lookup])
+            columns = slice(cube.first_week - first_week, cube.first_week - first_week + cube.n_weeks)
+            trades = np.diff(cube.cum_trades, axis=1)
+            buckets['profit'][rows, columns] += np.diff(cube.cum_profit, axis=1)
+            buckets['loss'][rows, columns] += np.diff(cube.cum_loss, axis=1)
+            buckets['trades'][rows, columns] += trades
+            # 後から追加した取引の損益を優先
+            target = week_last_pips[rows, columns]
+            week_last_pips[rows, columns] = np.where(trades > 0, cube.week_last_pips, target)
+        
+        def cumulative(values):
+            result = np.zeros((len(cells), n_weeks + 1))
+            np.cumsum(values, axis=1, out=result[:, 1:])
+            return result
+        
+        week_positions = np.where(buckets['trades'] > 0, np.arange(n_weeks), -1)
+        return PFCube(
+            cells=cells,
+            first_week=first_week,
+            cum_profit=cumulative(buckets['profit']),
+            cum_loss=cumulative(buckets['loss']),
+            cum_trades=cumulative(buckets['trades']),
+            week_last_pips=week_last_pips,
+            last_trade_week=np.maximum.accumulate(week_positions, axis=1)
+        )
+    
+    def _window(self, weeks: int, as_of_date, weekday_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        評価日を最終日とするweeks×7日に対応する、セルごとの週位置の範囲[start, end)を返す
+        
+        評価日の曜日より後の曜日のセルは、直近のその曜日が前の週にあるため1週前にずらす
+        """
+        as_of_date = pd.Timestamp(as_of_date).normalize()
+        end_week = int(self.week_number(as_of_date)[0]) - self.first_week + 1
+        end_week = end_week - (weekday_codes > as_of_date.weekday()).astype(np.int64)
+        start = np.clip(end_week - weeks, 0, self.n_weeks)
+        end = np.clip(end_week, 0, self.n_weeks)
+        return start, np.maximum(start, end)
+    
+    def window_table(self, weeks: int, as_of_date) -> pd.DataFrame:
+        """
+        直近weeks週のPFテーブルを累積和の差分で作成
+        
+        Args:
+            weeks: 分析対象期間（週数）
+            as_of_date: 評価日（この日を最終日とするweeks×7日を集計）
+            
+        Returns:
+            PFテーブル（aggregate_weekly_profit_factorと同じ列構成）
+        """
+        rows = np.arange(len(self.cells))
+        start, end = self._window(weeks, as_of_date, self._weekday_codes)
+        trades = self.cum_trades[rows, end] - self.cum_trades[rows, start]
+        # 累積和の差分の誤差を除く（取引明細から直接集計した値と一致させる）
+        total_profit = np.round(self.cum_profit[rows, end] - self.cum_profit[rows, start], PF_TOTAL_DECIMALS)
+        total_loss = np.round(self.cum_loss[rows, end] - self.cum_loss[rows, start], PF_TOTAL_DECIMALS)
+        
+        if self.n_weeks:
+            last_week = self.last_trade_week[rows, np.maximum(end - 1, 0)]
+            profit_pips = self.week_last_pips[rows, np.maximum(last_week, 0)]
+        else:
+            profit_pips = np.zeros(len(self.cells))
+        
+        pf_table = self.cells.copy()
+        pf_table['total_profit'] = total_profit
+        pf_table['total_loss'] = total_loss
+        pf_table['trades'] = np.rint(trades).astype(np.int64)
+        pf_table['profit_pips'] = profit_pips
+        pf_table['pf'] = compute_profit_factor(total_profit, total_loss)
+        return pf_table[pf_table['trades'] > 0].reset_index(drop=True)
+    
+    def lookup(self, point_name: str, day_of_week: str, point_value: int, weeks: int, as_of_date) -> Dict[str, Any]:
+        """
+        1セル分の直近weeks週のPFを定数時間で取得
+        
+        Args:
+            point_name: ポイント名（レポート2）
+            day_of_week: 曜日
+            point_value: ランキング
+            weeks: 分析対象期間（週数）
+            as_of_date: 評価日（この日を最終日とするweeks×7日を集計）
+            
+        Returns:
+            PFデータ（total_profit, total_loss, trades, pf, profit_pips）
+        """
+        cell = self._cell_lookup.get((point_name, day_of_week, int(point_value)))
+        if cell is None:
+            return {'total_profit': 0.0, 'total_loss': 0.0, 'trades': 0, 'pf': 0.0, 'profit_pips': 0.0}
+        start, end = self._window(weeks, as_of_date, self._weekday_codes[cell:cell + 1])
+        start, end = int(start[0]), int(end[0])
+        if end <= start:
+            return {'total_profit': 0.0, 'total_loss': 0.0, 'trades': 0, 'pf': 0.0, 'profit_pips': 0.0}
+        
+        total_profit = round(float(self.cum_profit[cell, end] - self.cum_profit[cell, start]), PF_TOTAL_DECIMALS)
+        total_loss = round(float(self.cum_loss[cell, end] - self.cum_loss[cell, start]), PF_TOTAL_DECIMALS)
+        last_week = self.last_trade_week[cell, end - 1]
+        return {
+            'total_profit': total_profit,
+            'total_loss': total_loss,
+            'trades': int(round(self.cum_trades[cell, end] - self.cum_trades[cell, start])),
+            'pf': float(compute_profit_factor(total_profit, total_loss)),
+            'profit_pips': float(self.week_last_pips[cell, last_week]) if last_week >= start else 0.0
+        }
+
+
+class PFSnapshot:
+    """
+    曜日別PFの固定レイアウトのバイナリスナップショット（メモリマップで読み取り専用に共有）
+    
+    本体は固定長のプリアンブル（マジック＋ヘッダ長）、JSONヘッダ（形状・項目名・索引の対応）、
+    ポイント名×曜日×ランキング×項目の密なfloat64配列（C順）を1ファイルにまとめたもの。
+    ヘッダと配列を1回のリネームで置き換えるため、読み込み側が新旧の組み合わせを開くことはない。
+    同じ内容のサイドカーJSONヘッダも確認用に書き出す（openでは使わない）。
+    np.memmapで開くため、複数のプロセスが1つのコピー（OSのページキャッシュ）を読み込まずに共有できる。
+    取引のないセルはtradesが0、その他の項目はNaNとなる
+    """
+    
+    SNAPSHOT_VERSION = 2
+    MAGIC = b'FXPFSNAP'
+    # 配列の開始位置の境界
+    ALIGNMENT = 64
+    WEEKDAYS = ['月', '火', '水', '木', '金', '土', '日']
+    
+    def __init__(self, header: Dict[str, Any], data: np.ndarray):
+        """
+        初期化（通常はwrite / openで作成する）
+        
+        Args:
+            header: サイドカーヘッダ
+            data: PF配列（ポイント名×曜日×ランキング×項目）
+        """
+        self.header = header
+        self.data = data
+        self.fields = header['fields']
+        self._point_index = {name: i for i, name in enumerate(header['point_names'])}
+        self._weekday_index = {day: i for i, day in enumerate(header['weekdays'])}
+        self._field_index = {field: i for i, field in enumerate(self.fields)}
+    
+    @staticmethod
+    def header_path(path: str) -> str:
+        """
+        スナップショット本体に対応するサイドカーヘッダのパス（確認用）
+        """
+        return f"{os.path.splitext(path)[0]}.json"
+    
+    @classmethod
+    def write(cls, pf_table: pd.DataFrame, path: str, metadata: Dict[str, Any] = None) -> 'PFSnapshot':
+        """
+        PFテーブルをスナップショットとして書き出す
+        
+        Args:
+            pf_table: aggregate_weekly_profit_factorで作成したPFテーブル
+            path: スナップショット本体のファイルパス
+            metadata: ヘッダに付与する情報（基準日・分析期間など）
+            
+        Returns:
+            書き出したスナップショット（メモリマップで開き直したもの）
+        """
+        fields = ['total_profit', 'total_loss', 'trades', 'profit_pips', 'pf']
+        fields += [field for field in ('pf_lower', 'pf_upper') if field in pf_table.columns]
+        point_names = sorted(pf_table['ポイント名'].astype(str).unique())
+        max_rank = int(pf_table['ポイント値'].max()) if len(pf_table) else 0
+        shape = (len(point_names), len(cls.WEEKDAYS), max_rank, len(fields))
+        
+        data = np.full(shape, np.nan)
+        data[..., fields.index('trades')] = 0.0
+        point_codes = pd.Categorical(pf_table['ポイント名'].astype(str), categories=point_names).codes
+        weekday_codes = pd.Categorical(pf_table['取引日_曜日'], categories=cls.WEEKDAYS).codes
+        ranks = pf_table['ポイント値'].to_numpy(dtype=np.int64)
+        valid = (weekday_codes >= 0) & (ranks >= 1)
+        for i, field in enumerate(fields):
+            data[point_codes[valid], weekday_codes[valid], ranks[valid] - 1, i] = \
+                pf_table[field].to_numpy(dtype=float)[valid]
+        
+        header = {
+            'version': cls.SNAPSHOT_VERSION,
+            'dtype': '<f8',
+            'shape': list(shape),
+            'fields': fields,
+            'point_names': point_names,
+            'weekdays': cls.WEEKDAYS,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            **(metadata or {})
+        }
+        
+        # ヘッダを本体に埋め込み、書き手ごとの一時ファイルから1回のリネームで置き換える
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        preamble_size = len(cls.MAGIC) + 8
+        padded_size = -(-(preamble_size + len(header_bytes)) // cls.ALIGNMENT) * cls.ALIGNMENT - preamble_size
+        directory = os.path.dirname(path) or '.'
+        fd, temp_file = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(cls.MAGIC)
+                f.write(struct.pack('<Q', padded_size))
+                f.write(header_bytes.ljust(padded_size, b' '))
+                data.astype('<f8').tofile(f)
+            os.replace(temp_file, path)
+        except BaseException:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+        
+        fd, temp_header = tempfile.mkstemp(prefix=f"{os.path.basename(cls.header_path(path))}.", suffix='.tmp',
+                                           dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(header, f, ensure_ascii=False, indent=2)
+        os.replace(temp_header, cls.header_path(path))
+        logger.info(f"PFスナップショットを保存しました: {path}（{' × '.join(str(n) for n in shape)}）")
+        return cls.open(path)
+    
+    @classmethod
+    def open(cls, path: str) -> 'PFSnapshot':
+        """
+        スナップショットを読み取り専用のメモリマップで開く（配列は読み込まない）
+        
+        ヘッダと配列は同じファイルから読むため、書き込み中に開いても常に同じ版の組になる
+        
+        Args:
+            path: スナップショット本体のファイルパス
+            
+        Returns:
+            PFSnapshot
+        """
+        with open(path, 'rb') as f:
+            preamble = f.read(len(cls.MAGIC) + 8)
+            if preamble[:len(cls.MAGIC)] != cls.MAGIC:
+                raise ValueError(f"PFスナップショットの形式ではありません: {path}")
+            header_size, = struct.unpack('<Q', preamble[len(cls.MAGIC):])
+            header = json.loads(f.read(header_size).decode('utf-8'))
+            if header.get('version') != cls.SNAPSHOT_VERSION:
+                raise ValueError(f"PFスナップショットのバージョンが異なります: {header.get('version')}")
+            shape = tuple(header['shape'])
+            if 0 in shape:
+                data = np.zeros(shape, dtype=header['dtype'])
+            else:
+                # 開いたファイル（同じ版）をそのままマップする
+                data = np.memmap(f, dtype=header['dtype'], mode='r', shape=shape, offset=len(preamble) + header_size)
+        return cls(header, data)
+    
+    def lookup(self, point_name: str, day_of_week: str, point_value: int) -> Dict[str, Any]:
+        """
+        1セル分のPFを取得
+        
+        Args:
+            point_name: ポイント名（レポート2）
+            day_of_week: 曜日
+            point_value: ランキング
+            
+        Returns:
+            PFデータ（ヘッダのfieldsの各項目、取引がない場合はtrades=0）
+        """
+        p = self._point_index.get(point_name)
+        d = self._weekday_index.get(day_of_week)
+        rank = int(point_value)
+        if p is None or d is None or not 1 <= rank <= self.data.shape[2]:
+            return {'trades': 0}
+        values = self.data[p, d, rank - 1]
+        result = {field: float(values[i]) for i, field in enumerate(self.fields)}
+        result['trades'] = int(result['trades'])
+        return result
+    
+    def table(self) -> pd.DataFrame:
+        """
+        取引のあるセルをPFテーブル形式で取得（select_optimal_pointsにそのまま渡せる）
+        
+        Returns:
+            PFテーブル
+        """
+        trades = self.data[..., self._field_index['trades']]
+        p, d, r = np.nonzero(trades > 0)
+        pf_table = pd.DataFrame({
+            'ポイント名': np.asarray(self.header['point_names'], dtype=object)[p],
+            '取引日_曜日': np.asarray(self.header['weekdays'], dtype=object)[d],
+            'ポイント値': r.astype(np.int64) + 1
+        })
+        for i, field in enumerate(self.fields):
+            pf_table[field] = np.asarray(self.data[p, d, r, i])
+        pf_table['trades'] = pf_table['trades'].astype(np.int64)
+        return pf_table
+
+
+def pip_size(currencies: pd.Series) -> np.ndarray:
+    """
+    通貨ペアごとの1pipの値幅（円が決済通貨のペアは0.01、それ以外は0.0001）
+    
+    Args:
+        currencies: 通貨ペアの列
+        
+    Returns:
+        1pipの値幅（float配列）
+    """
+    return np.where(pd.Series(currencies).astype(str).str.endswith('JPY').to_numpy(), 0.01, 0.0001)
+
+
+class MinuteBarStore:
+    """
+    通貨ペアごとの1分足（OHLC）ストア
+    
+    ディレクトリ内の <通貨ペア>.csv（日時, 始値, 高値, 安値, 終値の順の列、日時の昇順）を初回のみチャンク単位で読み、
+    列ごとのバイナリ（.ohlc_cache/<通貨ペア>.<列>.bin）に追記する。以降はnp.memmapで開き、
+    二分探索で参照した部分のみがページ単位で読み込まれるため、数年分×多数の通貨ペアでも全体をメモリに載せない。
+    時刻はCSVの日時（レポートと同じタイムゾーン）を1970-01-01からの分に変換したint64で保持する
+    """
+    
+    CACHE_VERSION = 1
+    COLUMNS = ['open', 'high', 'low', 'close']
+    
+    def __init__(self, directory: str, chunksize: int = 1000000):
+        """
+        初期化（キャッシュは通貨ペアの初回参照時に作成する）
+        
+        Args:
+            directory: 1分足CSVのディレクトリ
+            chunksize: キャッシュ作成時のCSV読み込み行数
+        """
+        self.directory = directory
+        self.cache_dir = os.path.join(directory, OHLC_CACHE_DIR_NAME)
+        self.chunksize = chunksize
+        self._bars: Dict[str, Dict[str, np.ndarray]] = {}
+    
+    def pairs(self) -> List[str]:
+        """
+        1分足のある通貨ペアを一覧取得
+        
+        Returns:
+            通貨ペアのリスト（昇順）
+        """
+        return sorted(os.path.splitext(name)[0] for name in glob.glob('*.csv', root_dir=self.directory))
+    
+    def signature(self) -> Dict[str, List[int]]:
+        """
+        1分足CSVの(サイズ, 更新時刻)（分析結果キャッシュのキーに使用）
+        """
+        signature = {}
+        for pair in self.pairs():
+            stat = os.stat(os.path.join(self.directory, f"{pair}.csv"))
+            signature[pair] = [stat.st_size, stat.st_mtime_ns]
+        return signature
+    
+    def bars(self, pair: str) -> Dict[str, np.ndarray]:
+        """
+        通貨ペアの1分足を読み取り専用のメモリマップで取得（キャッシュが古ければ作り直す）
+        
+        Args:
+            pair: 通貨ペア
+            
+        Returns:
+            'minute'（分単位の時刻）と始値・高値・安値・終値の配列
+        """
+        if pair in self._bars:
+            return self._bars[pair]
+        
+        source = os.path.join(self.directory, f"{pair}.csv")
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"1分足ファイルが見つかりません: {source}")
+        stat = os.stat(source)
+        header_file = os.path.join(self.cache_dir, f"{pair}.json")
+        header = None
+        if os.path.exists(header_file):
+            with open(header_file, 'r', encoding='utf-8') as f:
+                header = json.load(f)
+        if header is None or header.get('version') != self.CACHE_VERSION or \
+                header.get('source') != [stat.st_size, stat.st_mtime_ns]:
+            header = self._build_cache(pair, source, [stat.st_size, stat.st_mtime_ns])
+        
+        rows = header['rows']
+        bars = {}
+        for column, dtype in [('minute', '<i8')] + [(column, '<f8') for column in self.COLUMNS]:
+            path = os.path.join(self.cache_dir, f"{pair}.{column}.bin")
+            bars[column] = np.memmap(path, dtype=dtype, mode='r', shape=(rows,)) if rows else np.zeros(0, dtype=dtype)
+        self._bars[pair] = bars
+        return bars
+    
+    def _build_cache(self, pair: str, source: str, source_signature: List[int]) -> Dict[str, Any]:
+        """
+        1分足CSVをチャンク単位で読み、列ごとのバイナリに追記
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        columns = ['minute'] + self.COLUMNS
+        temp_files = {column: f"{os.path.join(self.cache_dir, f'{pair}.{column}.bin')}.tmp" for column in columns}
+        handles = {column: open(path, 'wb') for column, path in temp_files.items()}
+        rows = 0
+        last_minute = None
+        try:
+            for chunk in pd.read_csv(source, chunksize=self.chunksize, encoding='utf-8-sig'):
+                minutes = pd.to_datetime(chunk.iloc[:, 0]).to_numpy('datetime64[m]').astype(np.int64)
+                if len(minutes) and ((last_minute is not None and minutes[0] <= last_minute) or
+                                     np.any(np.diff(minutes) <= 0)):
+                    raise ValueError(f"1分足の日時が昇順ではありません: {source}")
+                minutes.astype('<i8').tofile(handles['minute'])
+                for i, column in enumerate(self.COLUMNS, start=1):
+                    pd.to_numeric(chunk.iloc[:, i], errors='coerce').to_numpy(dtype='<f8').tofile(handles[column])
+                rows += len(minutes)
+                last_minute = minutes[-1] if len(minutes) else last_minute
+        finally:
+            for handle in handles.values():
+                handle.close()
+        
+        for column, path in temp_files.items():
+            os.replace(path, path[:-len('.tmp')])
+        header = {'version': self.CACHE_VERSION, 'rows': rows, 'source': source_signature}
+        header_file = os.path.join(self.cache_dir, f"{pair}.json")
+        with open(f"{header_file}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+        os.replace(f"{header_file}.tmp", header_file)
+        logger.info(f"1分足キャッシュを作成しました: {pair}（{rows}本）")
+        return header
+    
+    def prices_at(self, pair: str, minutes: np.ndarray, column: str = 'open', max_gap: int = 0) -> np.ndarray:
+        """
+        指定時刻の価格を一括取得（その時刻の足がない場合はmax_gap分以内の次の足）
+        
+        Args:
+            pair: 通貨ペア
+            minutes: 分単位の時刻（1970-01-01から）
+            column: 価格の列（open, high, low, close）
+            max_gap: 次の足を使う最大の間隔（分）
+            
+        Returns:
+            価格（該当する足がない場合はNaN）
+        """
+        bars = self.bars(pair)
+        bar_minutes = bars['minute']
+        minutes = np.asarray(minutes, dtype=np.int64)
+        if len(bar_minutes) == 0:
+            return np.full(len(minutes), np.nan)
+        positions = np.searchsorted(bar_minutes, minutes, side='left')
+        clipped = np.minimum(positions, len(bar_minutes) - 1)
+        found = (positions < len(bar_minutes)) & (bar_minutes[clipped] - minutes <= max_gap)
+        return np.where(found, bars[column][clipped], np.nan)
+
+
+class ReportCatalog:
+    """
+    基準日 → 入力ファイルのカタログ
+    
+    作業ディレクトリ直下と1階層下（基準日ディレクトリ）をファイル名のパターンで検索し、
+    各ファイルのヘッダと先頭行のみを読んで必須列の検証と基準日の取得を行う。
+    結果はサイズ・更新時刻とともにJSONに保存し、変更のないファイルは次回以降開かない
+    """
+    
+    CATALOG_VERSION = 1
+    
+    def __init__(self, root: str = '.', path: str = None, entries: Dict[str, Dict[str, Any]] = None):
+        """
+        初期化（保存済みのカタログがあれば読み込む）
+        
+        Args:
+            root: 検索するディレクトリ
+            path: カタログの保存先（Noneの場合はroot直下のREPORT_CATALOG_NAME）
+            entries: 検索済みのカタログ項目（指定時はファイルを検索・保存せずにこの項目のみを使う。
+                run_batchで親プロセスの検索結果を子プロセスに渡す）
+        """
+        self.root = root
+        self.path = path or os.path.join(root, REPORT_CATALOG_NAME)
+        # root からの相対パス → {kind, size, mtime_ns, base_date, error}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.frozen = entries is not None
+        if self.frozen:
+            self.entries = dict(entries)
+        elif os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    catalog = json.load(f)
+                if catalog.get('version') == self.CATALOG_VERSION:
+                    self.entries = catalog['entries']
+            except (ValueError, KeyError) as e:
+                logger.warning(f"カタログを読み込めないため作り直します: {self.path}: {str(e)}")
+    
+    def refresh(self) -> 'ReportCatalog':
+        """
+        ファイルを検索してカタログを更新（新規・変更ファイルのみヘッダを読む）
+        
+        Returns:
+            このカタログ
+        """
+        if self.frozen:
+            return self
+        
+        found = {}
+        for kind, pattern in (('report1', REPORT1_PATTERN), ('report2', REPORT2_PATTERN)):
+            for relative_pattern in (pattern, os.path.join('*', pattern)):
+                for path in glob.glob(relative_pattern, root_dir=self.root):
+                    found[path] = kind
+        
+        changed = found.keys() != self.entries.keys()
+        entries = {}
+        for path, kind in found.items():
+            try:
+                stat = os.stat(os.path.join(self.root, path))
+            except OSError as e:
+                # 検索後に移動・削除されたファイル
+                logger.warning(f"入力ファイルをカタログから除外します: {path}: {str(e)}")
+                changed = True
+                continue
+            entry = self.entries.get(path)
+            if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+                entry = self._read_entry(path, kind, stat)
+                changed = True
+            entries[path] = entry
+        self.entries = entries
+        
+        if changed:
+            self.save()
+        return self
+    
+    def _read_entry(self, path: str, kind: str, stat: os.stat_result) -> Dict[str, Any]:
+        """
+        1ファイル分のカタログ項目を作成（ヘッダと先頭行のみを読む）
+        
+        読めないファイル（文字コード違い・読み込み中の削除など）はerrorを設定して除外する
+        """
+        entry = {'kind': kind, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'base_date': None, 'error': None}
+        required = REPORT1_REQUIRED_COLUMNS if kind == 'report1' else REPORT2_REQUIRED_COLUMNS
+        try:
+            with open(os.path.join(self.root, path), 'r', encoding='utf-8-sig', newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                first_row = next(reader, None)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            entry['error'] = f"読み込めません: {str(e)}"
+            logger.warning(f"入力ファイルをカタログから除外します: {path}: {entry['error']}")
+            return entry
+        
+        missing = [column for column in required if column not in header]
+        if missing:
+            entry['error'] = f"必須列がありません: {missing}"
+        elif kind == 'report1':
+            # レポート1は先頭行の基準日列
+            try:
+                entry['base_date'] = pd.Timestamp(first_row[header.index('基準日')]).strftime('%Y-%m-%d')
+            except (TypeError, IndexError, ValueError):
+                entry['error'] = "先頭行から基準日を取得できません"
+        else:
+            # レポート2は基準日列を持たないため、基準日ディレクトリにあればその日付
+            directory = os.path.dirname(path)
+            if re.fullmatch(r'\d{4}-\d{2}-\d{2}', directory):
+                entry['base_date'] = directory
+        
+        if entry['error']:
+            logger.warning(f"入力ファイルをカタログから除外します: {path}: {entry['error']}")
+        return entry
+    
+    def save(self) -> None:
+        """
+        カタログをJSONに保存
+        
+        複数のプロセスが同時に保存しても壊れないよう書き手ごとの一時ファイルから置き換える。
+        カタログは次回の検索を速くするためのものなので、保存に失敗しても処理は続ける
+        """
+        temp_file = None
+        try:
+            fd, temp_file = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix='.tmp',
+                                             dir=os.path.dirname(self.path) or '.')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.CATALOG_VERSION, 'entries': self.entries}, f, ensure_ascii=False, indent=1)
+            os.replace(temp_file, self.path)
+        except OSError as e:
+            logger.warning(f"カタログを保存できませんでした: {self.path}: {str(e)}")
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
+    
+    def base_dates(self) -> List[str]:
+        """
+        レポート1がある基準日を一覧取得
+        
+        Returns:
+            基準日のリスト（昇順）
+        """
+        return sorted({
+            entry['base_date'] for entry in self.entries.values()
+            if entry['kind'] == 'report1' and entry['error'] is None
+        })
+    
+    def find(self, base_date: str) -> Tuple[str, str]:
+        """
+        基準日のレポート1と、同じディレクトリにあるレポート2を検索
+        
+        基準日列が一致するレポート1と、基準日ディレクトリ内のレポート1を対象とする。
+        両方にある場合は基準日ディレクトリを優先し、同じ場所に複数ある場合は更新時刻が新しいものを使用する
+        
+        Args:
+            base_date: 基準日
+            
+        Returns:
+            (レポート1ファイルパス, レポート2ファイルパス)（見つからない場合はNone）
+        """
+        def candidates(kind: str, directory: str = None) -> List[str]:
+            return sorted(
+                (path for path, entry in self.entries.items()
+                 if entry['kind'] == kind and entry['error'] is None
+                 and (directory is None or os.path.dirname(path) == directory)),
+                key=lambda path: self.entries[path]['mtime_ns'], reverse=True
+            )
+        
+        report1_files = [
+            path for path in candidates('report1')
+            if self.entries[path]['base_date'] == base_date or os.path.dirname(path) == base_date
+        ]
+        if not report1_files:
+            return None, None
+        report1_file = min(report1_files, key=lambda path: os.path.dirname(path) != base_date)
+        report2_files = candidates('report2', os.path.dirname(report1_file))
+        
+        def full_path(path: str) -> str:
+            return os.path.normpath(os.path.join(self.root, path)) if path else None
+        
+        return full_path(report1_file), full_path(report2_files[0] if report2_files else None)
+
+
+class TradeStore:
+    """
+    追記専用・重複排除のトレード履歴ストア（SQLite）
+    
+    (ポイント名, ポイント値, 取引日)を主キーとし、毎週のレポート2から未登録の行のみを追加する。
+    分析対象期間の取引は取引日の索引で直接読み出す。
+    """
+    
+    def __init__(self, path: str):
+        """
+        初期化（ストアがなければ作成）
+        
+        Args:
+            path: SQLiteデータベースファイルパス
+        """
+        self.path = path
+        # StageGraphでは取り込みと読み出しが別スレッドになる（同時には使わない）
+        # run_batchでは複数のプロセスが同じストアに書き込むため、ロックの解放を待つ
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS trades (
+                point_name TEXT NOT NULL,
+                point_value INTEGER NOT NULL,
+                trade_date TEXT NOT NULL,
+                weekday TEXT NOT NULL,
+                profit_pips REAL,
+                PRIMARY KEY (point_name, point_value, trade_date)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_trades_trade_date ON trades (trade_date);
+        """)
+    
+    def close(self) -> None:
+        """
+        接続を閉じる
+        """
+        self.conn.close()
+    
+    def max_trade_date(self) -> str:
+        """
+        登録済みの最新の取引日（未登録の場合はNone）
+        """
+        return self.conn.execute("SELECT MAX(trade_date) FROM trades").fetchone()[0]
+    
+    def count(self) -> int:
+        """
+        登録済みの取引件数
+        """
+        return self.conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    
+    def ingest_report2(self, report2_file: str, chunksize: int = 500000) -> Dict[str, Any]:
+        """
+        レポート2の未登録分（差分）を追加
+        
+        登録済みの最新の取引日より前の行は読み込み時に破棄し、
+        同じ(ポイント名, ポイント値, 取引日)の行は重複として無視する
+        
+        Args:
+            report2_file: レポート2ファイルパス
+            chunksize: 1チャンクの行数
+            
+        Returns:
+            取り込み結果（読み込み行数、差分行数、追加行数、取引日の範囲）
+        """
+        latest = self.max_trade_date()
+        reader = pd.read_csv(
+            report2_file,
+            encoding='utf-8-sig',
+            usecols=list(REPORT2_STREAM_DTYPES),
+            dtype={**REPORT2_STREAM_DTYPES, 'ポイント名': 'str', '取引日_曜日': 'str'},
+            chunksize=chunksize
+        )
+        
+        rows_read = 0
+        rows_delta = 0
+        changes_before = self.conn.total_changes
+        with self.conn:
+            for chunk in reader:
+                rows_read += len(chunk)
+                trade_dates = pd.to_datetime(chunk['取引日'], errors='coerce').dt.strftime('%Y-%m-%d')
+                mask = trade_dates.notna()
+                if latest is not None:
+                    mask &= trade_dates >= latest
+                chunk = chunk[mask.to_numpy()]
+                rows_delta += len(chunk)
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?)",
+                    zip(chunk['ポイント名'], chunk['ポイント値'].astype(int).tolist(), trade_dates[mask],
+                        chunk['取引日_曜日'], chunk['損益pipsのSUM'].astype(float).tolist())
+                )
+        rows_inserted = self.conn.total_changes - changes_before
+        
+        first_date, last_date = self.conn.execute("SELECT MIN(trade_date), MAX(trade_date) FROM trades").fetchone()
+        logger.info(f"トレードストアに取り込みました: 読み込み{rows_read}行, 差分{rows_delta}行, 追加{rows_inserted}行")
+        return {
+            'rows_read': rows_read,
+            'rows_delta': rows_delta,
+            'rows_inserted': rows_inserted,
+            'first_trade_date': first_date,
+            'last_trade_date': last_date
+        }
+    
+    def read_window(self, start_date, end_date=None) -> pd.DataFrame:
+        """
+        期間内の取引をレポート2形式で読み出す（取引日順）
+        
+        Args:
+            start_date: 開始日（この日を含む）
+            end_date: 終了日（この日を含む、Noneの場合は最新まで）
+            
+        Returns:
+            レポート2形式のDataFrame
+        """
+        query = "SELECT point_name, point_value, trade_date, weekday, profit_pips FROM trades WHERE trade_date >= ?"
+        params = [pd.Timestamp(start_date).strftime('%Y-%m-%d')]
+        if end_date is not None:
+            query += " AND trade_date <= ?"
+            params.append(pd.Timestamp(end_date).strftime('%Y-%m-%d'))
+        query += " ORDER BY trade_date"
+        
+        trades_df = pd.read_sql_query(query, self.conn, params=params)
+        trades_df.columns = ['ポイント名', 'ポイント値', '取引日', '取引日_曜日', '損益pipsのSUM']
+        return parse_report2(trades_df)
+
+
 class FXAnalysisEngine:
     """FX曜日別エントリーポイント選定システム"""
     
-    def __init__(self, analysis_weeks: int = 26, pf_threshold: float = 1.3, max_results: int = 20):
+    def __init__(self, analysis_weeks: int = 26, pf_threshold: float = 1.3, max_results: int = 20,
+                 report2_chunksize: int = None, metrics_file: str = None, profile_stage: str = None,
+                 rank_by: str = 'pf', trade_store: str = None, as_of_date: str = None,
+                 use_result_cache: bool = True, non_overlapping: bool = False,
+                 output_formats: List[str] = None, pattern_set='basic', currency_universes=None,
+                 ohlc_dir: str = None, entry_shift_minutes: int = 0, spread_pips: float = None,
+                 max_gap_minutes: int = 5):
         """
         初期化
         
@@ -39,11 +1666,69 @@ class FXAnalysisEngine:
             analysis_weeks: 分析対象期間（週数）
             pf_threshold: プロフィットファクター閾値
             max_results: 最大表示件数（各曜日・各パターンごとの表示ポイント数）
+            report2_chunksize: レポート2のチャンク読み込み行数（指定時は省メモリのストリーミング集計を使用）
+            metrics_file: 段階別計測結果のJSON Lines出力先（Noneの場合は出力しない）
+            profile_stage: cProfile/tracemallocで詳細計測する段階名（find, cache, load_report1, load_report2,
+                extract, weekly_pf, select, format, save, move, organize のいずれか）
+            rank_by: 選定時の並び順（'pf': PF順、'pf_lower': ブートストラップPF信頼区間の下限順）
+            trade_store: トレードストア（SQLite）のパス。指定時はレポート2を差分のみストアに取り込み、
+                分析対象期間をストアから読み出す。基準日ディレクトリにはレポート2の代わりにマニフェストを残す
+            as_of_date: 分析対象期間の基準となる評価日（YYYY-MM-DD形式、Noneの場合は基準日）
+            use_result_cache: 入力ファイルと設定が同じ再実行では保存済みの分析結果を返す
+            non_overlapping: 選定後に同じ通貨ペアで保有時間が重なるポイントを除外し、
+                PF加重の期待pips合計が最大になる組み合わせに絞り込む
+            output_formats: 出力形式（csv, tsv, jsonl, binaryの組み合わせ、Noneの場合はcsv, tsv, jsonl）。
+                先頭の形式を主な出力ファイルとする。jsonlはfx_cli.pyのshowで照会する
+            pattern_set: 評価パターンの組（basic, us, allのいずれか、または評価パターンのリスト）
+            currency_universes: 通貨ユニバース（CURRENCY_UNIVERSESの名前のリスト、または
+                名前 → 通貨コード / 通貨ペアのリスト / None の辞書、Noneの場合はjpy_crossのみ）。
+                全ユニバースを共通の読み込み・PF集計から1回の実行で選定し、ユニバースごとに出力する
+            ohlc_dir: 通貨ペアごとの1分足CSVのディレクトリ。指定時はレポート2の代わりに、
+                レポート1のポイントを1分足で再シミュレーションした損益から曜日別PFを集計する
+            entry_shift_minutes: 再シミュレーションでエントリー時刻をずらす分数（負の値で早める、クローズ時刻は固定）
+            spread_pips: 再シミュレーションで差し引く固定のスプレッド（Noneの場合はレポート1の平均スプレッド）
+            max_gap_minutes: 再シミュレーションで該当時刻に足がない場合に次の足を使う最大の間隔（分）
         """
+        if rank_by not in ('pf', 'pf_lower'):
+            raise ValueError(f"rank_byは'pf'または'pf_lower'を指定してください: {rank_by}")
+        if max_gap_minutes < 0:
+            raise ValueError(f"max_gap_minutesは0以上を指定してください: {max_gap_minutes}")
+        output_formats = list(output_formats or ['csv', 'tsv', 'jsonl'])
+        unknown_formats = [name for name in output_formats if name not in OUTPUT_FORMATS]
+        if unknown_formats:
+            raise ValueError(f"不明な出力形式です: {unknown_formats}（{', '.join(OUTPUT_FORMATS)}から指定してください）")
+        target_patterns = PATTERN_SETS.get(pattern_set) if isinstance(pattern_set, str) else list(pattern_set)
+        if target_patterns is None:
+            raise ValueError(f"不明な評価パターンの組です: {pattern_set}（{', '.join(PATTERN_SETS)}から指定してください）")
+        currency_universes = currency_universes or [DEFAULT_UNIVERSE]
+        if not isinstance(currency_universes, dict):
+            unknown_universes = [name for name in currency_universes if name not in CURRENCY_UNIVERSES]
+            if unknown_universes:
+                raise ValueError(f"不明な通貨ユニバースです: {unknown_universes}"
+                                 f"（{', '.join(CURRENCY_UNIVERSES)}から指定するか、辞書で定義してください）")
+            currency_universes = {name: CURRENCY_UNIVERSES[name] for name in currency_universes}
+        
         self.settings = {
             'analysis_weeks': analysis_weeks,
             'pf_threshold': pf_threshold,
-            'max_results': max_results  # 各曜日・各パターンごとの最大表示件数
+            'max_results': max_results,  # 各曜日・各パターンごとの最大表示件数
+            'rank_by': rank_by,
+            'non_overlapping': non_overlapping,  # 同じ通貨ペアで保有時間が重ならないように絞り込む
+            'output_formats': output_formats,
+            'pattern_set': pattern_set,
+            'currency_universes': currency_universes,  # ユニバース名 → 通貨コード / 通貨ペアのリスト / None
+            # 1分足による再シミュレーション（ohlc_dir指定時に使用）の設定
+            'entry_shift_minutes': entry_shift_minutes,  # エントリー時刻をずらす分数（クローズ時刻は固定）
+            'spread_pips': spread_pips,                  # 固定のスプレッド（Noneの場合はレポート1の平均スプレッド）
+            'max_gap_minutes': max_gap_minutes           # 該当時刻に足がない場合に次の足を使う最大の間隔
+        }
+        
+        # PF信頼区間（rank_by='pf_lower'の場合に使用）のブートストラップ設定
+        self.bootstrap_settings = {
+            'n_resamples': 1000,
+            'confidence': 0.90,
+            'seed': 0,
+            'min_trades': 5
         }
         
         # 評価パターンの名称マッピング（レポート1 → レポート2）
@@ -63,47 +1748,88 @@ class FXAnalysisEngine:
             '利益効率ポイント': '◾️🐝利益効率',
             '勝率重視ポイント': '◾️🐟勝率重視', 
             '時間効率ポイント': '◾️⏰時間効率',
-            '最大利益ポイント': '◾️🦏最大利益'
+            '最大利益ポイント': '◾️🦏最大利益',
+            '利益効率ポイントUS': '◾️🐝利益効率US',
+            '勝率重視ポイントUS': '◾️🐟勝率重視US',
+            '時間効率ポイントUS': '◾️⏰時間効率US',
+            '最大利益ポイントUS': '◾️🦏最大利益US'
         }
         
-        # 基本4パターン（USは除外）
-        self.target_patterns = ['利益効率ポイント', '勝率重視ポイント', '時間効率ポイント', '最大利益ポイント']
+        # 対象の評価パターン（既定は基本4パターン、USは除外）
+        unknown_patterns = [pattern for pattern in target_patterns if pattern not in self.pattern_mapping]
+        if unknown_patterns:
+            raise ValueError(f"不明な評価パターンです: {unknown_patterns}")
+        self.target_patterns = target_patterns
+        
+        # レポート2のストリーミング集計（Noneの場合は一括読み込み）
+        self.report2_chunksize = report2_chunksize
+        
+        # 追記専用のトレードストア（Noneの場合はレポート2を直接使用）
+        self.trade_store = TradeStore(trade_store) if trade_store else None
+        
+        # 1分足による再シミュレーション（ohlc_dir指定時に使用、設定はself.settings）
+        self.bar_store = MinuteBarStore(ohlc_dir) if ohlc_dir else None
+        
+        # 分析対象期間の評価日（Noneの場合は基準日を使用）と分析結果キャッシュ
+        self.as_of_date = as_of_date
+        self.use_result_cache = use_result_cache
+        
+        # 段階別計測の設定
+        self.metrics_file = metrics_file
+        self.profile_stage = profile_stage
+        
+        # 週単位の累積和キューブ（build_pf_cubeで作成）
+        self.pf_cube = None
+        
+        # 入力ファイルのカタログ（get_report_catalogで作成）
+        self.report_catalog = None
         
     def find_csv_files(self, base_date: str) -> Tuple[str, str]:
         """
         指定パターンのCSVファイルを検索
         
+        作業ディレクトリと基準日ディレクトリをファイル名のパターンで検索し、
+        レポート1の基準日列（先頭行）が一致するファイルと、同じ場所のレポート2を返す
+        
         Args:
             base_date: 基準日
             
         Returns:
             (レポート1ファイルパス, レポート2ファイルパス)
         """
-        # 基準日からディレクトリ名を生成
-        base_dir = f"{base_date}"
-        
-        if not os.path.exists(base_dir):
-            raise FileNotFoundError(f"基準日のディレクトリが見つかりません: {base_dir}")
-        
-        # 固定のファイル名を使用
-        report1_file = os.path.join(base_dir, "週刊アノマリーFXレポート_2025年06月22日 - 分析レポート.csv")
-        report2_file = os.path.join(base_dir, "アノマリーFXポイント別損益明細 - ポイント別損益明細(上位20位).csv")
+        report1_file, report2_file = self.get_report_catalog().find(base_date)
         
         # ファイルの存在確認
-        if not os.path.exists(report1_file):
-            raise FileNotFoundError(f"レポート1ファイルが見つかりません: {report1_file}")
-        if not os.path.exists(report2_file):
-            raise FileNotFoundError(f"レポート2ファイルが見つかりません: {report2_file}")
+        if report1_file is None:
+            raise FileNotFoundError(f"基準日 {base_date} のレポート1ファイルが見つかりません: {REPORT1_PATTERN}")
+        if report2_file is None:
+            manifest_file = os.path.join(base_date, TRADE_MANIFEST_NAME)
+            if self.trade_store is None or not os.path.exists(manifest_file):
+                raise FileNotFoundError(f"レポート2ファイルが見つかりません: {REPORT2_PATTERN}（{os.path.dirname(report1_file) or '.'}）")
+            # トレードストアに取り込み済み（レポート2の代わりにマニフェストを返す）
+            report2_file = manifest_file
         
         logger.info(f"CSVファイル検索完了: report1={report1_file}, report2={report2_file}")
         return report1_file, report2_file
 
-    def load_csv_files(self, base_date: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def get_report_catalog(self) -> ReportCatalog:
+        """
+        入力ファイルのカタログを取得（呼び出しごとに新規・変更ファイルのみ反映）
+        
+        Returns:
+            作業ディレクトリのカタログ
+        """
+        if self.report_catalog is None:
+            self.report_catalog = ReportCatalog()
+        return self.report_catalog.refresh()
+    
+    def load_csv_files(self, base_date: str, use_cache: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         CSVファイルを読み込み
         
         Args:
             base_date: 基準日
+            use_cache: 解析済みキャッシュ（基準日ディレクトリ内）を使用するか
             
         Returns:
             (レポート1データフレーム, レポート2データフレーム)
@@ -111,13 +1837,14 @@ class FXAnalysisEngine:
         try:
             # ファイル検索
             report1_file, report2_file = self.find_csv_files(base_date)
+            cache_dir = os.path.join(base_date, CACHE_DIR_NAME) if use_cache else None
             
             # レポート1読み込み
-            report1_df = pd.read_csv(report1_file, encoding='utf-8-sig')
+            report1_df = load_parsed_csv(report1_file, parse_report1, cache_dir)
             logger.info(f"レポート1読み込み完了: {len(report1_df)}行")
             
             # レポート2読み込み
-            report2_df = pd.read_csv(report2_file, encoding='utf-8-sig')
+            report2_df = load_parsed_csv(report2_file, parse_report2, cache_dir)
             logger.info(f"レポート2読み込み完了: {len(report2_df)}行")
             
             return report1_df, report2_df
@@ -138,47 +1865,388 @@ class FXAnalysisEngine:
         Returns:
             作成したディレクトリパス
         """
-        # 既にディレクトリが存在する場合は何もしない
+        # ディレクトリ作成（解析済みキャッシュの保存で既に作成されている場合がある）
         directory = base_date
         if os.path.exists(directory):
             logger.info(f"ディレクトリは既に存在します: {directory}")
-            return directory
-            
-        # ディレクトリ作成
-        os.makedirs(directory, exist_ok=True)
-        logger.info(f"ディレクトリを作成しました: {directory}")
+        else:
+            os.makedirs(directory, exist_ok=True)
+            logger.info(f"ディレクトリを作成しました: {directory}")
         
-        # ファイル移動（既に移動済みの場合はスキップ）
-        for file_path in [report1_file, report2_file]:
+        # ファイル移動（既に移動済みの場合はスキップ、トレードストア使用時はレポート2をコピーしない）
+        for file_path in [report1_file] if self.trade_store else [report1_file, report2_file]:
             if not file_path.startswith(directory):
                 filename = os.path.basename(file_path)
                 new_path = os.path.join(directory, filename)
+                if os.path.exists(new_path):
+                    continue
                 shutil.copy2(file_path, new_path)
                 logger.info(f"ファイルをコピーしました: {file_path} -> {new_path}")
         
         return directory
     
-    def filter_analysis_period(self, report2_df: pd.DataFrame, weeks: int) -> pd.DataFrame:
+    def simulate_point_trades(self, points_df: pd.DataFrame, weeks: int, as_of_date=None) -> pd.DataFrame:
+        """
+        レポート1のポイントを1分足で再シミュレーションし、レポート2形式の取引明細を作成
+        
+        分析対象期間の全平日×全ポイントの取引を通貨ペアごとにまとめて計算する。
+        エントリー・クローズはその時刻の足の始値で約定し、クローズ時刻がエントリー時刻以前の場合は
+        翌日にクローズする（日付をまたぐ取引）。損益pipsからスプレッドを差し引く。
+        0時台のエントリーは前日の取引日として扱う（time_to_minutes_arrayと同じ規則）
+        
+        Args:
+            points_df: extract_point_frameで抽出したポイント
+            weeks: 分析対象期間（週数）
+            as_of_date: 評価日（Noneの場合はget_as_of_dateで決定）
+            
+        Returns:
+            レポート2形式の取引明細（ポイント名, ポイント値, 取引日, 取引日_曜日, 損益pipsのSUM）
+        """
+        settings = self.settings
+        cutoff_date, end_date = self.get_analysis_period(weeks, as_of_date)
+        trade_dates = pd.bdate_range(cutoff_date, end_date - timedelta(days=1))
+        day_minutes = trade_dates.to_numpy('datetime64[m]').astype(np.int64)
+        
+        # ポイント×取引日の行列で時刻を計算
+        entry_minutes = points_df['entry_minutes'].to_numpy(dtype=np.int64)
+        close_minutes = points_df['close_minutes'].to_numpy(dtype=np.int64) if 'close_minutes' in points_df.columns \
+            else time_to_minutes_array(points_df['close_time'])
+        hold_minutes = (close_minutes - entry_minutes) % 1440
+        hold_minutes = np.where(hold_minutes == 0, 1440, hold_minutes)
+        entry_at = day_minutes[None, :] + (entry_minutes + settings['entry_shift_minutes'])[:, None]
+        close_at = day_minutes[None, :] + (entry_minutes + hold_minutes)[:, None]
+        
+        entry_price = np.full(entry_at.shape, np.nan)
+        close_price = np.full(close_at.shape, np.nan)
+        for pair, positions in points_df.groupby('currency', sort=False, observed=True).indices.items():
+            try:
+                entry_price[positions] = self.bar_store.prices_at(
+                    pair, entry_at[positions].ravel(), max_gap=settings['max_gap_minutes']
+                ).reshape(len(positions), -1)
+                close_price[positions] = self.bar_store.prices_at(
+                    pair, close_at[positions].ravel(), max_gap=settings['max_gap_minutes']
+                ).reshape(len(positions), -1)
+            except FileNotFoundError as e:
+                logger.warning(f"1分足がないため再シミュレーションから除外します: {pair}: {str(e)}")
+        
+        sign = np.where(points_df['direction'].astype(str).str.lower().str.startswith('s'), -1.0, 1.0)
+        if settings['spread_pips'] is not None:
+            spread = np.full(len(points_df), settings['spread_pips'], dtype=float)
+        elif 'spread_pips' in points_df.columns:
+            spread = np.nan_to_num(points_df['spread_pips'].to_numpy(dtype=float))
+        else:
+            spread = np.zeros(len(points_df))
+        profit_pips = sign[:, None] * (close_price - entry_price) / pip_size(points_df['currency'])[:, None] - spread[:, None]
+        profit_pips[entry_at >= close_at] = np.nan
+        
+        point_positions, date_positions = np.nonzero(~np.isnan(profit_pips))
+        weekdays = np.array(['月', '火', '水', '木', '金', '土', '日'])[trade_dates.weekday]
+        trades_df = pd.DataFrame({
+            'ポイント名': points_df['report2_point_name'].astype(str).to_numpy()[point_positions],
+            'ポイント値': points_df['ranking'].to_numpy(dtype=np.int64)[point_positions],
+            '取引日': trade_dates[date_positions],
+            '取引日_曜日': weekdays[date_positions],
+            '損益pipsのSUM': np.round(profit_pips[point_positions, date_positions], 1)
+        })
+        # 同じポイント名・ランキングの取引は日ごとに合計（レポート2の損益pipsのSUMと同じ粒度）
+        trades_df = trades_df.groupby(['ポイント名', 'ポイント値', '取引日', '取引日_曜日'], sort=False)['損益pipsのSUM'] \
+            .sum().reset_index()
+        logger.info(f"1分足で再シミュレーションしました: {len(points_df)}ポイント × {len(trade_dates)}日 → {len(trades_df)}件")
+        return trades_df
+    
+    def aggregate_simulated_profit_factor(self, points_df: pd.DataFrame, weeks: int, as_of_date=None) -> pd.DataFrame:
+        """
+        再シミュレーションした取引明細から曜日別PFを集計
+        
+        Args:
+            points_df: extract_point_frameで抽出したポイント
+            weeks: 分析対象期間（週数）
+            as_of_date: 評価日（Noneの場合はget_as_of_dateで決定）
+            
+        Returns:
+            PFテーブル
+        """
+        trades_df = self.simulate_point_trades(points_df, weeks, as_of_date)
+        pf_table = build_pf_table(trades_df)
+        if self.settings['rank_by'] == 'pf_lower':
+            pf_table = self.add_pf_confidence_intervals(pf_table, trades_df)
+        logger.info(f"曜日別プロフィットファクター集計完了: {len(pf_table)}件")
+        return pf_table
+    
+    def aggregate_store_profit_factor(self, weeks: int, as_of_date=None) -> pd.DataFrame:
+        """
+        トレードストアから分析対象期間の取引を読み出して曜日別PFを集計
+        
+        Args:
+            weeks: 分析対象期間（週数）
+            as_of_date: 評価日（Noneの場合はget_as_of_dateで決定）
+            
+        Returns:
+            PFテーブル
+        """
+        cutoff_date, end_date = self.get_analysis_period(weeks, as_of_date)
+        trades_df = self.trade_store.read_window(cutoff_date, end_date - timedelta(days=1))
+        logger.info(f"分析対象期間: {weeks}週間, ストアから読み出したデータ件数: {len(trades_df)}件")
+        pf_table = build_pf_table(trades_df)
+        if self.settings['rank_by'] == 'pf_lower':
+            pf_table = self.add_pf_confidence_intervals(pf_table, trades_df)
+        logger.info(f"曜日別プロフィットファクター集計完了: {len(pf_table)}件")
+        return pf_table
+    
+    def write_trade_manifest(self, base_date: str, report2_file: str, ingest_result: Dict[str, Any]) -> str:
+        """
+        基準日ディレクトリにトレードストアのマニフェストを保存し、取り込み済みのレポート2を削除
+        
+        Args:
+            base_date: 基準日
+            report2_file: 取り込んだレポート2ファイルパス
+            ingest_result: TradeStore.ingest_report2の結果
+            
+        Returns:
+            マニフェストファイルパス
+        """
+        manifest_file = os.path.join(base_date, TRADE_MANIFEST_NAME)
+        manifest = {
+            'base_date': base_date,
+            'source_file': os.path.basename(report2_file),
+            'source_sha256': file_content_hash(report2_file),
+            'trade_store': os.path.abspath(self.trade_store.path),
+            'ingested_at': datetime.now().isoformat(timespec='seconds'),
+            **ingest_result
+        }
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        logger.info(f"トレードストアのマニフェストを保存しました: {manifest_file}")
+        
+        if os.path.dirname(os.path.abspath(report2_file)) == os.path.abspath(base_date):
+            os.remove(report2_file)
+            logger.info(f"取り込み済みのレポート2を削除しました: {report2_file}")
+        return manifest_file
+    
+    def get_as_of_date(self, base_date: str = None) -> pd.Timestamp:
+        """
+        分析対象期間の評価日を決定
+        
+        Args:
+            base_date: 基準日
+            
+        Returns:
+            評価日（as_of_date指定時はその日、未指定時は基準日、どちらもなければ当日）
+        """
+        as_of_date = self.as_of_date or base_date
+        if as_of_date is None:
+            return pd.Timestamp(datetime.now()).normalize()
+        return pd.Timestamp(as_of_date).normalize()
+    
+    def get_cutoff_date(self, weeks: int, as_of_date=None) -> datetime:
+        """
+        分析対象期間の開始日を計算
+        
+        評価日を最終日とするweeks週（weeks×7日）を分析対象期間とする。
+        PFCubeの集計期間も同じ規則で決まる
+        
+        Args:
+            weeks: 分析対象期間（週数）
+            as_of_date: 評価日（Noneの場合はget_as_of_dateで決定）
+            
+        Returns:
+            この日以降の取引を分析対象とする
+        """
+        as_of_date = self.get_as_of_date() if as_of_date is None else pd.Timestamp(as_of_date).normalize()
+        return as_of_date - timedelta(weeks=weeks) + timedelta(days=1)
+    
+    def get_analysis_period(self, weeks: int, as_of_date=None) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """
+        分析対象期間を計算
+        
+        Args:
+            weeks: 分析対象期間（週数）
+            as_of_date: 評価日（Noneの場合はget_as_of_dateで決定）
+            
+        Returns:
+            (開始日, 終了日の翌日)。開始日以上・終了日の翌日未満の取引を分析対象とする
+        """
+        as_of_date = self.get_as_of_date() if as_of_date is None else pd.Timestamp(as_of_date).normalize()
+        return pd.Timestamp(self.get_cutoff_date(weeks, as_of_date)), as_of_date + timedelta(days=1)
+    
+    def stream_weekly_profit_factor(self, report2_file: str, weeks: int, chunksize: int = 500000,
+                                    as_of_date=None) -> Tuple[pd.DataFrame, int]:
+        """
+        レポート2をチャンク単位で読み込みながら曜日別PFを集計（省メモリ版）
+        
+        必要な列のみを型指定で読み込み、分析対象期間外の行はチャンクごとに破棄して
+        中間集計に畳み込むため、メモリ使用量は取引履歴の長さにほぼ依存しない。
+        rank_by='pf_lower'の場合は信頼区間の計算のため分析対象期間内の行のみを保持する
+        
+        Args:
+            report2_file: レポート2ファイルパス
+            weeks: 分析対象期間（週数）
+            chunksize: 1チャンクの行数
+            as_of_date: 評価日（Noneの場合はget_as_of_dateで決定）
+            
+        Returns:
+            (PFテーブル, 読み込んだ総行数)。rank_by='pf_lower'の場合はpf_lower, pf_upper列を追加
+        """
+        cutoff_date, end_date = self.get_analysis_period(weeks, as_of_date)
+        reader = pd.read_csv(
+            report2_file,
+            encoding='utf-8-sig',
+            usecols=list(REPORT2_STREAM_DTYPES),
+            dtype=REPORT2_STREAM_DTYPES,
+            chunksize=chunksize
+        )
+        
+        with_intervals = self.settings['rank_by'] == 'pf_lower'
+        running = None
+        total_rows = 0
+        filtered_rows = 0
+        window_chunks = []
+        for chunk in reader:
+            total_rows += len(chunk)
+            trade_dates = pd.to_datetime(chunk['取引日'], errors='coerce')
+            chunk = chunk[((trade_dates >= cutoff_date) & (trade_dates < end_date)).to_numpy()]
+            if chunk.empty:
+                continue
+            filtered_rows += len(chunk)
+            aggregate = partial_pf_aggregate(chunk)
+            running = aggregate if running is None else combine_pf_aggregates([running, aggregate])
+            if with_intervals:
+                window_chunks.append(chunk)
+        
+        empty_trades = pd.DataFrame(columns=list(REPORT2_STREAM_DTYPES))
+        if running is None:
+            running = partial_pf_aggregate(empty_trades)
+        running[['total_profit', 'total_loss']] = running[['total_profit', 'total_loss']].round(PF_TOTAL_DECIMALS)
+        running['pf'] = compute_profit_factor(running['total_profit'], running['total_loss'])
+        if with_intervals:
+            trades_df = pd.concat(window_chunks, ignore_index=True) if window_chunks else empty_trades
+            running = self.add_pf_confidence_intervals(running, trades_df)
+        
+        logger.info(f"分析対象期間: {weeks}週間, フィルタ後データ件数: {filtered_rows}件（全{total_rows}行をチャンク読み込み）")
+        logger.info(f"曜日別プロフィットファクター集計完了: {len(running)}件")
+        return running, total_rows
+    
+    def filter_analysis_period(self, report2_df: pd.DataFrame, weeks: int, as_of_date=None) -> pd.DataFrame:
         """
         分析対象期間のデータをフィルタリング
         
+        評価日より後の取引は含めないため、同じ評価日であれば実行日に関係なく同じ結果になる
+        
         Args:
             report2_df: レポート2のDataFrame
             weeks: 分析対象期間（週数）
+            as_of_date: 評価日（Noneの場合はget_as_of_dateで決定）
             
         Returns:
             フィルタリングされたDataFrame
         """
-        cutoff_date = datetime.now() - timedelta(weeks=weeks)
+        cutoff_date, end_date = self.get_analysis_period(weeks, as_of_date)
         report2_df['取引日'] = pd.to_datetime(report2_df['取引日'])
-        filtered_df = report2_df[report2_df['取引日'] >= cutoff_date]
+        filtered_df = report2_df[(report2_df['取引日'] >= cutoff_date) & (report2_df['取引日'] < end_date)]
         logger.info(f"分析対象期間: {weeks}週間, フィルタ後データ件数: {len(filtered_df)}件")
         return filtered_df
     
+    def extract_point_frame(self, report1_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        レポート1から評価パターン別のランキングポイントを一括抽出（ベクトル化版）
+        いずれかの通貨ユニバース（既定はクロス円）に含まれる通貨ペアのみを対象とし、評価パターン列を縦持ちに変換する
+        
+        通貨ペア・方向・評価パターン・時刻はカテゴリ型、エントリー/クローズ時刻は分単位の整数
+        （0時台は24時台）、勝率はfloat32で保持する。辞書形式への変換は出力時のみ行う
+        
+        Args:
+            report1_df: レポート1のDataFrame
+            
+        Returns:
+            ポイント情報のDataFrame（ランキング順）
+        """
+        # 通貨ユニバースのいずれかに含まれる通貨ペアのみをフィルタリング（判定はカテゴリごとに1回）
+        universe_mask = np.zeros(len(report1_df), dtype=bool)
+        for universe in self.settings['currency_universes'].values():
+            universe_mask |= currency_universe_mask(report1_df['銘柄'], universe)
+        source = report1_df[universe_mask]
+        
+        # 日方向カラムがない場合は方向カラムを使用
+        day_direction = source['日方向'] if '日方向' in source.columns else source['方向']
+        
+        # 評価パターン列を縦持ちに変換（1パターン = 1行）し、
+        # ランキング順でソート（同順位は元の行順・パターン順を維持）
+        patterns = [pattern for pattern in self.target_patterns if pattern in source.columns]
+        rankings = np.column_stack(
+            [pd.to_numeric(source[pattern], errors='coerce').to_numpy(dtype=float) for pattern in patterns]
+        ) if patterns else np.zeros((len(source), 0))
+        row_positions, pattern_codes = np.nonzero((rankings >= 1) & (rankings <= 20))
+        ranking = rankings[row_positions, pattern_codes]
+        order = np.lexsort((pattern_codes, row_positions, ranking))
+        row_positions, pattern_codes, ranking = row_positions[order], pattern_codes[order], ranking[order]
+        
+        def take_category(column: pd.Series) -> pd.Categorical:
+            return column.astype('category').array.take(row_positions).remove_unused_categories()
+        
+        entry_time = take_category(source['エントリー時刻'])
+        close_time = take_category(source['クローズ時刻'])
+        points_df = pd.DataFrame({
+            'row_index': source.index.to_numpy()[row_positions],
+            'point_name': pd.Categorical.from_codes(pattern_codes, categories=patterns),
+            'report2_point_name': pd.Categorical.from_codes(
+                pattern_codes, categories=[self.pattern_mapping[pattern] for pattern in patterns]
+            ),
+            'ranking': ranking.astype(np.int16),
+            'currency': take_category(source['銘柄']),
+            'direction': take_category(source['方向']),
+            'day_direction': take_category(day_direction),
+            'entry_time': entry_time,
+            'close_time': close_time,
+            'entry_minutes': time_to_minutes_array(pd.Series(entry_time)).astype(np.int16),
+            'close_minutes': time_to_minutes_array(pd.Series(close_time)).astype(np.int16)
+        })
+        for column, report1_column in zip(['win_rate_30', 'win_rate_90', 'win_rate_365', 'win_rate_avg'],
+                                          WIN_RATE_COLUMNS):
+            points_df[column] = parse_percent_column(source, report1_column).astype(np.float32)[row_positions]
+        spread = pd.to_numeric(source[SPREAD_COLUMN], errors='coerce') if SPREAD_COLUMN in source.columns \
+            else pd.Series(np.nan, index=source.index)
+        points_df['spread_pips'] = spread.to_numpy(dtype=np.float32)[row_positions]
+        
+        logger.info(f"レポート1から抽出したポイント数: {len(points_df)}件")
+        logger.info(f"通貨ユニバースでフィルタリングしました: {', '.join(self.settings['currency_universes'])}")
+        return points_df
+    
+    def point_frame_to_records(self, points_df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        ポイントのDataFrameを辞書のリストに変換（出力境界で使用）
+        
+        Args:
+            points_df: extract_point_frameで抽出したポイント
+            
+        Returns:
+            ポイント情報のリスト
+        """
+        if 'details' in points_df.columns:
+            details = points_df['details']
+        else:
+            details = (points_df['day_direction'].astype(str) + '_' + points_df['currency'].astype(str) + '_' +
+                       points_df['entry_time'].astype(str) + '_' + points_df['close_time'].astype(str))
+        records = pd.DataFrame({
+            'row_index': points_df['row_index'].to_numpy(),
+            'point_name': points_df['point_name'].astype(str).to_numpy(),
+            'report2_point_name': points_df['report2_point_name'].astype(str).to_numpy(),
+            'ranking': points_df['ranking'].to_numpy(dtype=np.int64),
+            'currency': points_df['currency'].astype(str).to_numpy(),
+            'direction': points_df['direction'].astype(str).to_numpy(),
+            'entry_time': points_df['entry_time'].astype(str).to_numpy(),
+            'close_time': points_df['close_time'].astype(str).to_numpy(),
+            'entry_minutes': points_df['entry_minutes'].to_numpy(dtype=np.int64),
+            'details': details.to_numpy()
+        })
+        # float32の勝率は元の小数の桁に丸めて戻す
+        for column in ['win_rate_30', 'win_rate_90', 'win_rate_365', 'win_rate_avg']:
+            records[column] = np.round(points_df[column].to_numpy(dtype=float), 6)
+        return records.to_dict('records')
+    
     def extract_points_from_report1(self, report1_df: pd.DataFrame) -> List[Dict[str, Any]]:
         """
         レポート1から評価パターン別のランキングポイントを抽出
-        クロス円（JPYペア）のみを対象とする
+        いずれかの通貨ユニバース（既定はクロス円）に含まれる通貨ペアのみを対象とする
         
         Args:
             report1_df: レポート1のDataFrame
@@ -186,165 +2254,379 @@ class FXAnalysisEngine:
         Returns:
             ポイント情報のリスト
         """
-        points = []
+        return self.point_frame_to_records(self.extract_point_frame(report1_df))
+    
+    def aggregate_weekly_profit_factor(self, report2_df: pd.DataFrame, weeks: int, as_of_date=None) -> pd.DataFrame:
+        """
+        曜日別プロフィットファクターを一括集計（ベクトル化版）
         
-        for idx, row in report1_df.iterrows():
-            # クロス円（JPYペア）のみをフィルタリング
-            currency = str(row['銘柄'])  # 文字列に変換
-            if not (currency.endswith('JPY') or currency.startswith('JPY')):
-                continue
-                
-            for pattern in self.target_patterns:
-                if pattern in row and pd.notna(row[pattern]):
-                    ranking = float(row[pattern])
-                    if 1 <= ranking <= 20:
-                        # 日方向カラムがない場合は方向カラムを使用
-                        day_direction = row.get('日方向', row['方向'])
-                        
-                        # パーセント文字列を浮動小数点に変換する関数
-                        def parse_percent(val):
-                            if pd.isna(val):
-                                return 0.0
-                            if isinstance(val, str) and '%' in val:
-                                return float(val.strip('%')) / 100.0
-                            return float(val)
-                        
-                        point_info = {
-                            'row_index': idx,
-                            'point_name': pattern,
-                            'report2_point_name': self.pattern_mapping[pattern],
-                            'ranking': int(ranking),
-                            'currency': currency,
-                            'direction': row['方向'],
-                            'entry_time': row['エントリー時刻'],
-                            'close_time': row['クローズ時刻'],
-                            'details': f"{day_direction}_{currency}_{row['エントリー時刻']}_{row['クローズ時刻']}",
-                            'win_rate_30': parse_percent(row.get('勝率_30日', 0)),
-                            'win_rate_90': parse_percent(row.get('勝率_90日', 0)),
-                            'win_rate_365': parse_percent(row.get('勝率_365日', 0)),
-                            'win_rate_avg': parse_percent(row.get('勝率_平均', 0))
-                        }
-                        points.append(point_info)
+        ポイント名×曜日×ランキングで1回のgroupbyを行い、列形式のPFテーブルを返す
         
-        # ランキング順でソート
-        points.sort(key=lambda x: x['ranking'])
-        logger.info(f"レポート1から抽出したポイント数: {len(points)}件")
-        logger.info(f"クロス円（JPYペア）のみをフィルタリングしました")
-        return points
+        Args:
+            report2_df: レポート2のDataFrame
+            weeks: 分析対象期間（週数）
+            as_of_date: 評価日（Noneの場合はget_as_of_dateで決定）
+            
+        Returns:
+            PFテーブル（ポイント名, 取引日_曜日, ポイント値, total_profit, total_loss, trades, profit_pips, pf）
+            rank_by='pf_lower'の場合はpf_lower, pf_upper列を追加
+        """
+        filtered_df = self.filter_analysis_period(report2_df, weeks, as_of_date)
+        pf_table = build_pf_table(filtered_df)
+        if self.settings['rank_by'] == 'pf_lower':
+            pf_table = self.add_pf_confidence_intervals(pf_table, filtered_df)
+        logger.info(f"曜日別プロフィットファクター集計完了: {len(pf_table)}件")
+        return pf_table
+    
+    def add_pf_confidence_intervals(self, pf_table: pd.DataFrame, trades_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        PFテーブルにブートストラップ信頼区間（pf_lower, pf_upper）を追加
+        
+        Args:
+            pf_table: PFテーブル
+            trades_df: PFテーブルの集計元の取引明細
+            
+        Returns:
+            信頼区間付きのPFテーブル
+        """
+        intervals = bootstrap_pf_intervals(trades_df, **self.bootstrap_settings)
+        logger.info(f"PF信頼区間計算完了: {len(intervals)}セル × {self.bootstrap_settings['n_resamples']}回")
+        return pf_table.merge(intervals, on=PF_KEY_COLUMNS, how='left')
+    
+    def build_pf_cube(self, report2_df: pd.DataFrame) -> PFCube:
+        """
+        レポート2から週単位の累積和キューブを作成して保持
+        
+        Args:
+            report2_df: レポート2のDataFrame
+            
+        Returns:
+            PFCube
+        """
+        self.pf_cube = PFCube.from_trades(report2_df)
+        return self.pf_cube
+    
+    def query_profit_factor(self, weeks: int, base_date: str) -> pd.DataFrame:
+        """
+        任意の週数・基準日のPFテーブルをキューブから取得
+        
+        集計期間はfilter_analysis_periodと同じく、評価日（get_as_of_date）を最終日とするweeks×7日
+        
+        Args:
+            weeks: 分析対象期間（週数）
+            base_date: 基準日（YYYY-MM-DD形式）
+            
+        Returns:
+            PFテーブル（select_optimal_pointsにそのまま渡せる）
+        """
+        if self.pf_cube is None:
+            raise ValueError("PFキューブが作成されていません。先にbuild_pf_cubeを実行してください")
+        as_of_date = self.get_as_of_date(base_date)
+        pf_table = self.pf_cube.window_table(weeks, as_of_date)
+        logger.info(f"PFキューブ照会: {weeks}週間（評価日 {as_of_date.date()}）, {len(pf_table)}件")
+        return pf_table
+    
+    def export_pf_snapshot(self, pf_table: pd.DataFrame, path: str, base_date: str = None) -> PFSnapshot:
+        """
+        曜日別PF（calculate_weekly_profit_factorの集計結果）をメモリマップ可能なスナップショットに書き出す
+        
+        Args:
+            pf_table: aggregate_weekly_profit_factor / query_profit_factorで作成したPFテーブル
+            path: スナップショット本体のファイルパス（確認用のヘッダは拡張子を.jsonにしたファイル）
+            base_date: 基準日（ヘッダに記録）
+            
+        Returns:
+            PFSnapshot
+        """
+        metadata = {
+            'base_date': base_date,
+            'as_of_date': self.get_as_of_date(base_date).strftime('%Y-%m-%d'),
+            'settings': self.settings
+        }
+        return PFSnapshot.write(pf_table, path, metadata)
+    
+    def pf_table_to_dict(self, pf_table: pd.DataFrame) -> Dict[str, Any]:
+        """
+        PFテーブルを従来の入れ子辞書形式に変換
+        
+        Args:
+            pf_table: aggregate_weekly_profit_factorで作成したPFテーブル
+            
+        Returns:
+            曜日別PFデータ構造（weekly_pf[ポイント名][曜日][ランキング]）
+        """
+        weekly_pf = {}
+        columns = zip(
+            pf_table['ポイント名'], pf_table['取引日_曜日'], pf_table['ポイント値'],
+            pf_table['total_profit'], pf_table['total_loss'], pf_table['trades'],
+            pf_table['pf'], pf_table['profit_pips']
+        )
+        for point_name, day_of_week, point_value, total_profit, total_loss, trades, pf, profit_pips in columns:
+            weekly_pf.setdefault(point_name, {}).setdefault(day_of_week, {})[int(point_value)] = {
+                'total_profit': float(total_profit),
+                'total_loss': float(total_loss),
+                'trades': int(trades),
+                'pf': float(pf),
+                'profit_pips': float(profit_pips)
+            }
+        return weekly_pf
     
-    def calculate_weekly_profit_factor(self, report2_df: pd.DataFrame, weeks: int) -> Dict[str, Any]:
+    def calculate_weekly_profit_factor(self, report2_df: pd.DataFrame, weeks: int, as_of_date=None) -> Dict[str, Any]:
         """
         曜日別プロフィットファクター計算（第1検証フェーズ）
         
         Args:
-            report2_df: レポート2のDataFrame
-            weeks: 分析対象期間（週数）
+            report2_df: レポート2のDataFrame
+            weeks: 分析対象期間（週数）
+            as_of_date: 評価日（Noneの場合はget_as_of_dateで決定）
+            
+        Returns:
+            曜日別PFデータ構造
+        """
+        pf_table = self.aggregate_weekly_profit_factor(report2_df, weeks, as_of_date)
+        weekly_pf = self.pf_table_to_dict(pf_table)
+        
+        logger.info("曜日別プロフィットファクター計算完了")
+        return weekly_pf
+    
+    def pf_dict_to_table(self, weekly_pf: Dict[str, Any]) -> pd.DataFrame:
+        """
+        入れ子辞書形式のPFデータをPFテーブルに変換
+        
+        Args:
+            weekly_pf: 曜日別PFデータ構造（weekly_pf[ポイント名][曜日][ランキング]）
+            
+        Returns:
+            PFテーブル
+        """
+        rows = [
+            {'ポイント名': point_name, '取引日_曜日': day_of_week, 'ポイント値': int(point_value), **data}
+            for point_name, days in weekly_pf.items()
+            for day_of_week, rankings in days.items()
+            for point_value, data in rankings.items()
+        ]
+        columns = PF_KEY_COLUMNS + ['total_profit', 'total_loss', 'trades', 'profit_pips', 'pf']
+        return pd.DataFrame(rows, columns=columns)
+    
+    def join_points_with_pf(self, points_df: pd.DataFrame, pf_table: pd.DataFrame,
+                            pf_threshold: float = None) -> pd.DataFrame:
+        """
+        ポイントとPFテーブルを(ポイント名, ランキング, 曜日)で1回結合
+        
+        Args:
+            points_df: extract_point_frameで抽出したポイント
+            pf_table: aggregate_weekly_profit_factorで作成したPFテーブル
+            pf_threshold: PF閾値（Noneの場合は閾値で絞り込まない）
+            
+        Returns:
+            平日分の候補（weekday, point_order, entry_minutes列を追加）
+        """
+        days_of_week = ['月', '火', '水', '木', '金']
+        
+        points_df = points_df.reset_index(drop=True)
+        if 'entry_minutes' not in points_df.columns:
+            points_df = points_df.assign(entry_minutes=time_to_minutes_array(points_df['entry_time']))
+        points_df = points_df.assign(point_order=np.arange(len(points_df)))
+        
+        mask = pf_table['取引日_曜日'].isin(days_of_week)
+        if pf_threshold is not None:
+            mask &= pf_table['pf'] >= pf_threshold
+        candidates = pf_table[mask].rename(
+            columns={'ポイント名': 'report2_point_name', 'ポイント値': 'ranking', '取引日_曜日': 'weekday'}
+        )
+        merged = points_df.merge(candidates, on=['report2_point_name', 'ranking'], how='inner')
+        merged['weekday'] = pd.Categorical(merged['weekday'], categories=days_of_week)
+        return merged
+    
+    def select_optimal_frame(self, points_df: pd.DataFrame, pf_table: pd.DataFrame) -> pd.DataFrame:
+        """
+        曜日別最適エントリーポイントを結合ベースで一括選定
+        
+        ポイントとPFテーブルを(ポイント名, ランキング, 曜日)で1回結合し、
+        曜日×評価パターンごとにPF上位max_results件を部分選択で取り出す。
+        選定対象は先頭の通貨ユニバースのみ（全ユニバースの選定はselect_universe_pointsを使用）
+        
+        Args:
+            points_df: extract_point_frameで抽出したポイント
+            pf_table: aggregate_weekly_profit_factorで作成したPFテーブル
+            
+        Returns:
+            選定結果のDataFrame（曜日・評価パターン・エントリー時刻順）
+        """
+        rank_by = self.settings['rank_by']
+        if rank_by not in pf_table.columns:
+            raise ValueError(f"PFテーブルに{rank_by}列がありません（PF信頼区間は取引明細からの集計時のみ計算できます）")
+        merged = self.join_points_with_pf(points_df, pf_table, self.settings['pf_threshold'])
+        return self.select_candidates(self.filter_primary_universe(merged))
+    
+    def filter_primary_universe(self, merged: pd.DataFrame) -> pd.DataFrame:
+        """
+        結合済みの候補を先頭の通貨ユニバースに絞り込む
+        
+        extract_point_frameは全ユニバースの和集合を残すため、1つの選定結果を返す経路
+        （select_optimal_frame、パラメータスイープ）はユニバースを混ぜないようにここで絞り込む
+        
+        Args:
+            merged: join_points_with_pfの結果
+            
+        Returns:
+            先頭の通貨ユニバースの候補
+        """
+        universe = next(iter(self.settings['currency_universes'].values()))
+        return merged[currency_universe_mask(merged['currency'], universe)]
+    
+    def select_candidates(self, merged: pd.DataFrame) -> pd.DataFrame:
+        """
+        結合済みの候補から曜日×評価パターンごとにPF上位max_results件を選定
+        
+        Args:
+            merged: join_points_with_pfの結果（PF閾値で絞り込み済み）
+            
+        Returns:
+            選定結果のDataFrame（曜日・評価パターン・エントリー時刻順）
+        """
+        max_results = self.settings['max_results']
+        rank_by = self.settings['rank_by']
+        selected = []
+        for _, group in merged.groupby(['weekday', 'point_name'], sort=False, observed=True):
+            # PF（またはPF下限）上位を部分選択（同値は元の順序を優先）し、エントリー時刻順に並べる
+            top = group.nlargest(max_results, rank_by, keep='first')
+            selected.append(top.sort_values('entry_minutes', kind='stable'))
+        
+        if not selected:
+            return merged.iloc[0:0]
+        selected_df = pd.concat(selected, ignore_index=True)
+        if self.settings['non_overlapping']:
+            selected_df = self.schedule_portfolio(selected_df)
+        return selected_df
+    
+    def schedule_portfolio(self, selected_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        同時に保有できない（同じ通貨ペアで保有時間が重なる）ポイントを除外
+        
+        通貨ペアごとに月曜からの通し時間軸（曜日×1440分＋時刻）へ区間を並べ、
+        PF（rank_by列）×1取引あたりの期待pipsの合計が最大になる重ならない組み合わせを選ぶ。
+        クローズ時刻がエントリー時刻以前のポイントは翌日にクローズするものとし、
+        日をまたいで翌日のポイントと重なる場合も除外対象とする
+        
+        Args:
+            selected_df: select_optimal_frameの選定結果
+            
+        Returns:
+            絞り込み後の選定結果（元の並び順を維持）
+        """
+        if selected_df.empty:
+            return selected_df
+        
+        day_offsets = selected_df['weekday'].map({day: i for i, day in enumerate(['月', '火', '水', '木', '金'])})
+        entry_minutes = selected_df['entry_minutes'].to_numpy(dtype=np.int64)
+        close_minutes = selected_df['close_minutes'].to_numpy(dtype=np.int64) if 'close_minutes' in selected_df.columns \
+            else time_to_minutes_array(selected_df['close_time'])
+        close_minutes = np.where(close_minutes <= entry_minutes, close_minutes + 1440, close_minutes)
+        
+        starts = day_offsets.to_numpy(dtype=np.int64) * 1440 + entry_minutes
+        ends = starts + (close_minutes - entry_minutes)
+        expected_pips = (selected_df['total_profit'] - selected_df['total_loss']).to_numpy() / selected_df['trades'].to_numpy()
+        weights = selected_df[self.settings['rank_by']].to_numpy(dtype=float) * expected_pips
+        
+        keep = np.zeros(len(selected_df), dtype=bool)
+        for positions in selected_df.groupby('currency', sort=False, observed=True).indices.values():
+            keep[positions] = schedule_non_overlapping(starts[positions], ends[positions], weights[positions])
+        
+        logger.info(f"保有時間の重なりを除外しました: {len(selected_df)}件 → {int(keep.sum())}件")
+        return selected_df[keep].reset_index(drop=True)
+    
+    def selection_frame_to_dict(self, selected_df: pd.DataFrame, points_df: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        選定結果のDataFrameを従来の曜日別辞書形式に変換（出力境界で使用）
+        
+        Args:
+            selected_df: select_optimal_frameの選定結果
+            points_df: 選定元のポイント（point_detailsの作成に使用）
+            
+        Returns:
+            曜日別最適ポイント（results[曜日][評価パターン] = ポイントのリスト）
+        """
+        days_of_week = ['月', '火', '水', '木', '金']
+        results = {day: {pattern: [] for pattern in self.target_patterns} for day in days_of_week}
+        # 選定されたポイントのみ辞書に変換
+        point_records = self.point_frame_to_records(points_df.iloc[selected_df['point_order'].to_numpy()])
+        
+        columns = zip(
+            selected_df['weekday'], selected_df['point_name'],
+            selected_df['profit_pips'], selected_df['pf'], selected_df['trades'],
+            selected_df['total_profit'], selected_df['total_loss']
+        )
+        has_intervals = 'pf_lower' in selected_df.columns
+        for row_no, (day, pattern, profit_pips, pf, trades, total_profit, total_loss) in enumerate(columns):
+            if day not in results or pattern not in results[day]:
+                continue
+            point = point_records[row_no]
+            optimal_point = {
+                'currency': point['currency'],
+                'entry_time': point['entry_time'],
+                'close_time': point['close_time'],
+                'direction': point['direction'],
+                'ranking': point['ranking'],
+                'profit_pips': float(profit_pips),
+                'pf': float(pf),
+                'trades': int(trades),
+                'total_profit': float(total_profit),
+                'total_loss': float(total_loss),
+                'point_details': point
+            }
+            if has_intervals:
+                optimal_point['pf_lower'] = float(selected_df['pf_lower'].iat[row_no])
+                optimal_point['pf_upper'] = float(selected_df['pf_upper'].iat[row_no])
+            results[day][pattern].append(optimal_point)
+        return results
+    
+    def select_universe_points(self, points_df: pd.DataFrame, pf_table: pd.DataFrame) -> Dict[str, Dict[str, Dict]]:
+        """
+        全ての通貨ユニバースについて曜日別最適エントリーポイントを選定
+        
+        ポイントとPFテーブルの結合は1回だけ行い、ユニバースごとには通貨ペアでの絞り込みと上位選定のみを行う
+        
+        Args:
+            points_df: extract_point_frameで抽出したポイント
+            pf_table: aggregate_weekly_profit_factorで作成したPFテーブル
             
         Returns:
-            曜日別PFデータ構造
+            ユニバース名 → 曜日別最適ポイント（設定の順）
         """
-        filtered_df = self.filter_analysis_period(report2_df, weeks)
-        weekly_pf = {}
-        
-        for _, row in filtered_df.iterrows():
-            point_name = row['ポイント名']
-            day_of_week = row['取引日_曜日']
-            point_value = int(row['ポイント値'])
-            profit_pips = float(row['損益pipsのSUM']) if pd.notna(row['損益pipsのSUM']) else 0.0
-            
-            # データ構造の初期化
-            if point_name not in weekly_pf:
-                weekly_pf[point_name] = {}
-            if day_of_week not in weekly_pf[point_name]:
-                weekly_pf[point_name][day_of_week] = {}
-            if point_value not in weekly_pf[point_name][day_of_week]:
-                weekly_pf[point_name][day_of_week][point_value] = {
-                    'total_profit': 0.0,
-                    'total_loss': 0.0,
-                    'trades': 0,
-                    'pf': 0.0,
-                    'profit_pips': profit_pips
-                }
-            
-            target = weekly_pf[point_name][day_of_week][point_value]
-            target['trades'] += 1
-            target['profit_pips'] = profit_pips
-            
-            if profit_pips > 0:
-                target['total_profit'] += profit_pips
-            else:
-                target['total_loss'] += abs(profit_pips)
-            
-            # プロフィットファクター計算
-            if target['total_loss'] == 0:
-                target['pf'] = 999.9 if target['total_profit'] > 0 else 0
-            else:
-                target['pf'] = target['total_profit'] / target['total_loss']
+        rank_by = self.settings['rank_by']
+        if rank_by not in pf_table.columns:
+            raise ValueError(f"PFテーブルに{rank_by}列がありません（PF信頼区間は取引明細からの集計時のみ計算できます）")
+        points_df = points_df.reset_index(drop=True)
+        merged = self.join_points_with_pf(points_df, pf_table, self.settings['pf_threshold'])
         
-        logger.info("曜日別プロフィットファクター計算完了")
-        return weekly_pf
+        universe_results = {}
+        for name, universe in self.settings['currency_universes'].items():
+            candidates = merged[currency_universe_mask(merged['currency'], universe)]
+            selected_df = self.select_candidates(candidates)
+            universe_results[name] = self.selection_frame_to_dict(selected_df, points_df)
+            logger.info(f"通貨ユニバース {name} の選定完了: {len(selected_df)}件")
+        return universe_results
     
     def select_optimal_points(self, report1_points: List[Dict], weekly_pf: Dict) -> Dict[str, Dict]:
         """
         曜日別最適エントリーポイント選定（第2検証フェーズ）
         
         Args:
-            report1_points: レポート1から抽出したポイント
-            weekly_pf: 曜日別PFデータ
+            report1_points: レポート1から抽出したポイント（リストまたはDataFrame）
+            weekly_pf: 曜日別PFデータ（入れ子辞書またはPFテーブル）
             
         Returns:
             曜日別最適ポイント
         """
-        days_of_week = ['月', '火', '水', '木', '金']
-        results = {}
+        points_df = report1_points if isinstance(report1_points, pd.DataFrame) else pd.DataFrame(report1_points)
+        pf_table = weekly_pf if isinstance(weekly_pf, pd.DataFrame) else self.pf_dict_to_table(weekly_pf)
         
-        for day in days_of_week:
-            results[day] = {pattern: [] for pattern in self.target_patterns}
-            
-            for point in report1_points:
-                point_name = point['report2_point_name']
-                ranking = point['ranking']
-                
-                if (point_name in weekly_pf and 
-                    day in weekly_pf[point_name] and 
-                    ranking in weekly_pf[point_name][day]):
-                    
-                    ranking_data = weekly_pf[point_name][day][ranking]
-                    
-                    if ranking_data['pf'] >= self.settings['pf_threshold']:
-                        optimal_point = {
-                            'currency': point['currency'],
-                            'entry_time': point['entry_time'],
-                            'close_time': point['close_time'],
-                            'direction': point['direction'],
-                            'ranking': point['ranking'],
-                            'profit_pips': ranking_data['profit_pips'],
-                            'pf': ranking_data['pf'],
-                            'trades': ranking_data['trades'],
-                            'total_profit': ranking_data['total_profit'],
-                            'total_loss': ranking_data['total_loss'],
-                            'point_details': point
-                        }
-                        results[day][point['point_name']].append(optimal_point)
-            
-            # 各評価パターンでエントリー時間順にソート
-            for pattern in self.target_patterns:
-                # まずPF順にソート（降順）
-                results[day][pattern].sort(key=lambda x: x['pf'], reverse=True)
-                # PF閾値以上のポイントを最大表示件数まで選択
-                filtered_points = results[day][pattern][:self.settings['max_results']]
-                
-                # エントリー時間を数値化して比較するための関数
-                def time_to_minutes(time_str):
-                    hours, minutes, seconds = map(int, time_str.split(':'))
-                    # 0時台は24時台として扱う（日付をまたぐケース）
-                    if hours == 0:
-                        hours = 24
-                    return hours * 60 + minutes
-                
-                # 選択したポイントをエントリー時間順にソート（昇順）
-                filtered_points.sort(key=lambda x: time_to_minutes(x['entry_time']))
-                results[day][pattern] = filtered_points
+        if points_df.empty:
+            results = {day: {pattern: [] for pattern in self.target_patterns} for day in ['月', '火', '水', '木', '金']}
+        else:
+            selected_df = self.select_optimal_frame(points_df, pf_table)
+            results = self.selection_frame_to_dict(selected_df, points_df)
         
         logger.info("曜日別最適エントリーポイント選定完了")
         return results
@@ -403,6 +2685,253 @@ class FXAnalysisEngine:
         logger.info("結果のフォーマット完了")
         return formatted_results
     
+    def get_weekday_dates(self, base_date: str) -> Dict[str, datetime]:
+        """
+        基準日から対象週の各曜日（月〜金）の日付を計算
+        
+        Args:
+            base_date: 基準日（YYYY-MM-DD形式）
+            
+        Returns:
+            曜日 → 日付
+        """
+        base_date_obj = datetime.strptime(base_date, '%Y-%m-%d')
+        base_weekday = base_date_obj.weekday()  # 0=月, 1=火, 2=水, 3=木, 4=金, 5=土, 6=日
+        weekday_map = {'月': 0, '火': 1, '水': 2, '木': 3, '金': 4}
+        
+        if base_weekday == 6:  # 日曜日
+            # 基準日が日曜日の場合、翌日（月曜日）から始まる週を計算
+            monday = base_date_obj + timedelta(days=1)
+        else:
+            # 基準日の週の月曜日を見つける
+            monday = base_date_obj - timedelta(days=base_weekday)
+        
+        return {day: monday + timedelta(days=day_idx) for day, day_idx in weekday_map.items()}
+    
+    def build_output_frame(self, day_results: Dict[str, Dict]) -> pd.DataFrame:
+        """
+        曜日別最適ポイントを出力用の縦持ちDataFrameに変換
+        
+        Args:
+            day_results: 曜日別最適ポイント（select_optimal_pointsの結果）
+            
+        Returns:
+            出力用DataFrame（曜日・評価パターン・表示順ごとに1行）
+        """
+        records = [
+            (day, pattern, slot, point['currency'], point['entry_time'], point['close_time'], point['direction'],
+             point['ranking'], point['pf'], point['profit_pips'])
+            for day, patterns in day_results.items()
+            for pattern, points in patterns.items()
+            for slot, point in enumerate(points)
+        ]
+        frame = pd.DataFrame(records, columns=[
+            'weekday', 'pattern', 'slot', 'currency', 'entry_time', 'close_time', 'direction',
+            'ranking', 'pf', 'profit_pips'
+        ])
+        frame['ranking'] = frame['ranking'].astype(np.int64)
+        frame['pf'] = frame['pf'].astype(float)
+        frame['profit_pips'] = frame['profit_pips'].astype(float)
+        return frame
+    
+    def pivot_output_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        出力用DataFrameを曜日×表示順の行、評価パターン×項目の列に1回のpivotで横持ちに変換
+        
+        Args:
+            frame: build_output_frameの結果
+            
+        Returns:
+            横持ちDataFrame（列は(項目, 評価パターン)、該当なしのセルは欠損値）
+        """
+        days_of_week = ['月', '火', '水', '木', '金']
+        pattern_order = self.target_patterns
+        fields = ['currency', 'entry_time', 'close_time', 'direction', 'ranking', 'pf', 'profit_pips']
+        
+        frame = frame[frame['weekday'].isin(days_of_week) & frame['pattern'].isin(pattern_order)]
+        wide = frame.pivot(index=['weekday', 'slot'], columns='pattern', values=fields)
+        wide = wide.reindex(columns=pd.MultiIndex.from_product([fields, pattern_order]))
+        order = pd.Categorical(wide.index.get_level_values('weekday'), categories=days_of_week).codes
+        return wide.iloc[np.lexsort((wide.index.get_level_values('slot'), order))]
+    
+    def _output_blocks(self, wide: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """
+        横持ちDataFrameを評価パターンごとのセル（文字列）に一括変換
+        
+        Args:
+            wide: pivot_output_frameの結果
+            columns: 1パターン分の列（項目名、'pf'は小数2桁、'profit_pips'は小数1桁、
+                'entry_hm' / 'close_hm'は時刻の秒を除いたもの、''は空セル）
+            
+        Returns:
+            セルの2次元配列（行 × 評価パターン数×列数）
+        """
+        patterns = wide.columns.get_level_values(1).unique()
+        blocks = []
+        for pattern in patterns:
+            present = wide[('currency', pattern)].notna().to_numpy()
+            for column in columns:
+                if column == '':
+                    cells = np.full(len(wide), '', dtype=object)
+                else:
+                    values = wide[(column.replace('_hm', '_time'), pattern)].to_numpy()
+                    if column == 'pf':
+                        cells = np.array([f"{value:.2f}" for value in values], dtype=object)
+                    elif column == 'profit_pips':
+                        cells = np.array([f"{value:.1f}" for value in values], dtype=object)
+                    elif column == 'ranking':
+                        cells = np.array([str(int(value)) if value == value else '' for value in values], dtype=object)
+                    elif column in ('entry_hm', 'close_hm'):
+                        cells = np.array([':'.join(str(value).split(':')[:2]) for value in values], dtype=object)
+                    else:
+                        cells = values.astype(object)
+                    cells = np.where(present, cells, '')
+                blocks.append(cells)
+        return np.column_stack(blocks) if blocks else np.empty((len(wide), 0), dtype=object)
+    
+    def write_grid_csv(self, wide: pd.DataFrame, base_date: str, output_file: str) -> str:
+        """
+        曜日別・評価パターン横並びのCSVを一括で書き出し
+        
+        Args:
+            wide: pivot_output_frameの結果
+            base_date: 基準日
+            output_file: 出力ファイルパス
+            
+        Returns:
+            出力ファイルパス
+        """
+        day_names = {'月': '月曜日', '火': '火曜日', '水': '水曜日', '木': '木曜日', '金': '金曜日'}
+        patterns = list(wide.columns.get_level_values(1).unique())
+        weekday_dates = {day: day_date.strftime('%Y/%m/%d') for day, day_date in self.get_weekday_dates(base_date).items()}
+        cells = self._output_blocks(wide, ['currency', 'entry_time', 'close_time', 'direction', 'ranking', 'pf', ''])
+        weekdays = wide.index.get_level_values('weekday')
+        
+        header_row = ['']
+        for pattern in patterns:
+            header_row.extend([pattern.replace('ポイント', ''), '', '', '', '', '', ''])
+        column_header = [''] + ['通貨ペア', 'エントリー', 'クローズ', '方向', '順位', 'PF', '結果'] * len(patterns)
+        
+        rows = [[f"{base_date}"], []]
+        for day in day_names:
+            rows.append([])
+            rows.append(['', f"{day_names[day]}({weekday_dates[day]})"])
+            rows.append(header_row)
+            rows.append(column_header)
+            day_cells = cells[np.asarray(weekdays == day)]
+            rows.extend([slot + 1, *row] for slot, row in enumerate(day_cells.tolist()))
+        
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+            f.write(buffer.getvalue())
+        return output_file
+    
+    def write_spec_tsv(self, wide: pd.DataFrame, base_date: str, output_file: str) -> str:
+        """
+        要件定義書 6.出力仕様のタブ区切りテキストを一括で書き出し
+        
+        1行目に評価パターン（アイコン付き）ごとの週合計、曜日ごとに見出し・ポイント・合計行を出力する
+        
+        Args:
+            wide: pivot_output_frameの結果
+            base_date: 基準日
+            output_file: 出力ファイルパス
+            
+        Returns:
+            出力ファイルパス
+        """
+        day_names = {'月': '月曜日', '火': '火曜日', '水': '水曜日', '木': '木曜日', '金': '金曜日'}
+        patterns = list(wide.columns.get_level_values(1).unique())
+        weekday_dates = {day: day_date.strftime('%Y/%m/%d') for day, day_date in self.get_weekday_dates(base_date).items()}
+        cells = self._output_blocks(
+            wide, ['currency', 'entry_hm', 'close_hm', 'direction', 'ranking', 'profit_pips', '']
+        )
+        weekdays = np.asarray(wide.index.get_level_values('weekday'))
+        profit_pips = wide['profit_pips'].fillna(0.0)
+        day_totals = profit_pips.groupby(weekdays).sum()
+        weekly_totals = profit_pips.sum()
+        
+        def line(row_cells) -> str:
+            return '\t'.join(str(cell) for cell in row_cells).rstrip('\t')
+        
+        header = [base_date]
+        for pattern in patterns:
+            header.extend([self.pattern_display_names[pattern], '', '週合計：', '', f"{weekly_totals[pattern]:.1f}", '', ''])
+        column_header = [''] + ['通貨ペア', 'エントリ', 'クローズ', '方向', '順位', '結果', ''] * len(patterns)
+        
+        lines = [line(header)]
+        for day in day_names:
+            lines.append(line(['', f"{day_names[day]}({weekday_dates[day]})"]))
+            lines.append(line(column_header))
+            day_cells = cells[weekdays == day]
+            lines.extend(line([slot + 1, *row]) for slot, row in enumerate(day_cells.tolist()))
+            total_row = ['']
+            for pattern in patterns:
+                total = day_totals.at[day, pattern] if day in day_totals.index else 0.0
+                total_row.extend(['合計', '', '', '', '', f"{total:.1f}", ''])
+            lines.append(line(total_row))
+            lines.append('')
+        
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+        return output_file
+    
+    def write_outputs(self, day_results: Dict[str, Dict], base_date: str, formats: List[str] = None,
+                      universe: str = DEFAULT_UNIVERSE) -> Dict[str, str]:
+        """
+        選定結果を1回のpivotから複数の形式で書き出し
+        
+        Args:
+            day_results: 曜日別最適ポイント（select_optimal_pointsの結果）
+            base_date: 基準日
+            formats: 出力形式（Noneの場合は設定のoutput_formats）
+            universe: 通貨ユニバース名（既定のjpy_cross以外はファイル名の末尾に付ける）
+            
+        Returns:
+            出力形式 → 出力ファイルパス（作業ディレクトリ直下、organize_output_filesで基準日ディレクトリに移動）
+        """
+        formats = formats or self.settings['output_formats']
+        frame = self.build_output_frame(day_results)
+        wide = self.pivot_output_frame(frame) if {'csv', 'tsv'} & set(formats) else None
+        
+        suffix = '' if universe == DEFAULT_UNIVERSE else f"_{universe}"
+        output_files = {}
+        for name in formats:
+            extension = OUTPUT_FORMATS[name] or f".{_cache_format()}"
+            output_file = f"output_{base_date}{suffix}{extension}"
+            if name == 'csv':
+                self.write_grid_csv(wide, base_date, output_file)
+            elif name == 'tsv':
+                self.write_spec_tsv(wide, base_date, output_file)
+            elif name == 'jsonl':
+                frame.assign(base_date=base_date).to_json(output_file, orient='records', lines=True, force_ascii=False)
+            elif extension == '.feather':
+                frame.to_feather(output_file)
+            else:
+                frame.to_pickle(output_file)
+            output_files[name] = output_file
+        
+        logger.info(f"結果を保存しました: {', '.join(output_files.values())}")
+        return output_files
+    
+    def write_universe_outputs(self, universe_results: Dict[str, Dict[str, Dict]],
+                               base_date: str) -> Dict[str, Dict[str, str]]:
+        """
+        通貨ユニバースごとの選定結果を書き出し
+        
+        Args:
+            universe_results: select_universe_pointsの結果
+            base_date: 基準日
+            
+        Returns:
+            ユニバース名 → (出力形式 → 出力ファイルパス)
+        """
+        return {
+            universe: self.write_outputs(day_results, base_date, universe=universe)
+            for universe, day_results in universe_results.items()
+        }
+    
     def save_output(self, formatted_results: Dict[str, List[Dict]], base_date: str) -> str:
         """
         結果をCSVファイルに保存
@@ -414,106 +2943,259 @@ class FXAnalysisEngine:
         Returns:
             保存したファイルパス
         """
+        day_results = {day: {} for day in formatted_results}
+        for day, points in formatted_results.items():
+            for point in points:
+                day_results[day].setdefault(point.get('pattern'), []).append({
+                    'currency': point.get('通貨ペア', ''),
+                    'entry_time': point.get('エントリー', ''),
+                    'close_time': point.get('クローズ', ''),
+                    'direction': point.get('方向', ''),
+                    'ranking': point.get('順位', 0),
+                    'pf': float(point.get('PF', 0.0)),
+                    'profit_pips': 0.0
+                })
         output_file = f"output_{base_date}.csv"
+        wide = self.pivot_output_frame(self.build_output_frame(day_results))
+        self.write_grid_csv(wide, base_date, output_file)
         
-        with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            
-            # 基準日の情報
-            writer.writerow([f"{base_date}"])
-            writer.writerow([])  # 空行
-            
-            # 曜日別データ
-            day_names = {
-                '月': '月曜日',
-                '火': '火曜日',
-                '水': '水曜日', 
-                '木': '木曜日',
-                '金': '金曜日'
-            }
+        logger.info(f"結果をCSVファイルに保存しました: {output_file}")
+        return output_file
+    
+    def result_cache_key(self, report1_file: str, report2_file: str, as_of_date) -> str:
+        """
+        分析結果キャッシュのキーを計算
+        
+        入力ファイルの内容ハッシュ・評価日・全設定から作るため、いずれかが変われば別のキーになる
+        
+        Args:
+            report1_file: レポート1ファイルパス
+            report2_file: レポート2ファイルパス（トレードストアのマニフェストの場合は取り込み元のハッシュを使用）
+            as_of_date: 評価日
+            
+        Returns:
+            SHA-256ハッシュ（16進文字列）
+        """
+        if os.path.basename(report2_file) == TRADE_MANIFEST_NAME:
+            with open(report2_file, 'r', encoding='utf-8') as f:
+                report2_hash = json.load(f)['source_sha256']
+        else:
+            report2_hash = file_content_hash(report2_file)
+        
+        key_source = {
+            'schema_version': CACHE_SCHEMA_VERSION,
+            'report1': file_content_hash(report1_file),
+            'report2': report2_hash,
+            'as_of_date': pd.Timestamp(as_of_date).strftime('%Y-%m-%d'),
+            'settings': self.settings,
+            'bootstrap_settings': self.bootstrap_settings,
+            'ohlc': self.bar_store.signature() if self.bar_store else None,
+            'pattern_mapping': self.pattern_mapping,
+            'target_patterns': self.target_patterns
+        }
+        return hashlib.sha256(json.dumps(key_source, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+    
+    def load_cached_result(self, base_date: str, cache_key: str) -> Dict[str, Any]:
+        """
+        保存済みの分析結果を読み込み、出力ファイルを復元
+        
+        Args:
+            base_date: 基準日
+            cache_key: result_cache_keyで計算したキー
             
-            # 基準日から各曜日の日付を計算
-            base_date_obj = datetime.strptime(base_date, '%Y-%m-%d')
-            base_weekday = base_date_obj.weekday()  # 0=月, 1=火, 2=水, 3=木, 4=金, 5=土, 6=日
+        Returns:
+            保存済みの分析結果（キャッシュがない場合はNone）
+        """
+        cache_file = os.path.join(base_date, RESULT_CACHE_DIR_NAME, f"{cache_key}.pickle")
+        if not os.path.exists(cache_file):
+            return None
+        
+        cached = pd.read_pickle(cache_file)
+        for output in cached['output_files']:
+            output_file = os.path.join(base_date, output['name'])
+            if not os.path.exists(output_file) or file_content_hash(output_file) != output['sha256']:
+                with open(output_file, 'wb') as f:
+                    f.write(output['content'])
+                logger.info(f"出力ファイルを復元しました: {output_file}")
+        
+        logger.info(f"分析結果キャッシュを使用します: {cache_file}")
+        return cached
+    
+    def save_cached_result(self, base_date: str, cache_key: str, result: Dict[str, Any]) -> str:
+        """
+        分析結果と全ユニバース・全形式の出力ファイルの内容を保存
+        
+        Args:
+            base_date: 基準日
+            cache_key: result_cache_keyで計算したキー
+            result: perform_analysisの分析結果
             
-            weekday_dates = {}
-            weekday_map = {'月': 0, '火': 1, '水': 2, '木': 3, '金': 4}
+        Returns:
+            キャッシュファイルパス
+        """
+        cache_dir = os.path.join(base_date, RESULT_CACHE_DIR_NAME)
+        cache_file = os.path.join(cache_dir, f"{cache_key}.pickle")
+        output_files = []
+        for universe in result['universes'].values():
+            for path in universe['output_files'].values():
+                with open(path, 'rb') as f:
+                    content = f.read()
+                output_files.append({
+                    'name': os.path.basename(path),
+                    'content': content,
+                    'sha256': hashlib.sha256(content).hexdigest()
+                })
+        
+        cached = {
+            'output_name': os.path.basename(result['output_file']),
+            'output_files': output_files,
+            'universes': {
+                name: {
+                    'day_results': universe['day_results'],
+                    'weekly_summary': universe['weekly_summary'],
+                    'output_files': {
+                        output_format: os.path.basename(path)
+                        for output_format, path in universe['output_files'].items()
+                    }
+                }
+                for name, universe in result['universes'].items()
+            },
+            'day_results': result['day_results'],
+            'weekly_summary': result['weekly_summary'],
+            'formatted_output': result['formatted_output'],
+            'stats': {key: value for key, value in result['stats'].items() if key != 'stages'}
+        }
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_file = f"{cache_file}.tmp"
+        pd.to_pickle(cached, temp_file)
+        os.replace(temp_file, cache_file)
+        logger.info(f"分析結果キャッシュを保存しました: {cache_file}")
+        return cache_file
+    
+    def build_analysis_graph(self, metrics: PipelineMetrics, base_date: str, as_of_date) -> StageGraph:
+        """
+        読み込みから出力ファイル整理までの段階グラフを作成
+        
+        レポート1系（load_report1 → extract）とレポート2系（load_report2 → weekly_pf）は
+        互いに依存しないため並行に実行され、selectで合流する
+        
+        Args:
+            metrics: 段階別計測
+            base_date: 基準日
+            as_of_date: 評価日
             
-            # 基準日が日曜日の場合、翌日（月曜日）から始まる週を計算
-            if base_weekday == 6:  # 日曜日
-                for day, day_idx in weekday_map.items():
-                    day_date = base_date_obj + timedelta(days=day_idx+1)
-                    weekday_dates[day] = day_date.strftime('%Y/%m/%d')
-            else:
-                # 基準日の週の月曜日を見つける
-                monday = base_date_obj - timedelta(days=base_weekday)
-                for day, day_idx in weekday_map.items():
-                    day_date = monday + timedelta(days=day_idx)
-                    weekday_dates[day] = day_date.strftime('%Y/%m/%d')
-            
-            # パターン名の表示順
-            pattern_order = ['利益効率ポイント', '勝率重視ポイント', '時間効率ポイント', '最大利益ポイント']
-            pattern_display = {
-                '利益効率ポイント': '利益効率',
-                '勝率重視ポイント': '勝率重視',
-                '時間効率ポイント': '時間効率',
-                '最大利益ポイント': '最大利益'
-            }
+        Returns:
+            段階グラフ（初期値としてreport1_file, report2_fileを与えて実行する）
+        """
+        cache_dir = os.path.join(base_date, CACHE_DIR_NAME)
+        weeks = self.settings['analysis_weeks']
+        graph = StageGraph(metrics)
+        
+        def load_report1(report1_file):
+            report1_df = load_parsed_csv(report1_file, parse_report1, cache_dir)
+            logger.info(f"レポート1読み込み完了: {len(report1_df)}行")
+            return {'report1_df': report1_df}
+        
+        def extract(report1_df):
+            return {'points_df': self.extract_point_frame(report1_df)}
+        
+        graph.add('load_report1', load_report1, ['report1_file'], ['report1_df'])
+        graph.add('extract', extract, ['report1_df'], ['points_df'])
+        
+        if self.bar_store:
+            # レポート2は使わず、抽出したポイントを1分足で再シミュレーションして集計する
+            def weekly_pf(points_df):
+                pf_table = self.aggregate_simulated_profit_factor(points_df, weeks, as_of_date)
+                return {'pf_table': pf_table, 'report2_records': int(pf_table['trades'].sum()), 'ingest_result': None}
             
-            for day in ['月', '火', '水', '木', '金']:
-                # 曜日の前に空白行を追加
-                writer.writerow([])
-                
-                # 曜日ヘッダー
-                day_date = weekday_dates[day]
-                writer.writerow(['', f"{day_names[day]}({day_date})"])
-                
-                # 列ヘッダー
-                headers = ['通貨ペア', 'エントリー', 'クローズ', '方向', '順位', 'PF', '結果']
-                header_row = ['']
-                for pattern in pattern_order:
-                    display_name = pattern_display[pattern]
-                    header_row.extend([display_name, '', '', '', '', '', ''])
-                writer.writerow(header_row)
-                
-                # 列ヘッダー（項目名）
-                column_header = ['']
-                for _ in range(4):  # 4つのパターン
-                    column_header.extend(headers)
-                writer.writerow(column_header)
-                
-                # パターン別にデータを取得
-                pattern_data = {}
-                for pattern in pattern_order:
-                    pattern_data[pattern] = []
-                    for point in formatted_results[day]:
-                        if point.get('pattern') == pattern:
-                            pattern_data[pattern].append(point)
-                
-                # 最大行数を計算
-                max_rows = max(len(pattern_data[pattern]) for pattern in pattern_order)
-                
-                # データ行
-                for i in range(max_rows):
-                    row = [i + 1]
-                    for pattern in pattern_order:
-                        if i < len(pattern_data[pattern]):
-                            point = pattern_data[pattern][i]
-                            row.extend([
-                                point.get('通貨ペア', ''),
-                                point.get('エントリー', ''),
-                                point.get('クローズ', ''),
-                                point.get('方向', ''),
-                                point.get('順位', ''),
-                                point.get('PF', ''),
-                                point.get('結果', '')
-                            ])
-                        else:
-                            row.extend(['', '', '', '', '', '', ''])
-                    writer.writerow(row)
+            graph.add('weekly_pf', weekly_pf, ['points_df'], ['pf_table', 'report2_records', 'ingest_result'])
+        elif self.trade_store:
+            # レポート2は差分のみストアに取り込み、分析対象期間をストアから読み出す
+            def load_report2(report2_file):
+                if os.path.basename(report2_file) == TRADE_MANIFEST_NAME:
+                    return {'ingest_result': None}
+                return {'ingest_result': self.trade_store.ingest_report2(report2_file)}
+            
+            def weekly_pf(ingest_result):
+                return {
+                    'pf_table': self.aggregate_store_profit_factor(weeks, as_of_date),
+                    'report2_records': self.trade_store.count()
+                }
+            
+            graph.add('load_report2', load_report2, ['report2_file'], ['ingest_result'],
+                      rows_out=lambda outputs: outputs['ingest_result']['rows_delta'] if outputs['ingest_result'] else 0)
+            graph.add('weekly_pf', weekly_pf, ['ingest_result'], ['pf_table', 'report2_records'])
+        elif self.report2_chunksize:
+            # レポート2は読み込まず、チャンク単位に集計する
+            def weekly_pf(report2_file):
+                pf_table, report2_records = self.stream_weekly_profit_factor(
+                    report2_file, weeks, self.report2_chunksize, as_of_date
+                )
+                return {'pf_table': pf_table, 'report2_records': report2_records, 'ingest_result': None}
+            
+            graph.add('weekly_pf', weekly_pf, ['report2_file'], ['pf_table', 'report2_records', 'ingest_result'])
+        else:
+            def load_report2(report2_file):
+                report2_df = load_parsed_csv(report2_file, parse_report2, cache_dir)
+                logger.info(f"レポート2読み込み完了: {len(report2_df)}行")
+                return {'report2_df': report2_df, 'ingest_result': None}
+            
+            def weekly_pf(report2_df):
+                return {
+                    'pf_table': self.aggregate_weekly_profit_factor(report2_df, weeks, as_of_date),
+                    'report2_records': len(report2_df)
+                }
+            
+            graph.add('load_report2', load_report2, ['report2_file'], ['report2_df', 'ingest_result'])
+            graph.add('weekly_pf', weekly_pf, ['report2_df'], ['pf_table', 'report2_records'])
         
-        logger.info(f"結果をCSVファイルに保存しました: {output_file}")
-        return output_file
+        def select(points_df, pf_table):
+            # 全ての通貨ユニバースを1回の結合から選定し、先頭のユニバースを主な結果とする
+            universe_results = self.select_universe_points(points_df, pf_table)
+            return {'universe_results': universe_results, 'day_results': next(iter(universe_results.values()))}
+        
+        def format_stage(day_results):
+            return {'formatted_results': self.format_results(day_results)}
+        
+        def save(universe_results):
+            output_files = self.write_universe_outputs(universe_results, base_date)
+            return {
+                'output_file': primary_output(next(iter(output_files.values()))),
+                'output_files': output_files
+            }
+        
+        def move(report1_file, report2_file, ingest_result, output_files):
+            created_dir = self.create_directory_and_move_files(base_date, report1_file, report2_file)
+            if ingest_result is not None:
+                self.write_trade_manifest(base_date, report2_file, ingest_result)
+            return {'created_dir': created_dir}
+        
+        def organize(created_dir, output_files):
+            for universe_files in output_files.values():
+                for output_file in universe_files.values():
+                    self.organize_output_files(base_date, output_file)
+            return {'organized': True}
+        
+        def count_points(outputs):
+            return sum(
+                len(points)
+                for day_results in outputs['universe_results'].values()
+                for day in day_results.values()
+                for points in day.values()
+            )
+        
+        def count_formatted(outputs):
+            return sum(len(points) for points in outputs['formatted_results'].values())
+        
+        graph.add('select', select, ['points_df', 'pf_table'], ['universe_results', 'day_results'],
+                  rows_out=count_points)
+        graph.add('format', format_stage, ['day_results'], ['formatted_results'], rows_out=count_formatted)
+        graph.add('save', save, ['universe_results'], ['output_file', 'output_files'],
+                  rows_out=lambda outputs: sum(len(files) for files in outputs['output_files'].values()))
+        graph.add('move', move, ['report1_file', 'report2_file', 'ingest_result', 'output_files'], ['created_dir'])
+        graph.add('organize', organize, ['created_dir', 'output_files'], ['organized'])
+        return graph
     
     def perform_analysis(self, base_date: str = None) -> Dict[str, Any]:
         """
@@ -525,66 +3207,340 @@ class FXAnalysisEngine:
         Returns:
             分析結果
         """
+        metrics = PipelineMetrics(self.profile_stage)
+        success = False
         try:
             # 1. 基準日の設定
             if base_date is None:
                 base_date = self.get_base_date()
             
             # 2. CSVファイルの検索
-            report1_file, report2_file = self.find_csv_files(base_date)
-            
-            # 3. データ読み込み
-            report1_df, report2_df = self.load_csv_files(base_date)
-            
-            # 4. レポート1からポイント抽出
-            report1_points = self.extract_points_from_report1(report1_df)
-            
-            # 5. レポート2から週間PF計算
-            weekly_pf = self.calculate_weekly_profit_factor(report2_df, self.settings['analysis_weeks'])
-            
-            # 6. 曜日別最適ポイント選定
-            day_results = self.select_optimal_points(report1_points, weekly_pf)
+            with metrics.stage('find') as record:
+                report1_file, report2_file = self.find_csv_files(base_date)
+                record['rows_out'] = 2
             
-            # 7. 結果をフォーマット
-            formatted_results = self.format_results(day_results)
-            
-            # 8. ファイル保存
-            output_file = self.save_output(formatted_results, base_date)
+            # 入力ファイル・評価日・設定が同じ分析結果があれば再利用
+            as_of_date = self.get_as_of_date(base_date)
+            cache_key = None
+            if self.use_result_cache:
+                with metrics.stage('cache') as record:
+                    cache_key = self.result_cache_key(report1_file, report2_file, as_of_date)
+                    cached = self.load_cached_result(base_date, cache_key)
+                    record['rows_out'] = 0 if cached is None else 1
+                if cached is not None:
+                    success = True
+                    universes = {
+                        name: {
+                            **universe,
+                            'output_files': {
+                                output_format: os.path.join(base_date, filename)
+                                for output_format, filename in universe['output_files'].items()
+                            }
+                        }
+                        for name, universe in cached['universes'].items()
+                    }
+                    return {
+                        'success': True,
+                        'base_date': base_date,
+                        'report1_file': report1_file,
+                        'report2_file': report2_file,
+                        'created_directory': base_date,
+                        'output_file': os.path.join(base_date, cached['output_name']),
+                        'output_files': next(iter(universes.values()))['output_files'],
+                        'universes': universes,
+                        'day_results': cached['day_results'],
+                        'weekly_summary': cached['weekly_summary'],
+                        'formatted_output': cached['formatted_output'],
+                        'stats': {**cached['stats'], 'result_cache': 'hit', 'stages': metrics.records}
+                    }
             
-            # 9. ディレクトリ作成とファイル移動
-            created_dir = self.create_directory_and_move_files(base_date, report1_file, report2_file)
+            # 3. 読み込み〜出力ファイル整理を段階グラフで実行
+            # （レポート1・レポート2の読み込み、ポイント抽出とPF集計はそれぞれ並行に実行）
+            graph = self.build_analysis_graph(metrics, base_date, as_of_date)
+            values = graph.run({'report1_file': report1_file, 'report2_file': report2_file})
             
-            # 10. 出力ファイルを整理
-            self.organize_output_files(base_date, output_file)
+            report1_df = values['report1_df']
+            report1_points = values['points_df']
+            report2_records = values['report2_records']
+            day_results = values['day_results']
+            formatted_results = values['formatted_results']
+            created_dir = values['created_dir']
             
-            # 11. 整理後の出力ファイルパスを更新
-            output_file_path = os.path.join(created_dir, os.path.basename(output_file))
+            # 整理後の出力ファイルパス（通貨ユニバースごと）
+            output_file_path = os.path.join(created_dir, os.path.basename(values['output_file']))
+            universes = {
+                name: {
+                    'day_results': universe_results,
+                    'weekly_summary': self.calculate_weekly_summary(universe_results),
+                    'output_files': {
+                        output_format: os.path.join(created_dir, os.path.basename(path))
+                        for output_format, path in values['output_files'][name].items()
+                    }
+                }
+                for name, universe_results in values['universe_results'].items()
+            }
+            primary_universe = next(iter(universes.values()))
             
-            return {
+            result = {
                 'success': True,
                 'base_date': base_date,
                 'report1_file': report1_file,
                 'report2_file': report2_file,
                 'created_directory': created_dir,
                 'output_file': output_file_path,
+                'output_files': primary_universe['output_files'],
+                'universes': universes,
                 'day_results': day_results,
-                'weekly_summary': self.calculate_weekly_summary(day_results),
+                'weekly_summary': primary_universe['weekly_summary'],
                 'formatted_output': formatted_results,
                 'stats': {
                     'report1_records': len(report1_df),
-                    'report2_records': len(report2_df),
+                    'report2_records': report2_records,
                     'extracted_points': len(report1_points),
-                    'analysis_weeks': self.settings['analysis_weeks']
+                    'analysis_weeks': self.settings['analysis_weeks'],
+                    'as_of_date': as_of_date.strftime('%Y-%m-%d'),
+                    'stages': metrics.records
                 }
             }
+            if cache_key is not None:
+                self.save_cached_result(base_date, cache_key, result)
+            
+            success = True
+            return result
         except Exception as e:
             logger.error(f"分析処理エラー: {str(e)}")
             return {
                 'success': False,
                 'error': str(e),
-                'output_file': f"error_{base_date if base_date else 'unknown'}.log"
+                'output_file': f"error_{base_date if base_date else 'unknown'}.log",
+                'stats': {'stages': metrics.records}
             }
+        finally:
+            # 失敗した実行も途中までの段階の計測結果を残す
+            if self.metrics_file:
+                metrics.write_jsonl(self.metrics_file, base_date=base_date, success=success)
 
+    def run_parameter_sweep(self, analysis_weeks_grid: List[int], pf_threshold_grid: List[float],
+                            max_results_grid: List[int], base_date: str = None,
+                            output_file: str = None, workers: int = 1) -> pd.DataFrame:
+        """
+        分析対象期間×PF閾値×最大表示件数のパラメータスイープ
+        
+        CSV読み込み・ポイント抽出・PFキューブ作成は1回だけ行い、
+        全組み合わせの選定を共通の集計結果から求める（選定対象は先頭の通貨ユニバース）。
+        各組み合わせの結果は、同じ設定のperform_analysisの選定件数・週間合計損益と一致する。
+        PF下限順（rank_by='pf_lower'）、保有時間の重複除外（non_overlapping）、
+        1分足の再シミュレーション（ohlc_dir）の設定では一致しないため、ValueErrorとする
+        
+        Args:
+            analysis_weeks_grid: 分析対象期間（週数）の候補
+            pf_threshold_grid: PF閾値の候補
+            max_results_grid: 最大表示件数の候補
+            base_date: 基準日（YYYY-MM-DD形式、Noneの場合は最新の基準日）
+            output_file: 結果CSVの保存先（Noneの場合は保存しない）
+            workers: プロセス数（2以上で分析期間ごとにプロセスプールで並列実行）
+            
+        Returns:
+            組み合わせ×評価パターンごとの選定件数と週間合計損益のDataFrame
+        """
+        if self.settings['rank_by'] != 'pf':
+            raise ValueError("パラメータスイープはrank_by='pf'のみ対応しています")
+        if self.settings['non_overlapping']:
+            raise ValueError("パラメータスイープはnon_overlapping（保有時間の重複除外）に対応していません")
+        if self.bar_store:
+            raise ValueError("パラメータスイープは1分足の再シミュレーション（ohlc_dir）に対応していません")
+        if base_date is None:
+            base_date = self.get_base_date()
+        
+        report1_df, report2_df = self.load_csv_files(base_date)
+        points_df = self.extract_point_frame(report1_df)
+        self.build_pf_cube(report2_df)
+        
+        tasks = [
+            (weeks, self.filter_primary_universe(
+                self.join_points_with_pf(points_df, self.query_profit_factor(weeks, base_date))),
+             list(pf_threshold_grid), list(max_results_grid), self.target_patterns)
+            for weeks in analysis_weeks_grid
+        ]
+        
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                grids = list(executor.map(_sweep_analysis_weeks, tasks))
+        else:
+            grids = [_sweep_analysis_weeks(task) for task in tasks]
+        
+        sweep_df = pd.concat(grids, ignore_index=True)
+        sweep_df.insert(0, 'base_date', base_date)
+        combinations = len(analysis_weeks_grid) * len(pf_threshold_grid) * len(max_results_grid)
+        logger.info(f"パラメータスイープ完了: {combinations}通り")
+        
+        if output_file:
+            sweep_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+            logger.info(f"スイープ結果を保存しました: {output_file}")
+        return sweep_df
+    
+    def list_base_dates(self) -> List[str]:
+        """
+        作業ディレクトリ内の基準日ディレクトリ（YYYY-MM-DD）を一覧取得
+        
+        Returns:
+            基準日のリスト（昇順）
+        """
+        return sorted(
+            d for d in os.listdir() if os.path.isdir(d) and re.fullmatch(r'\d{4}-\d{2}-\d{2}', d)
+        )
+    
+    def run_walk_forward_backtest(self, base_dates: List[str] = None, report2_df: pd.DataFrame = None,
+                                  output_file: str = None) -> Dict[str, pd.DataFrame]:
+        """
+        基準日ディレクトリごとのウォークフォワード検証
+        
+        各基準日時点のレポート1と直近analysis_weeks週のPFで選定を行い（先頭の通貨ユニバース）、
+        翌週の実際のレポート2の損益で全週分を一括採点する。
+        PFの集計期間はperform_analysisと同じく評価日（get_as_of_date）を最終日とするため、
+        評価日が採点する週（get_weekday_dates）に入る基準日（日曜日以外でas_of_date未指定など）は受け付けない
+        
+        Args:
+            base_dates: 検証する基準日（Noneの場合は全ての基準日ディレクトリ）
+            report2_df: 採点に使うレポート2（Noneの場合は最新の基準日のレポート2）
+            output_file: 採点済みポイントのCSV保存先（Noneの場合は保存しない）
+            
+        Returns:
+            picks（結果列付きの選定ポイント）、daily_totals（曜日別合計）、weekly_totals（週合計）
+        """
+        if base_dates is None:
+            base_dates = self.list_base_dates()
+        if report2_df is None:
+            _, report2_df = self.load_csv_files(max(base_dates))
+        
+        cube = self.build_pf_cube(report2_df)
+        
+        # 1. 基準日ごとの選定（各基準日時点の情報のみを使用）
+        selections = []
+        for base_date in base_dates:
+            report1_file, _ = self.find_csv_files(base_date)
+            report1_df = load_parsed_csv(report1_file, parse_report1, os.path.join(base_date, CACHE_DIR_NAME))
+            points_df = self.extract_point_frame(report1_df)
+            as_of_date = self.get_as_of_date(base_date)
+            if as_of_date >= min(self.get_weekday_dates(base_date).values()):
+                raise ValueError(
+                    f"基準日 {base_date} の評価日 {as_of_date.date()} が採点する週に含まれます"
+                    "（基準日は日曜日にするか、前週以前の評価日を指定してください）"
+                )
+            pf_table = cube.window_table(self.settings['analysis_weeks'], as_of_date)
+            selected_df = self.select_optimal_frame(points_df, pf_table)
+            selections.append(selected_df.assign(base_date=base_date))
+        picks = pd.concat(selections, ignore_index=True)
+        
+        # 2. 選定した曜日の翌週の取引日を付与
+        calendar = pd.DataFrame([
+            {'base_date': base_date, 'weekday': day, 'trade_date': day_date}
+            for base_date in base_dates
+            for day, day_date in self.get_weekday_dates(base_date).items()
+        ])
+        picks = picks.merge(calendar, on=['base_date', 'weekday'], how='left')
+        
+        # 3. 実際の損益を(ポイント名, ランキング, 取引日)で一括結合
+        actual = pd.DataFrame({
+            'report2_point_name': report2_df['ポイント名'].to_numpy(),
+            'ranking': report2_df['ポイント値'].to_numpy().astype(np.int64),
+            'trade_date': pd.to_datetime(report2_df['取引日'], errors='coerce').to_numpy(),
+            '結果': pd.to_numeric(report2_df['損益pipsのSUM'], errors='coerce').to_numpy()
+        }).groupby(['report2_point_name', 'ranking', 'trade_date'], as_index=False)['結果'].sum(min_count=1)
+        picks = picks.merge(actual, on=['report2_point_name', 'ranking', 'trade_date'], how='left')
+        
+        columns = ['base_date', 'weekday', 'trade_date', 'point_name', 'currency', 'entry_time', 'close_time',
+                   'direction', 'ranking', 'pf', 'trades', '結果']
+        picks = picks[columns]
+        
+        # 4. 曜日別・週合計
+        daily_totals = picks.groupby(['base_date', 'weekday', 'point_name'], as_index=False, sort=False, observed=True).agg(
+            picks=('結果', 'size'), scored=('結果', 'count'), total_pips=('結果', 'sum')
+        )
+        weekly_totals = picks.groupby(['base_date', 'point_name'], as_index=False, observed=True).agg(
+            picks=('結果', 'size'), scored=('結果', 'count'), total_pips=('結果', 'sum')
+        )
+        logger.info(f"ウォークフォワード検証完了: {len(base_dates)}週, 選定ポイント{len(picks)}件")
+        
+        if output_file:
+            picks.to_csv(output_file, index=False, encoding='utf-8-sig')
+            logger.info(f"検証結果を保存しました: {output_file}")
+        
+        return {'picks': picks, 'daily_totals': daily_totals, 'weekly_totals': weekly_totals}
+    
+    def run_batch(self, base_dates: List[str] = None, workers: int = None,
+                  output_file: str = None) -> Dict[str, Any]:
+        """
+        複数の基準日ディレクトリをプロセスプールで一括分析
+        
+        基準日ごとに独立して分析し、失敗した基準日があっても残りの処理を継続する
+        
+        Args:
+            base_dates: 分析する基準日（Noneの場合は全ての基準日ディレクトリ）
+            workers: プロセス数（Noneの場合はCPU数）
+            output_file: 基準日別サマリーのCSV保存先（Noneの場合は保存しない）
+            
+        Returns:
+            基準日別の結果、集計サマリー、成功・失敗した基準日
+        """
+        if base_dates is None:
+            base_dates = self.list_base_dates()
+        
+        # 入力ファイルの検索とカタログの保存は親プロセスで1回だけ行い、検索結果を各プロセスに渡す
+        catalog_entries = self.get_report_catalog().entries
+        # 各プロセスのエンジンにはこのエンジンの設定をすべて渡す（profile_stageはファイル名が衝突するため除く）
+        settings = dict(
+            self.settings,
+            report2_chunksize=self.report2_chunksize,
+            trade_store=self.trade_store.path if self.trade_store else None,
+            ohlc_dir=self.bar_store.directory if self.bar_store else None,
+            as_of_date=self.as_of_date,
+            use_result_cache=self.use_result_cache,
+            metrics_file=self.metrics_file
+        )
+        tasks = [(settings, base_date, catalog_entries) for base_date in base_dates]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_batch_date, task): task[1] for task in tasks}
+            date_results = {}
+            for future in as_completed(futures):
+                base_date = futures[future]
+                try:
+                    date_results[base_date] = future.result()
+                except Exception as e:
+                    date_results[base_date] = {
+                        'base_date': base_date, 'success': False, 'error': str(e),
+                        'output_file': '', 'weekly_summary': {}, 'stats': {}
+                    }
+                status = '成功' if date_results[base_date]['success'] else f"失敗: {date_results[base_date]['error']}"
+                logger.info(f"バッチ処理 {base_date}: {status}")
+        
+        ordered = [date_results[base_date] for base_date in base_dates]
+        summary_df = pd.DataFrame([
+            {
+                'base_date': result['base_date'],
+                'success': result['success'],
+                'error': result['error'],
+                'output_file': result['output_file'],
+                'extracted_points': result['stats'].get('extracted_points', 0),
+                **{pattern: result['weekly_summary'].get(pattern, 0.0) for pattern in self.target_patterns}
+            }
+            for result in ordered
+        ])
+        succeeded = [result['base_date'] for result in ordered if result['success']]
+        failed = {result['base_date']: result['error'] for result in ordered if not result['success']}
+        logger.info(f"バッチ処理完了: 成功{len(succeeded)}件, 失敗{len(failed)}件")
+        
+        if output_file:
+            summary_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+            logger.info(f"バッチ処理サマリーを保存しました: {output_file}")
+        
+        return {
+            'results': date_results,
+            'summary': summary_df,
+            'succeeded': succeeded,
+            'failed': failed
+        }
+    
     def get_base_date(self) -> str:
         """
         基準日を取得
@@ -592,8 +3548,8 @@ class FXAnalysisEngine:
         Returns:
             基準日（YYYY-MM-DD形式）
         """
-        # ディレクトリ名から基準日を取得
-        dirs = [d for d in os.listdir() if os.path.isdir(d) and re.match(r'\d{4}-\d{2}-\d{2}', d)]
+        # 基準日ディレクトリ名と、作業ディレクトリに置かれたレポート1の基準日から取得
+        dirs = sorted(set(self.list_base_dates()) | set(self.get_report_catalog().base_dates()))
         
         if dirs:
             # 最新の日付を使用
@@ -655,7 +3611,11 @@ class FXAnalysisEngine:
             # 元のパスを更新
             output_file = new_path
         
-        # 古いtxtファイルを削除
+        # 古いtxtファイルを削除（TSVを出力する設定では今回の出力なので残す）
+        if 'tsv' in self.settings['output_formats']:
+            logger.info(f"出力ファイルの整理が完了しました")
+            return
+        
         txt_pattern = f"output_{base_date}.txt"
         if os.path.exists(txt_pattern):
             os.remove(txt_pattern)
@@ -670,10 +3630,33 @@ class FXAnalysisEngine:
         logger.info(f"出力ファイルの整理が完了しました")
 
 
+def _run_batch_date(task: Tuple[Dict[str, Any], str, Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    バッチ実行の1基準日分を分析（プロセスプール用、入力ファイルは親プロセスのカタログから検索）
+    """
+    settings, base_date, catalog_entries = task
+    try:
+        engine = FXAnalysisEngine(**settings)
+        engine.report_catalog = ReportCatalog(entries=catalog_entries)
+        result = engine.perform_analysis(base_date)
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    
+    return {
+        'base_date': base_date,
+        'success': result['success'],
+        'error': result.get('error', ''),
+        'output_file': result.get('output_file', ''),
+        'weekly_summary': result.get('weekly_summary', {}),
+        'stats': result.get('stats', {})
+    }
+
+
 def main():
     """
     エントリーポイント
     """
+    configure_logging()
     try:
         analyzer = FXAnalysisEngine()
         output_file = analyzer.main()
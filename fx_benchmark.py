@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FXAnalysisEngine ベンチマーク
+合成データ（レポート1・レポート2）を決定的に生成し、処理段階ごとの実行時間とピークメモリを計測する
+
+使用方法:
+    python fx_benchmark.py --report1-rows 1000000 --report2-rows 50000000 --output bench_results.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable
+
+import numpy as np
+import pandas as pd
+
+import fx_analysis_python as fx
+
+logger = logging.getLogger(__name__)
+
+# 銘柄と出現比率（サンプルのレポート1に準拠、JPYペアが約7割）
+CURRENCY_WEIGHTS = {
+    'USDJPY': 2644, 'EURJPY': 1973, 'EURUSD': 1742, 'CADJPY': 728, 'GBPJPY': 713,
+    'AUDJPY': 573, 'AUDUSD': 436, 'NZDJPY': 386, 'CHFJPY': 351, 'GBPAUD': 182,
+    'GBPUSD': 141, 'EURAUD': 128, 'EURGBP': 3
+}
+
+# レポート1の列構成
+REPORT1_COLUMNS = [
+    '選択', '基準日', '方向', '銘柄', 'エントリー時刻', 'クローズ時刻', '保有時間', '開始時', '跨ぎフラグ',
+    '勝率_30日', '勝率_90日', '勝率_365日', '勝率_平均',
+    '勝率重視ポイント', '利益効率ポイント', '時間効率ポイント', '最大利益ポイント',
+    '勝率重視ポイントUS', '利益効率ポイントUS', '時間効率ポイントUS', '最大利益ポイントUS',
+    '合計変動pips_30日', '合計変動pips_90日', '合計変動pips_365日', '合計変動pips_平均',
+    '勝率重視スコア', '利益効率スコア', '時間効率スコア', '最大利益スコア',
+    '変動値σ_pips_30日', '変動値σ_pips_90日', '変動値σ_pips_365日', '変動値σ_pips_平均',
+    '平均スプレッドpips_30日', '平均スプレッドpips_90日', '平均スプレッドpips_365日', '平均スプレッドpips_平均'
+]
+
+# レポート1の評価パターン列ごとのランキング付与率（サンプルでは約1%）
+RANKED_FRACTION = 0.01
+
+WEEKDAY_NAMES = np.array(['月', '火', '水', '木', '金', '土', '日'])
+
+
+def report1_filename(base_date: str) -> str:
+    """
+    基準日に対応するレポート1のファイル名
+    """
+    date_obj = datetime.strptime(base_date, '%Y-%m-%d')
+    return f"週刊アノマリーFXレポート_{date_obj.strftime('%Y年%m月%d日')} - 分析レポート.csv"
+
+
+REPORT2_FILENAME = "アノマリーFXポイント別損益明細 - ポイント別損益明細(上位20位).csv"
+
+
+def generate_report1(rows: int, base_date: str, seed: int = 0) -> pd.DataFrame:
+    """
+    合成レポート1を生成
+
+    Args:
+        rows: 行数
+        base_date: 基準日（YYYY-MM-DD形式）
+        seed: 乱数シード
+
+    Returns:
+        レポート1形式のDataFrame
+    """
+    rng = np.random.default_rng(seed)
+    currencies = np.array(list(CURRENCY_WEIGHTS))
+    weights = np.array(list(CURRENCY_WEIGHTS.values()), dtype=float)
+
+    entry_minutes = rng.integers(0, 24 * 60, rows)
+    hold_minutes = rng.integers(3, 31, rows)
+    close_minutes = (entry_minutes + hold_minutes) % (24 * 60)
+
+    def format_time(minutes):
+        return pd.Series(minutes // 60).astype(str) + ':' + pd.Series(minutes % 60).map('{:02d}:00'.format)
+
+    def percent(values):
+        return pd.Series(values).map('{:.2f}%'.format)
+
+    data = {
+        '選択': np.zeros(rows, dtype=bool),
+        '基準日': base_date,
+        '方向': rng.choice(np.array(['Long', 'Short']), rows, p=[0.65, 0.35]),
+        '銘柄': rng.choice(currencies, rows, p=weights / weights.sum()),
+        'エントリー時刻': format_time(entry_minutes),
+        'クローズ時刻': format_time(close_minutes),
+        '保有時間': hold_minutes,
+        '開始時': entry_minutes // 60,
+        '跨ぎフラグ': (entry_minutes // 60 != close_minutes // 60).astype(int)
+    }
+    for column in ['勝率_30日', '勝率_90日', '勝率_365日', '勝率_平均']:
+        data[column] = percent(rng.uniform(40, 90, rows))
+
+    for pattern in REPORT1_COLUMNS[13:21]:
+        ranks = np.full(rows, np.nan)
+        ranked = max(1, int(rows * RANKED_FRACTION))
+        ranked_rows = rng.choice(rows, min(ranked, rows), replace=False)
+        ranks[ranked_rows] = np.arange(1, len(ranked_rows) + 1)
+        data[pattern] = ranks
+
+    for column in REPORT1_COLUMNS[21:]:
+        data[column] = np.round(rng.normal(0, 50 if 'pips' in column else 10, rows), 2)
+
+    return pd.DataFrame(data, columns=REPORT1_COLUMNS)
+
+
+def generate_report2(rows: int, base_date: str, path: str, years: float = 2.0, seed: int = 0,
+                     chunk_rows: int = 1000000) -> None:
+    """
+    合成レポート2をチャンク単位でCSVに書き出し（大規模データでもメモリを使い切らない）
+
+    取引日は基準日から遡ってyears年分の平日とし、日付順に並べる。
+    実際のレポート2と同じく(ポイント名, ポイント値, 取引日)は重複させず、各取引日ごとに
+    ポイント名×ランキングの組を重複なしで抽出する。行数が組の数を超える場合は合成のポイント名を追加する
+
+    Args:
+        rows: 行数
+        base_date: 基準日（YYYY-MM-DD形式）
+        path: 出力先CSVファイルパス
+        years: 取引履歴の期間（年）
+        seed: 乱数シード
+        chunk_rows: 1チャンクの行数（日単位でまとめるため目安）
+    """
+    end = pd.Timestamp(base_date)
+    trade_days = pd.bdate_range(end - pd.Timedelta(days=int(365 * years)), end)
+    point_names = list(dict.fromkeys(fx.FXAnalysisEngine().pattern_mapping.values()))
+    max_rank = 20
+
+    # 1日あたりの組（ポイント名×ランキング）が足りない場合は合成のポイント名で補う
+    required_names = -(-rows // (max_rank * len(trade_days)))
+    point_names += [f"合成ポイント_{i:05d}" for i in range(max(0, required_names - len(point_names)))]
+    point_names = np.array(point_names)
+    slots_per_day = len(point_names) * max_rank
+
+    # 各取引日の行数（均等に割り振り、余りは無作為な日に1行ずつ）
+    rng = np.random.default_rng(seed)
+    day_rows = np.full(len(trade_days), rows // len(trade_days))
+    day_rows[rng.choice(len(trade_days), rows % len(trade_days), replace=False)] += 1
+
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write('ポイント名,ポイント値,取引日,取引日_曜日,損益pipsのSUM\n')
+        chunk_days, chunk_slots, chunk_size = [], [], 0
+        for day_no, n in enumerate(day_rows):
+            chunk_days.append(np.full(n, day_no))
+            chunk_slots.append(rng.choice(slots_per_day, n, replace=False))
+            chunk_size += n
+            if chunk_size < chunk_rows and day_no < len(day_rows) - 1:
+                continue
+
+            days = trade_days[np.concatenate(chunk_days)]
+            slots = np.concatenate(chunk_slots)
+            chunk = pd.DataFrame({
+                'ポイント名': point_names[slots // max_rank],
+                'ポイント値': slots % max_rank + 1,
+                '取引日': days.strftime('%Y-%m-%d'),
+                '取引日_曜日': WEEKDAY_NAMES[days.weekday],
+                '損益pipsのSUM': np.round(rng.normal(0.3, 6.0, len(slots)), 1)
+            })
+            chunk.to_csv(f, header=False, index=False)
+            chunk_days, chunk_slots, chunk_size = [], [], 0
+
+
+def generate_dataset(data_dir: str, report1_rows: int, report2_rows: int, base_date: str,
+                     seed: int = 0) -> Dict[str, str]:
+    """
+    基準日ディレクトリ形式の合成データセットを作成
+
+    Args:
+        data_dir: 作業ディレクトリ
+        report1_rows: レポート1の行数
+        report2_rows: レポート2の行数
+        base_date: 基準日（YYYY-MM-DD形式）
+        seed: 乱数シード
+
+    Returns:
+        report1 / report2 のファイルパス
+    """
+    base_dir = os.path.join(data_dir, base_date)
+    os.makedirs(base_dir, exist_ok=True)
+
+    report1_file = os.path.join(base_dir, report1_filename(base_date))
+    generate_report1(report1_rows, base_date, seed).to_csv(report1_file, index=False, encoding='utf-8-sig')
+
+    report2_file = os.path.join(base_dir, REPORT2_FILENAME)
+    generate_report2(report2_rows, base_date, report2_file, seed=seed)
+
+    logger.info(f"合成データ作成完了: レポート1 {report1_rows}行, レポート2 {report2_rows}行 -> {base_dir}")
+    return {'report1': report1_file, 'report2': report2_file}
+
+
+def measure_stage(name: str, func: Callable[[], Any], records: Dict[str, Dict[str, Any]],
+                  trace_memory: bool = False) -> Any:
+    """
+    1段階を実行し、実行時間とメモリを記録
+
+    実行時間はtracemallocを使わずに計測し、メモリはPipelineMetricsと同じく最大RSS（最高水位）と
+    段階中のその増分で記録する。trace_memory指定時は、計測後にもう1回tracemalloc下で実行して
+    Pythonのメモリ確保のピーク（traced_peak_mb）を追加で記録する（実行時間には含めない）
+
+    Args:
+        name: 段階名
+        func: 実行する処理（trace_memory指定時は2回実行されるため、同じ結果を返すこと）
+        records: 計測結果の格納先
+        trace_memory: tracemallocによるピークメモリを別の実行で計測する
+
+    Returns:
+        処理の戻り値（1回目の実行結果）
+    """
+    rss_start = fx._peak_rss_mb()
+    start = time.perf_counter()
+    result = func()
+    wall_time = time.perf_counter() - start
+    peak_rss = fx._peak_rss_mb()
+
+    records[name] = {
+        'wall_time_sec': round(wall_time, 4),
+        'process_peak_rss_mb': peak_rss,
+        'peak_rss_growth_mb': None if rss_start is None else round(peak_rss - rss_start, 3)
+    }
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            func()
+            records[name]['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        finally:
+            tracemalloc.stop()
+    logger.info(f"{name}: {wall_time:.3f}秒, 最大RSS {peak_rss}MB")
+    return result
+
+
+def run_benchmark(report1_rows: int, report2_rows: int, base_date: str, data_dir: str = None,
+                  seed: int = 0, settings: Dict[str, Any] = None, trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    合成データで各処理段階（読み込み・抽出・週間PF・選定・フォーマット・保存）を計測
+
+    Args:
+        report1_rows: レポート1の行数
+        report2_rows: レポート2の行数
+        base_date: 基準日（YYYY-MM-DD形式）
+        data_dir: 合成データの作業ディレクトリ（Noneの場合は一時ディレクトリを作成・削除）
+        seed: 乱数シード
+        settings: FXAnalysisEngineの設定
+        trace_memory: 各段階をもう1回tracemalloc下で実行し、ピークメモリを追加で記録する
+
+    Returns:
+        計測結果
+    """
+    settings = settings or {}
+    cleanup = data_dir is None
+    data_dir = data_dir or tempfile.mkdtemp(prefix='fx_bench_')
+
+    files = generate_dataset(data_dir, report1_rows, report2_rows, base_date, seed)
+    engine = fx.FXAnalysisEngine(**settings)
+    stages = {}
+
+    original_dir = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        report1_df, report2_df = measure_stage('load', lambda: (
+            fx.load_parsed_csv(files['report1'], fx.parse_report1),
+            fx.load_parsed_csv(files['report2'], fx.parse_report2)
+        ), stages, trace_memory)
+        points_df = measure_stage('extract', lambda: engine.extract_point_frame(report1_df), stages, trace_memory)
+        pf_table = measure_stage('weekly_pf', lambda: engine.aggregate_weekly_profit_factor(
+            report2_df, engine.settings['analysis_weeks'], base_date), stages, trace_memory)
+        day_results = measure_stage('select', lambda: engine.select_optimal_points(points_df, pf_table),
+                                    stages, trace_memory)
+        formatted = measure_stage('format', lambda: engine.format_results(day_results), stages, trace_memory)
+        measure_stage('save', lambda: engine.write_outputs(day_results, base_date), stages, trace_memory)
+    finally:
+        os.chdir(original_dir)
+        if cleanup:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    stages['load']['rows'] = len(report1_df) + len(report2_df)
+    stages['extract']['rows'] = len(points_df)
+    stages['weekly_pf']['rows'] = len(pf_table)
+    stages['select']['rows'] = sum(len(points) for day in day_results.values() for points in day.values())
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'report1_rows': report1_rows,
+        'report2_rows': report2_rows,
+        'base_date': base_date,
+        'seed': seed,
+        'settings': engine.settings,
+        'stages': stages,
+        'total_wall_time_sec': round(sum(stage['wall_time_sec'] for stage in stages.values()), 4)
+    }
+
+
+def _git_commit() -> str:
+    """
+    計測対象のgitコミット（取得できない場合は空文字）
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def save_results(result: Dict[str, Any], output_file: str) -> None:
+    """
+    計測結果をJSONファイルに追記（バージョン間の比較用に履歴を残す）
+
+    Args:
+        result: run_benchmarkの計測結果
+        output_file: JSONファイルパス
+    """
+    history: List[Dict[str, Any]] = []
+    if os.path.exists(output_file):
+        with open(output_file, encoding='utf-8') as f:
+            history = json.load(f)
+    history.append(result)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    logger.info(f"計測結果を保存しました: {output_file}")
+
+
+def default_base_date() -> str:
+    """
+    既定の基準日（直近の日曜日）
+    """
+    today = datetime.now()
+    return (today - timedelta(days=(today.weekday() + 1) % 7)).strftime('%Y-%m-%d')
+
+
+def main(argv: List[str] = None) -> None:
+    """
+    エントリーポイント
+    """
+    parser = argparse.ArgumentParser(description='FXAnalysisEngine ベンチマーク')
+    parser.add_argument('--report1-rows', type=int, default=10000, help='レポート1の行数')
+    parser.add_argument('--report2-rows', type=int, default=1000000, help='レポート2の行数')
+    parser.add_argument('--base-date', default=None, help='基準日（YYYY-MM-DD、既定は直近の日曜日）')
+    parser.add_argument('--data-dir', default=None, help='合成データの保存先（既定は一時ディレクトリ）')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード')
+    parser.add_argument('--analysis-weeks', type=int, default=26, help='分析対象期間（週数）')
+    parser.add_argument('--pf-threshold', type=float, default=1.3, help='PF閾値')
+    parser.add_argument('--max-results', type=int, default=20, help='最大表示件数')
+    parser.add_argument('--output', default='bench_results.json', help='計測結果のJSONファイル')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='各段階をもう1回tracemalloc下で実行し、Pythonのピークメモリも記録する')
+    args = parser.parse_args(argv)
+
+    fx.configure_logging()
+    result = run_benchmark(
+        args.report1_rows, args.report2_rows, args.base_date or default_base_date(),
+        data_dir=args.data_dir, seed=args.seed,
+        settings={
+            'analysis_weeks': args.analysis_weeks,
+            'pf_threshold': args.pf_threshold,
+            'max_results': args.max_results
+        },
+        trace_memory=args.trace_memory
+    )
+    save_results(result, args.output)
+
+    for name, stage in result['stages'].items():
+        traced = f" {stage['traced_peak_mb']:10.1f}MB（tracemalloc）" if 'traced_peak_mb' in stage else ''
+        print(f"{name:10s} {stage['wall_time_sec']:10.3f}秒 最大RSS {stage['process_peak_rss_mb']}MB"
+              f"（+{stage['peak_rss_growth_mb']}MB）{traced}")
+    print(f"{'total':10s} {result['total_wall_time_sec']:10.3f}秒")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"エラーが発生しました: {str(e)}")
+        sys.exit(1)
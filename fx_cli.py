@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FXAnalysisEngine コマンドラインインターフェース
+起動時は標準ライブラリのみを読み込み、pandas等を使う分析エンジンはサブコマンドの実行時に読み込む
+
+使用方法:
+    python fx_cli.py run --base-date 2025-06-22 --pf-threshold 1.5
+    python fx_cli.py show --weekday 月 --pattern 利益効率        （計算済みの結果を表示、分析エンジンは読み込まない）
+    python fx_cli.py sweep --analysis-weeks-grid 13 26 52 --pf-threshold-grid 1.2 1.3 1.5
+    python fx_cli.py batch --workers 4 --output batch_summary.csv
+    python fx_cli.py bench --report1-rows 10000 --report2-rows 1000000
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from typing import Dict, List, Any
+
+# 曜日の表示順
+WEEKDAYS = ['月', '火', '水', '木', '金']
+
+# 既定の通貨ユニバース（fx_analysis_python.DEFAULT_UNIVERSEと同じ。showで分析エンジンを読み込まないため複製）
+DEFAULT_UNIVERSE = 'jpy_cross'
+
+
+# 分析エンジンの引数（サブコマンドに登録したオプションのみ渡す）
+ENGINE_ARGUMENTS = [
+    'analysis_weeks', 'pf_threshold', 'max_results', 'rank_by', 'as_of_date', 'non_overlapping',
+    'output_formats', 'pattern_set', 'currency_universes', 'report2_chunksize', 'trade_store',
+    'ohlc_dir', 'entry_shift_minutes', 'spread_pips', 'max_gap_minutes', 'metrics_file', 'use_result_cache'
+]
+
+
+def add_pattern_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    評価パターン・通貨ユニバースのオプションを追加（run, batch, sweep）
+    """
+    parser.add_argument('--pattern-set', default='basic', help='評価パターンの組（basic, us, all）')
+    parser.add_argument('--universe', dest='currency_universes', nargs='+', default=None,
+                        help='通貨ユニバース（jpy_cross, usd, all、既定はjpy_cross。sweepは先頭のユニバースのみ）')
+
+
+def add_settings_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    分析設定のオプションを追加（perform_analysisで分析するrun, batch）
+    """
+    add_pattern_arguments(parser)
+    parser.add_argument('--analysis-weeks', type=int, default=26, help='分析対象期間（週数）')
+    parser.add_argument('--pf-threshold', type=float, default=1.3, help='PF閾値')
+    parser.add_argument('--max-results', type=int, default=20, help='最大表示件数（各曜日・各パターン）')
+    parser.add_argument('--rank-by', choices=['pf', 'pf_lower'], default='pf', help='選定時の並び順')
+    parser.add_argument('--non-overlapping', action='store_true', help='同じ通貨ペアで保有時間が重なるポイントを除外')
+    parser.add_argument('--format', dest='output_formats', nargs='+', default=None,
+                        help='出力形式（csv, tsv, jsonl, binary、既定はcsv tsv jsonl）')
+    parser.add_argument('--report2-chunksize', type=int, default=None, help='レポート2のチャンク読み込み行数')
+    parser.add_argument('--trade-store', default=None, help='トレードストア（SQLite）のパス')
+    parser.add_argument('--ohlc-dir', default=None, help='1分足CSVのディレクトリ（指定時は再シミュレーションでPFを集計）')
+    parser.add_argument('--entry-shift-minutes', type=int, default=0, help='再シミュレーションでエントリー時刻をずらす分数')
+    parser.add_argument('--spread-pips', type=float, default=None,
+                        help='再シミュレーションで差し引く固定のスプレッド（既定はレポート1の平均スプレッド）')
+    parser.add_argument('--max-gap-minutes', type=int, default=5, help='再シミュレーションで足の欠損を許す最大の間隔（分）')
+    parser.add_argument('--metrics-file', default=None, help='段階別計測結果のJSON Lines出力先')
+    parser.add_argument('--no-result-cache', dest='use_result_cache', action='store_false',
+                        help='保存済みの分析結果を使わずに再計算する')
+
+
+def engine_settings(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    コマンドライン引数から分析エンジンの引数を作成（未登録のオプションはエンジンの既定値）
+    """
+    return {name: getattr(args, name) for name in ENGINE_ARGUMENTS if hasattr(args, name)}
+
+
+def create_engine(args: argparse.Namespace):
+    """
+    分析エンジンを作成（ここで初めてfx_analysis_pythonとpandasを読み込む）
+    """
+    import fx_analysis_python as fx
+    fx.configure_logging()
+    return fx.FXAnalysisEngine(**engine_settings(args))
+
+
+def result_artifact(base_date: str, universe: str = DEFAULT_UNIVERSE) -> str:
+    """
+    基準日の計算済み結果（JSON Lines）のパス
+    """
+    suffix = '' if universe == DEFAULT_UNIVERSE else f"_{universe}"
+    return os.path.join(base_date, f"output_{base_date}{suffix}.jsonl")
+
+
+def latest_result_date(universe: str = DEFAULT_UNIVERSE) -> str:
+    """
+    計算済み結果のある最新の基準日
+    """
+    base_dates = sorted(
+        (entry.name for entry in os.scandir('.')
+         if entry.is_dir() and re.fullmatch(r'\d{4}-\d{2}-\d{2}', entry.name)),
+        reverse=True
+    )
+    for base_date in base_dates:
+        if os.path.exists(result_artifact(base_date, universe)):
+            return base_date
+    raise FileNotFoundError("計算済みの結果が見つかりません（runをjsonl形式の出力付きで実行してください）")
+
+
+def read_picks(base_date: str, universe: str = DEFAULT_UNIVERSE, weekday: str = None, pattern: str = None,
+               currency: str = None) -> List[Dict[str, Any]]:
+    """
+    計算済み結果から選定ポイントを読み込んで絞り込む
+
+    Args:
+        base_date: 基準日
+        universe: 通貨ユニバース
+        weekday: 曜日（月〜金、Noneの場合は全曜日）
+        pattern: 評価パターン（前方一致、Noneの場合は全パターン）
+        currency: 通貨ペア（Noneの場合は全通貨ペア）
+
+    Returns:
+        選定ポイントのリスト（曜日・評価パターン・表示順）
+    """
+    path = result_artifact(base_date, universe)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"計算済みの結果が見つかりません: {path}（runをjsonl形式の出力付きで実行してください）")
+
+    picks = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            pick = json.loads(line)
+            if weekday is not None and pick['weekday'] != weekday:
+                continue
+            if pattern is not None and not pick['pattern'].startswith(pattern):
+                continue
+            if currency is not None and pick['currency'] != currency:
+                continue
+            picks.append(pick)
+    day_order = {day: i for i, day in enumerate(WEEKDAYS)}
+    picks.sort(key=lambda pick: day_order.get(pick['weekday'], len(WEEKDAYS)))
+    return picks
+
+
+def command_run(args: argparse.Namespace) -> int:
+    engine = create_engine(args)
+    result = engine.perform_analysis(args.base_date)
+    if not result['success']:
+        print(f"エラーが発生しました: {result['error']}")
+        return 1
+    for name, path in result['output_files'].items():
+        print(f"{name:6s} {path}")
+    for pattern, total in result['weekly_summary'].items():
+        print(f"{pattern} 週合計: {total:.1f}")
+    return 0
+
+
+def command_show(args: argparse.Namespace) -> int:
+    base_date = args.base_date or latest_result_date(args.universe)
+    picks = read_picks(base_date, args.universe, args.weekday, args.pattern, args.currency)
+    if args.json:
+        print(json.dumps(picks, ensure_ascii=False))
+        return 0
+
+    print(f"基準日 {base_date}（{args.universe}）: {len(picks)}件")
+    for pick in picks:
+        print(f"{pick['weekday']} {pick['pattern']:12s} {pick['slot'] + 1:3d} {pick['currency']:7s} "
+              f"{pick['entry_time']:>8s} {pick['close_time']:>8s} {pick['direction']:5s} "
+              f"{pick['ranking']:3d} PF {pick['pf']:6.2f} {pick['profit_pips']:7.1f}")
+    return 0
+
+
+def command_sweep(args: argparse.Namespace) -> int:
+    engine = create_engine(args)
+    sweep_df = engine.run_parameter_sweep(
+        args.analysis_weeks_grid, args.pf_threshold_grid, args.max_results_grid,
+        base_date=args.base_date, output_file=args.output, workers=args.workers
+    )
+    print(sweep_df.to_string(index=False))
+    return 0
+
+
+def command_batch(args: argparse.Namespace) -> int:
+    engine = create_engine(args)
+    batch = engine.run_batch(args.base_dates, workers=args.workers, output_file=args.output)
+    print(batch['summary'].to_string(index=False))
+    return 0 if not batch['failed'] else 1
+
+
+def command_bench(args: argparse.Namespace) -> int:
+    import fx_benchmark
+    fx_benchmark.main(args.bench_args)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    サブコマンドの引数パーサーを作成
+    """
+    parser = argparse.ArgumentParser(description='FXAnalysisEngine コマンドラインインターフェース')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='分析を実行して結果を出力')
+    run.add_argument('--base-date', default=None, help='基準日（YYYY-MM-DD、既定は最新）')
+    run.add_argument('--as-of-date', default=None, help='分析対象期間の評価日（YYYY-MM-DD、既定は基準日）')
+    add_settings_arguments(run)
+    run.set_defaults(func=command_run)
+
+    show = subparsers.add_parser('show', help='計算済みの選定結果を表示')
+    show.add_argument('--base-date', default=None, help='基準日（YYYY-MM-DD、既定は結果のある最新の基準日）')
+    show.add_argument('--weekday', choices=WEEKDAYS, default=None, help='曜日')
+    show.add_argument('--pattern', default=None, help='評価パターン（前方一致、例: 利益効率）')
+    show.add_argument('--currency', default=None, help='通貨ペア')
+    show.add_argument('--universe', default=DEFAULT_UNIVERSE, help='通貨ユニバース')
+    show.add_argument('--json', action='store_true', help='JSONで出力')
+    show.set_defaults(func=command_show)
+
+    # スイープはPF順の選定のみ（分析期間・PF閾値・最大表示件数はグリッドで指定）
+    sweep = subparsers.add_parser('sweep', help='パラメータスイープ')
+    sweep.add_argument('--base-date', default=None, help='基準日（YYYY-MM-DD、既定は最新）')
+    sweep.add_argument('--analysis-weeks-grid', type=int, nargs='+', default=[13, 26, 52], help='分析対象期間（週数）')
+    sweep.add_argument('--pf-threshold-grid', type=float, nargs='+', default=[1.2, 1.3, 1.5], help='PF閾値')
+    sweep.add_argument('--max-results-grid', type=int, nargs='+', default=[10, 20], help='最大表示件数')
+    sweep.add_argument('--workers', type=int, default=1, help='プロセス数')
+    sweep.add_argument('--output', default=None, help='結果CSVの保存先')
+    add_pattern_arguments(sweep)
+    sweep.set_defaults(func=command_sweep)
+
+    batch = subparsers.add_parser('batch', help='複数の基準日を一括分析')
+    batch.add_argument('--base-dates', nargs='+', default=None, help='基準日（既定は全ての基準日ディレクトリ）')
+    batch.add_argument('--workers', type=int, default=None, help='プロセス数（既定はCPU数）')
+    batch.add_argument('--output', default=None, help='基準日別サマリーのCSV保存先')
+    add_settings_arguments(batch)
+    batch.set_defaults(func=command_batch)
+
+    # 引数はそのままfx_benchmark.mainに渡す
+    bench = subparsers.add_parser('bench', help='ベンチマーク（引数はfx_benchmark.pyと同じ）', add_help=False)
+    bench.set_defaults(func=command_bench)
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    エントリーポイント
+    """
+    parser = build_parser()
+    args, extra_args = parser.parse_known_args(argv)
+    if args.command == 'bench':
+        args.bench_args = extra_args
+    elif extra_args:
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"エラーが発生しました: {str(e)}")
+        sys.exit(1)
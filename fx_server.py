@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FXAnalysisEngine ローカルHTTP/JSON照会サーバー
+選定結果とPF集計を起動時に1回だけ読み込み、メモリ上の索引から基準日・曜日・評価パターン・通貨ペア・PF閾値で照会する
+
+使用方法:
+    python fx_server.py --port 8765
+
+照会例:
+    GET /picks?base_date=2025-06-22&weekday=月&pattern=利益効率ポイント&currency=USDJPY
+    GET /picks?base_date=2025-06-22&pf_threshold=1.5&max_results=50   （CSVを読み直さずに再選定）
+    GET /pf?base_date=2025-06-22&point_name=利益効率_STD_ポイント&weekday=月&rank=3&weeks=13
+    GET /base_dates
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import Dict, List, Any, Tuple
+
+import pandas as pd
+
+import fx_analysis_python as fx
+
+logger = logging.getLogger(__name__)
+
+
+class FXQueryService:
+    """選定結果・PF集計をメモリに保持して照会に応答するサービス"""
+
+    # 再選定結果を保持する件数の上限
+    MAX_CACHED_SELECTIONS = 64
+
+    def __init__(self, engine: fx.FXAnalysisEngine = None, base_dates: List[str] = None):
+        """
+        初期化（全ての基準日のレポート1と最新のレポート2を読み込む）
+
+        PF集計はレポート2のPFキューブから求めるため、PF信頼区間（rank_by='pf_lower'）と
+        1分足の再シミュレーション（ohlc_dir）の設定には対応しない
+
+        Args:
+            engine: 分析エンジン（既定の分析期間・PF閾値・最大表示件数を使用）
+            base_dates: 読み込む基準日（Noneの場合は全ての基準日ディレクトリ）
+        """
+        self.engine = engine or fx.FXAnalysisEngine()
+        if self.engine.settings['rank_by'] != 'pf':
+            raise ValueError("照会サーバーはrank_by='pf'のみ対応しています")
+        if self.engine.bar_store:
+            raise ValueError("照会サーバーは1分足の再シミュレーション（ohlc_dir）に対応していません")
+        self.base_dates = base_dates or self.engine.list_base_dates()
+        if not self.base_dates:
+            raise FileNotFoundError("基準日のディレクトリが見つかりません")
+
+        _, report2_df = self.engine.load_csv_files(max(self.base_dates))
+        self.engine.build_pf_cube(report2_df)
+
+        self.points: Dict[str, pd.DataFrame] = {}
+        self.pf_tables: Dict[str, pd.DataFrame] = {}
+        for base_date in self.base_dates:
+            report1_file, _ = self.engine.find_csv_files(base_date)
+            report1_df = fx.load_parsed_csv(report1_file, fx.parse_report1,
+                                            os.path.join(base_date, fx.CACHE_DIR_NAME))
+            self.points[base_date] = self.engine.extract_point_frame(report1_df)
+            self.pf_tables[base_date] = self.engine.query_profit_factor(
+                self.engine.settings['analysis_weeks'], base_date
+            )
+
+        # (基準日, PF閾値, 最大表示件数) → {(曜日, 評価パターン): 選定ポイントのリスト}（最近使った順）
+        # リクエストスレッド間で共有するため、参照・作成・追い出しはロック内で行う
+        self._indexes: Dict[Tuple[str, float, int], Dict[Tuple[str, str], List[Dict[str, Any]]]] = OrderedDict()
+        self._indexes_lock = threading.Lock()
+        for base_date in self.base_dates:
+            self.selection_index(base_date, self.engine.settings['pf_threshold'], self.engine.settings['max_results'])
+        logger.info(f"照会サービスの準備完了: {len(self.base_dates)}基準日")
+
+    def selection_index(self, base_date: str, pf_threshold: float, max_results: int) -> Dict[Tuple[str, str], List]:
+        """
+        指定した設定での選定結果の索引を取得（未計算ならメモリ上のデータから再選定）
+
+        Args:
+            base_date: 基準日
+            pf_threshold: PF閾値
+            max_results: 最大表示件数
+
+        Returns:
+            (曜日, 評価パターン) → 選定ポイントのリスト
+        """
+        key = (base_date, float(pf_threshold), int(max_results))
+        if key[2] < 1:
+            raise ValueError(f"最大表示件数は1以上を指定してください: {max_results}")
+        with self._indexes_lock:
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return self._indexes[key]
+            if base_date not in self.points:
+                raise KeyError(f"基準日が読み込まれていません: {base_date}")
+
+            index = self._build_index(base_date, pf_threshold, max_results)
+            self._indexes[key] = index
+            while len(self._indexes) > self.MAX_CACHED_SELECTIONS:
+                self._indexes.popitem(last=False)
+            return index
+
+    def _build_index(self, base_date: str, pf_threshold: float, max_results: int) -> Dict[Tuple[str, str], List]:
+        """
+        メモリ上のポイントとPF集計から再選定して索引を作成
+        """
+        selector = fx.FXAnalysisEngine(**dict(self.engine.settings, pf_threshold=pf_threshold, max_results=max_results))
+        selected_df = selector.select_optimal_frame(self.points[base_date], self.pf_tables[base_date])
+
+        index: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        records = zip(
+            selected_df['weekday'], selected_df['point_name'], selected_df['currency'],
+            selected_df['entry_time'], selected_df['close_time'], selected_df['direction'],
+            selected_df['ranking'], selected_df['pf'], selected_df['trades'], selected_df['profit_pips']
+        )
+        for weekday, pattern, currency, entry_time, close_time, direction, ranking, pf, trades, profit_pips in records:
+            index.setdefault((weekday, pattern), []).append({
+                'weekday': weekday,
+                'pattern': pattern,
+                'currency': currency,
+                'entry_time': entry_time,
+                'close_time': close_time,
+                'direction': direction,
+                'ranking': int(ranking),
+                'pf': round(float(pf), 4),
+                'trades': int(trades),
+                'profit_pips': float(profit_pips)
+            })
+        return index
+
+    def query_picks(self, base_date: str = None, weekday: str = None, pattern: str = None,
+                    currency: str = None, pf_threshold: float = None, max_results: int = None) -> Dict[str, Any]:
+        """
+        選定ポイントを照会
+
+        Args:
+            base_date: 基準日（Noneの場合は最新）
+            weekday: 曜日（月〜金、Noneの場合は全曜日）
+            pattern: 評価パターン（Noneの場合は全パターン）
+            currency: 通貨ペア（Noneの場合は全通貨ペア）
+            pf_threshold: PF閾値（Noneの場合は既定値）
+            max_results: 最大表示件数（Noneの場合は既定値）
+
+        Returns:
+            照会条件と選定ポイント
+        """
+        base_date = base_date or max(self.base_dates)
+        pf_threshold = self.engine.settings['pf_threshold'] if pf_threshold is None else pf_threshold
+        max_results = self.engine.settings['max_results'] if max_results is None else max_results
+        index = self.selection_index(base_date, pf_threshold, max_results)
+
+        picks = [
+            pick
+            for (day, point_name), day_picks in index.items()
+            if (weekday is None or day == weekday) and (pattern is None or point_name == pattern)
+            for pick in day_picks
+            if currency is None or pick['currency'] == currency
+        ]
+        return {
+            'base_date': base_date,
+            'pf_threshold': pf_threshold,
+            'max_results': max_results,
+            'count': len(picks),
+            'picks': picks
+        }
+
+    def query_pf(self, base_date: str, point_name: str, weekday: str, rank: int, weeks: int = None) -> Dict[str, Any]:
+        """
+        1セル分のPFをキューブから照会
+
+        Args:
+            base_date: 基準日
+            point_name: ポイント名（レポート2）
+            weekday: 曜日
+            rank: ランキング
+            weeks: 分析対象期間（週数、Noneの場合は既定値）
+
+        Returns:
+            PFデータ
+        """
+        weeks = self.engine.settings['analysis_weeks'] if weeks is None else weeks
+        data = self.engine.pf_cube.lookup(point_name, weekday, rank, weeks, self.engine.get_as_of_date(base_date))
+        return {'base_date': base_date, 'point_name': point_name, 'weekday': weekday,
+                'rank': rank, 'weeks': weeks, **data}
+
+
+class FXQueryHandler(BaseHTTPRequestHandler):
+    """照会サービスのHTTPハンドラ"""
+
+    service: FXQueryService = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == '/picks':
+                body = self.service.query_picks(
+                    base_date=params.get('base_date'),
+                    weekday=params.get('weekday'),
+                    pattern=params.get('pattern'),
+                    currency=params.get('currency'),
+                    pf_threshold=float(params['pf_threshold']) if 'pf_threshold' in params else None,
+                    max_results=int(params['max_results']) if 'max_results' in params else None
+                )
+            elif url.path == '/pf':
+                body = self.service.query_pf(
+                    base_date=params['base_date'],
+                    point_name=params['point_name'],
+                    weekday=params['weekday'],
+                    rank=int(params['rank']),
+                    weeks=int(params['weeks']) if 'weeks' in params else None
+                )
+            elif url.path == '/base_dates':
+                body = {'base_dates': self.service.base_dates}
+            elif url.path == '/health':
+                body = {'status': 'ok'}
+            else:
+                self._send_json(404, {'error': f"不明なパスです: {url.path}"})
+                return
+        except (KeyError, ValueError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            logger.error(f"照会処理エラー: {self.path}: {str(e)}")
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, body)
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def make_server(service: FXQueryService, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """
+    照会サーバーを作成
+
+    Args:
+        service: 照会サービス
+        host: 待ち受けアドレス
+        port: 待ち受けポート
+
+    Returns:
+        HTTPサーバー（serve_foreverで起動）
+    """
+    handler = type('BoundFXQueryHandler', (FXQueryHandler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None) -> None:
+    """
+    エントリーポイント
+    """
+    parser = argparse.ArgumentParser(description='FXAnalysisEngine ローカルHTTP/JSON照会サーバー')
+    parser.add_argument('--host', default='127.0.0.1', help='待ち受けアドレス')
+    parser.add_argument('--port', type=int, default=8765, help='待ち受けポート')
+    parser.add_argument('--analysis-weeks', type=int, default=26, help='分析対象期間（週数）')
+    parser.add_argument('--pf-threshold', type=float, default=1.3, help='PF閾値')
+    parser.add_argument('--max-results', type=int, default=20, help='最大表示件数')
+    args = parser.parse_args(argv)
+
+    fx.configure_logging()
+    engine = fx.FXAnalysisEngine(args.analysis_weeks, args.pf_threshold, args.max_results)
+    server = make_server(FXQueryService(engine), args.host, args.port)
+    logger.info(f"照会サーバーを起動しました: http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("照会サーバーを終了します")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"エラーが発生しました: {str(e)}")
+        sys.exit(1)
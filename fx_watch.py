@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FXAnalysisEngine 常駐（監視）モード
+作業ディレクトリに置かれたレポートCSVを定期的に監視し、解析済みデータとPF集計をメモリに保持したまま
+差分のみを取り込んで選定・出力をやり直す
+
+使用方法:
+    python fx_watch.py --interval 2
+"""
+
+import os
+import io
+import sys
+import glob
+import time
+import hashlib
+import argparse
+import logging
+from typing import Dict, Any, Tuple, Optional
+
+import pandas as pd
+
+import fx_analysis_python as fx
+
+logger = logging.getLogger(__name__)
+
+# 監視するファイル名のパターン（要件定義書 要件-FILE-001）
+REPORT1_PATTERN = fx.REPORT1_PATTERN
+REPORT2_PATTERN = fx.REPORT2_PATTERN
+
+
+class FXWatchService:
+    """レポートCSVの投入を監視し、差分のみを取り込んで再選定する常駐サービス"""
+
+    def __init__(self, engine: fx.FXAnalysisEngine = None, watch_dir: str = '.', interval: float = 2.0):
+        """
+        初期化
+
+        Args:
+            engine: 分析エンジン（Noneの場合は既定設定で作成）
+            watch_dir: 監視するディレクトリ
+            interval: 監視間隔（秒）
+        """
+        self.engine = engine or fx.FXAnalysisEngine()
+        self.watch_dir = watch_dir
+        self.interval = interval
+
+        # ファイルごとの(サイズ, 更新時刻)。2回連続で同じ値になったら書き込み完了とみなす
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._pending: Dict[str, Tuple[int, int]] = {}
+
+        # レポート1の抽出結果
+        self.report1_file: Optional[str] = None
+        self.base_date: Optional[str] = None
+        self.points_df: Optional[pd.DataFrame] = None
+
+        # レポート2の取り込み状態（取り込み済みバイト数と、その範囲のハッシュ）
+        self.report2_file: Optional[str] = None
+        self._report2_state: Optional[Dict[str, Any]] = None
+
+    def _scan(self) -> Dict[str, str]:
+        """
+        書き込みが完了した新規・更新ファイルを検出
+
+        Returns:
+            ファイルパス → 'report1' / 'report2'
+        """
+        changed = {}
+        for kind, pattern in (('report1', REPORT1_PATTERN), ('report2', REPORT2_PATTERN)):
+            for path in glob.glob(os.path.join(self.watch_dir, pattern)):
+                stat = os.stat(path)
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if self._seen.get(path) == signature:
+                    continue
+                if self._pending.get(path) == signature:
+                    self._seen[path] = signature
+                    del self._pending[path]
+                    changed[path] = kind
+                else:
+                    self._pending[path] = signature
+        return changed
+
+    def load_report1(self, path: str) -> None:
+        """
+        レポート1を読み込み、ポイントを抽出して保持
+
+        Args:
+            path: レポート1ファイルパス
+        """
+        report1_df = fx.parse_report1(pd.read_csv(path, encoding='utf-8-sig'))
+        self.report1_file = path
+        self.base_date = pd.to_datetime(report1_df['基準日'].iloc[0]).strftime('%Y-%m-%d')
+        self.points_df = self.engine.extract_point_frame(report1_df)
+        logger.info(f"レポート1を取り込みました: {path}（基準日 {self.base_date}）")
+
+    def load_report2(self, path: str) -> None:
+        """
+        レポート2を取り込み、PFキューブに反映
+
+        前回取り込んだ内容の末尾に追記されただけの場合は、追記分のみを解析して畳み込む
+
+        Args:
+            path: レポート2ファイルパス
+        """
+        state = self._report2_state
+        size = os.path.getsize(path)
+        appended = (
+            state is not None and state['path'] == path and size >= state['size']
+            and state['ends_with_newline']
+        )
+        prefix_hash, full_hash, last_byte = _hash_file(path, state['size'] if appended else 0)
+        appended = appended and prefix_hash == state['hash']
+
+        if appended and size > state['size']:
+            with open(path, 'rb') as f:
+                f.seek(state['size'])
+                tail = f.read()
+            delta = fx.parse_report2(pd.read_csv(io.BytesIO(tail), header=None, names=state['columns'],
+                                                 encoding='utf-8'))
+            self.engine.pf_cube = self.engine.pf_cube.extend(delta)
+            logger.info(f"レポート2の追記分を取り込みました: {len(delta)}行")
+            columns = state['columns']
+        elif appended:
+            logger.info(f"レポート2に変更はありません: {path}")
+            columns = state['columns']
+        else:
+            report2_df = fx.parse_report2(pd.read_csv(path, encoding='utf-8-sig'))
+            self.engine.build_pf_cube(report2_df)
+            logger.info(f"レポート2を全件取り込みました: {len(report2_df)}行")
+            columns = list(report2_df.columns)
+
+        self.report2_file = path
+        self._report2_state = {
+            'path': path,
+            'size': size,
+            'hash': full_hash,
+            'ends_with_newline': last_byte == b'\n',
+            'columns': columns
+        }
+
+    def recompute(self) -> Dict[str, Any]:
+        """
+        保持しているポイントとPFキューブから選定・出力をやり直す
+
+        Returns:
+            分析結果
+        """
+        pf_table = self.engine.query_profit_factor(self.engine.settings['analysis_weeks'], self.base_date)
+        universe_results = self.engine.select_universe_points(self.points_df, pf_table)
+        day_results = next(iter(universe_results.values()))
+        formatted_results = self.engine.format_results(day_results)
+        universe_files = self.engine.write_universe_outputs(universe_results, self.base_date)
+        created_dir = self.engine.create_directory_and_move_files(
+            self.base_date, self.report1_file, self.report2_file
+        )
+        for output_files in universe_files.values():
+            for output_file in output_files.values():
+                self.engine.organize_output_files(self.base_date, output_file)
+
+        output_files = next(iter(universe_files.values()))
+        return {
+            'success': True,
+            'base_date': self.base_date,
+            'output_file': os.path.join(created_dir, os.path.basename(fx.primary_output(output_files))),
+            'output_files': {name: os.path.join(created_dir, os.path.basename(path))
+                             for name, path in output_files.items()},
+            'day_results': day_results,
+            'weekly_summary': self.engine.calculate_weekly_summary(day_results),
+            'formatted_output': formatted_results
+        }
+
+    def poll_once(self) -> Optional[Dict[str, Any]]:
+        """
+        1回分の監視処理（変更があれば取り込み・再計算）
+
+        Returns:
+            再計算した場合は分析結果、それ以外はNone
+        """
+        changed = self._scan()
+        if not changed:
+            return None
+
+        for path, kind in sorted(changed.items(), key=lambda item: item[1]):
+            try:
+                if kind == 'report1':
+                    self.load_report1(path)
+                else:
+                    self.load_report2(path)
+            except Exception as e:
+                logger.error(f"ファイル取り込みエラー: {path}: {str(e)}")
+
+        if self.points_df is None or self.engine.pf_cube is None:
+            logger.info("レポート1・レポート2の両方がそろうまで待機します")
+            return None
+
+        start = time.perf_counter()
+        try:
+            result = self.recompute()
+        except Exception as e:
+            logger.error(f"再計算エラー: {str(e)}")
+            return {'success': False, 'error': str(e)}
+        logger.info(f"再計算完了: {result['output_file']}（{time.perf_counter() - start:.3f}秒）")
+        return result
+
+    def run_forever(self) -> None:
+        """
+        Ctrl+Cで停止するまで監視を続ける
+        """
+        logger.info(f"監視を開始します: {os.path.abspath(self.watch_dir)}（{self.interval}秒間隔）")
+        try:
+            while True:
+                self.poll_once()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            logger.info("監視を終了します")
+
+
+def _hash_file(path: str, prefix_size: int, chunk_size: int = 1 << 20) -> Tuple[str, str, bytes]:
+    """
+    ファイル先頭prefix_sizeバイトのハッシュとファイル全体のハッシュを1回の読み込みで計算
+
+    Returns:
+        (先頭部分のハッシュ, 全体のハッシュ, 最終バイト)
+    """
+    digest = hashlib.sha256()
+    prefix_hash = digest.hexdigest() if prefix_size == 0 else None
+    position = 0
+    last_byte = b''
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            if prefix_hash is None and position + len(chunk) >= prefix_size:
+                head = prefix_size - position
+                digest.update(chunk[:head])
+                prefix_hash = digest.hexdigest()
+                digest.update(chunk[head:])
+            else:
+                digest.update(chunk)
+            position += len(chunk)
+            last_byte = chunk[-1:]
+    return prefix_hash, digest.hexdigest(), last_byte
+
+
+def main(argv=None) -> None:
+    """
+    エントリーポイント
+    """
+    parser = argparse.ArgumentParser(description='FXAnalysisEngine 常駐（監視）モード')
+    parser.add_argument('--watch-dir', default='.', help='監視するディレクトリ')
+    parser.add_argument('--interval', type=float, default=2.0, help='監視間隔（秒）')
+    parser.add_argument('--analysis-weeks', type=int, default=26, help='分析対象期間（週数）')
+    parser.add_argument('--pf-threshold', type=float, default=1.3, help='PF閾値')
+    parser.add_argument('--max-results', type=int, default=20, help='最大表示件数')
+    args = parser.parse_args(argv)
+
+    fx.configure_logging()
+    engine = fx.FXAnalysisEngine(args.analysis_weeks, args.pf_threshold, args.max_results)
+    FXWatchService(engine, args.watch_dir, args.interval).run_forever()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"エラーが発生しました: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FXAnalysisEngine の回帰テスト（合成データはfx_benchmarkで生成）
+
+使用方法:
+    python -m pytest -q
+"""
+
+import os
+import json
+import threading
+import tracemalloc
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+import pandas as pd
+import pytest
+
+import fx_analysis_python as fx
+import fx_benchmark
+import fx_server
+import fx_watch
+
+BASE_DATE = '2025-06-22'
+
+
+def test_batch_after_trade_store_run(tmp_path, monkeypatch):
+    """
+    トレードストアに取り込んでレポート2をマニフェストに置き換えた基準日を、バッチ実行で再分析できる
+    """
+    fx_benchmark.generate_dataset(str(tmp_path), 300, 5000, BASE_DATE)
+    monkeypatch.chdir(tmp_path)
+
+    result = fx.FXAnalysisEngine(trade_store='trades.db').perform_analysis(BASE_DATE)
+    assert result['success'], result.get('error')
+    assert os.path.exists(os.path.join(BASE_DATE, fx.TRADE_MANIFEST_NAME))
+    assert not os.path.exists(os.path.join(BASE_DATE, fx_benchmark.REPORT2_FILENAME))
+
+    batch = fx.FXAnalysisEngine(trade_store='trades.db', use_result_cache=False).run_batch([BASE_DATE], workers=1)
+    assert batch['failed'] == {}
+    assert batch['results'][BASE_DATE]['weekly_summary'] == result['weekly_summary']
+
+
+def test_cube_keeps_pf_exactly_at_threshold():
+    """
+    累積和の差分で求めたPFが閾値ちょうど（1.3）のセルを、取引明細からの集計と同じく閾値以上と判定する
+    """
+    # 分析対象期間外の取引（3.3）があると、累積和の差分は1.2999999999999998になる
+    trades_df = fx.parse_report2(pd.DataFrame({
+        'ポイント名': ['利益効率_STD_ポイント'] * 4,
+        'ポイント値': [17] * 4,
+        '取引日': ['2025-05-02', '2025-06-06', '2025-06-13', '2025-06-20'],
+        '取引日_曜日': ['金'] * 4,
+        '損益pipsのSUM': [3.3, 0.5, 0.8, -1.0]
+    }))
+    engine = fx.FXAnalysisEngine()
+    cube_table = engine.build_pf_cube(trades_df).window_table(3, BASE_DATE)
+    baseline = fx.build_pf_table(engine.filter_analysis_period(trades_df.copy(), 3, BASE_DATE))
+
+    assert cube_table['pf'].tolist() == baseline['pf'].tolist() == [1.3]
+    assert cube_table['total_profit'].tolist() == baseline['total_profit'].tolist()
+    assert engine.pf_cube.lookup('利益効率_STD_ポイント', '金', 17, 3, BASE_DATE)['pf'] == 1.3
+
+
+def test_cube_window_matches_analysis_period_on_any_weekday(tmp_path):
+    """
+    キューブの集計期間は、日曜日以外の評価日でもfilter_analysis_periodの日単位の期間と一致する
+    """
+    fx_benchmark.generate_dataset(str(tmp_path), 300, 20000, BASE_DATE)
+    trades_df = fx.parse_report2(pd.read_csv(tmp_path / BASE_DATE / fx_benchmark.REPORT2_FILENAME, encoding='utf-8-sig'))
+    engine = fx.FXAnalysisEngine()
+    engine.build_pf_cube(trades_df)
+
+    columns = fx.PF_KEY_COLUMNS + ['total_profit', 'total_loss', 'trades', 'pf']
+    for as_of_date in ['2025-06-15', '2025-06-18', '2025-06-20']:
+        cube_table = engine.pf_cube.window_table(4, as_of_date)
+        baseline = fx.build_pf_table(engine.filter_analysis_period(trades_df.copy(), 4, as_of_date))
+        cube_table = cube_table.sort_values(fx.PF_KEY_COLUMNS, ignore_index=True)[columns]
+        baseline = baseline.sort_values(fx.PF_KEY_COLUMNS, ignore_index=True)[columns]
+        pd.testing.assert_frame_equal(cube_table, baseline, check_dtype=False)
+
+
+def test_walk_forward_rejects_as_of_date_inside_scored_week(tmp_path, monkeypatch):
+    """
+    評価日が採点する週に入る基準日（水曜日）はウォークフォワード検証で先読みになるため受け付けない
+    """
+    fx_benchmark.generate_dataset(str(tmp_path), 300, 5000, '2025-06-18')
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(ValueError, match='採点する週'):
+        fx.FXAnalysisEngine().run_walk_forward_backtest(['2025-06-18'])
+
+
+def test_streaming_aggregation_supports_pf_lower(tmp_path, monkeypatch):
+    """
+    チャンク読み込みの集計でもrank_by='pf_lower'の信頼区間を計算し、通常の読み込みと同じ結果になる
+    """
+    fx_benchmark.generate_dataset(str(tmp_path), 300, 5000, BASE_DATE)
+    monkeypatch.chdir(tmp_path)
+
+    settings = {'rank_by': 'pf_lower', 'use_result_cache': False}
+    streamed = fx.FXAnalysisEngine(report2_chunksize=700, **settings).perform_analysis(BASE_DATE)
+    loaded = fx.FXAnalysisEngine(**settings).perform_analysis(BASE_DATE)
+
+    assert streamed['success'], streamed.get('error')
+    assert streamed['weekly_summary'] == loaded['weekly_summary']
+    assert streamed['day_results'] == loaded['day_results']
+
+
+def test_sweep_cell_matches_perform_analysis(tmp_path, monkeypatch):
+    """
+    パラメータスイープの1組み合わせは、同じ設定のperform_analysisと同じ選定件数・週間合計損益になる
+    """
+    fx_benchmark.generate_dataset(str(tmp_path), 1000, 20000, BASE_DATE)
+    monkeypatch.chdir(tmp_path)
+
+    engine = fx.FXAnalysisEngine(analysis_weeks=4, pf_threshold=1.3, max_results=5, use_result_cache=False)
+    result = engine.perform_analysis(BASE_DATE)
+    assert result['success'], result.get('error')
+
+    sweep_df = engine.run_parameter_sweep([2, 4], [1.2, 1.3], [5, 10], BASE_DATE)
+    cell = sweep_df[(sweep_df['analysis_weeks'] == 4) & (sweep_df['pf_threshold'] == 1.3)
+                    & (sweep_df['max_results'] == 5)].set_index('pattern')
+    for pattern, total in result['weekly_summary'].items():
+        selected = sum(len(day[pattern]) for day in result['day_results'].values())
+        assert cell.at[pattern, 'selected_points'] == selected
+        assert cell.at[pattern, 'weekly_pips'] == pytest.approx(total)
+
+
+def test_sweep_rejects_settings_it_cannot_reproduce():
+    """
+    PF下限順・保有時間の重複除外はスイープの選定と一致しないため受け付けない
+    """
+    with pytest.raises(ValueError, match='rank_by'):
+        fx.FXAnalysisEngine(rank_by='pf_lower').run_parameter_sweep([4], [1.3], [5], BASE_DATE)
+    with pytest.raises(ValueError, match='non_overlapping'):
+        fx.FXAnalysisEngine(non_overlapping=True).run_parameter_sweep([4], [1.3], [5], BASE_DATE)
+
+
+def test_watch_append_matches_fresh_analysis(tmp_path, monkeypatch):
+    """
+    監視モードでレポート2の追記分をキューブに畳み込んだ結果が、全件を読み直したperform_analysisと一致する
+    """
+    source_dir = tmp_path / 'source'
+    watch_dir = tmp_path / 'watch'
+    watch_dir.mkdir()
+    fx_benchmark.generate_dataset(str(source_dir), 1000, 20000, BASE_DATE)
+    report1_file = next((source_dir / BASE_DATE).glob(fx.REPORT1_PATTERN))
+    report2_file = source_dir / BASE_DATE / fx_benchmark.REPORT2_FILENAME
+    lines = report2_file.read_bytes().splitlines(keepends=True)
+    head, tail = lines[:len(lines) * 2 // 3], lines[len(lines) * 2 // 3:]
+
+    (watch_dir / report1_file.name).write_bytes(report1_file.read_bytes())
+    (watch_dir / report2_file.name).write_bytes(b''.join(head))
+    monkeypatch.chdir(watch_dir)
+    service = fx_watch.FXWatchService(fx.FXAnalysisEngine(use_result_cache=False), '.')
+    assert service.poll_once() is None
+    assert service.poll_once()['success']
+
+    with open(report2_file.name, 'ab') as f:
+        f.write(b''.join(tail))
+    assert service.poll_once() is None
+    watched = service.poll_once()
+    assert watched['success'], watched.get('error')
+
+    monkeypatch.chdir(source_dir)
+    fresh = fx.FXAnalysisEngine(use_result_cache=False).perform_analysis(BASE_DATE)
+    assert fresh['success'], fresh.get('error')
+    assert watched['weekly_summary'] == fresh['weekly_summary']
+    assert watched['day_results'] == fresh['day_results']
+
+
+@pytest.fixture
+def query_server(tmp_path, monkeypatch):
+    """
+    合成データの照会サーバーを空きポートで起動し、照会関数を返す
+    """
+    fx_benchmark.generate_dataset(str(tmp_path), 1000, 20000, BASE_DATE)
+    monkeypatch.chdir(tmp_path)
+    server = fx_server.make_server(fx_server.FXQueryService(fx.FXAnalysisEngine(use_result_cache=False)), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def get(path, **params):
+        url = f"http://127.0.0.1:{server.server_address[1]}{path}?{urlencode(params)}"
+        try:
+            with urllib.request.urlopen(url) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    yield get
+    server.shutdown()
+    server.server_close()
+
+
+def test_server_picks_match_perform_analysis(query_server):
+    """
+    /picksの選定結果（条件による絞り込みを含む）がperform_analysisの選定結果と一致する
+    """
+    result = fx.FXAnalysisEngine(use_result_cache=False).perform_analysis(BASE_DATE)
+    assert result['success'], result.get('error')
+
+    status, body = query_server('/picks', base_date=BASE_DATE, weekday='月', pattern='利益効率ポイント')
+    assert status == 200
+    expected = result['day_results']['月']['利益効率ポイント']
+    assert [(pick['currency'], pick['entry_time'], pick['ranking']) for pick in body['picks']] == [
+        (point['currency'], point['entry_time'], point['ranking']) for point in expected
+    ]
+
+    status, body = query_server('/picks', base_date=BASE_DATE, pf_threshold=1.5, max_results=3, currency='USDJPY')
+    assert status == 200
+    assert body['count'] == len(body['picks']) > 0
+    assert all(pick['currency'] == 'USDJPY' and pick['pf'] >= 1.5 for pick in body['picks'])
+
+
+def test_server_rejects_bad_parameters(query_server):
+    """
+    不正な照会条件は400を返す
+    """
+    assert query_server('/picks', pf_threshold='abc')[0] == 400
+    assert query_server('/picks', max_results=0)[0] == 400
+    assert query_server('/picks', base_date='2000-01-02')[0] == 400
+    assert query_server('/pf', base_date=BASE_DATE)[0] == 400
+
+
+def test_server_rejects_pf_lower_ranking():
+    """
+    PFキューブにはPF信頼区間がないため、rank_by='pf_lower'のエンジンでは照会サービスを作成できない
+    """
+    with pytest.raises(ValueError, match='rank_by'):
+        fx_server.FXQueryService(fx.FXAnalysisEngine(rank_by='pf_lower'), [BASE_DATE])
+
+
+def test_measure_stage_times_without_tracemalloc():
+    """
+    ベンチマークの段階計測はtracemallocを止めた状態で時間を測り、トレースは別の実行で行う
+    """
+    tracing = []
+    records = {}
+    result = fx_benchmark.measure_stage('stage', lambda: tracing.append(tracemalloc.is_tracing()) or 1, records)
+    assert result == 1 and tracing == [False]
+    assert 'traced_peak_mb' not in records['stage']
+
+    fx_benchmark.measure_stage('traced', lambda: tracing.append(tracemalloc.is_tracing()), records, trace_memory=True)
+    assert tracing[1:] == [False, True]
+    assert not tracemalloc.is_tracing()
+    assert {'wall_time_sec', 'process_peak_rss_mb', 'peak_rss_growth_mb', 'traced_peak_mb'} <= set(records['traced'])
+
+
+@pytest.fixture
+def report2_trades(tmp_path):
+    """
+    合成データのレポート2（ファイルパスと解析済みの取引明細）
+    """
+    fx_benchmark.generate_dataset(str(tmp_path), 300, 20000, BASE_DATE)
+    report2_file = tmp_path / BASE_DATE / fx_benchmark.REPORT2_FILENAME
+    return str(report2_file), fx.parse_report2(pd.read_csv(report2_file, encoding='utf-8-sig'))
+
+
+def test_pf_aggregation_paths_match_build_pf_table(report2_trades):
+    """
+    一括集計・チャンク読み込み・キューブのPFテーブルが、分析対象期間の取引明細からのbuild_pf_tableと一致する
+    """
+    report2_file, trades_df = report2_trades
+    engine = fx.FXAnalysisEngine()
+    baseline = fx.build_pf_table(engine.filter_analysis_period(trades_df.copy(), 13, BASE_DATE))
+
+    streamed, total_rows = engine.stream_weekly_profit_factor(report2_file, 13, 3000, BASE_DATE)
+    assert total_rows == len(trades_df)
+    engine.build_pf_cube(trades_df)
+    tables = {
+        'aggregate': engine.aggregate_weekly_profit_factor(trades_df.copy(), 13, BASE_DATE),
+        'stream': streamed,
+        'cube': engine.query_profit_factor(13, BASE_DATE)
+    }
+    columns = fx.PF_KEY_COLUMNS + ['total_profit', 'total_loss', 'trades', 'profit_pips', 'pf']
+    expected = baseline.astype({'ポイント名': str, '取引日_曜日': str}).sort_values(
+        fx.PF_KEY_COLUMNS, ignore_index=True)[columns]
+    for name, pf_table in tables.items():
+        actual = pf_table.astype({'ポイント名': str, '取引日_曜日': str}).sort_values(
+            fx.PF_KEY_COLUMNS, ignore_index=True)[columns]
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, obj=name)
+
+
+def test_schedule_portfolio_handles_points_across_midnight():
+    """
+    日付をまたぐポイント（0時台は前日の取引日の24時台）も含めて、同じ通貨ペアで保有時間が重なるポイントを除外する
+    """
+    selected_df = pd.DataFrame({
+        'name': ['A', 'B', 'C', 'D', 'E', 'F'],
+        'weekday': ['月', '月', '火', '月', '火', '水'],
+        'currency': ['USDJPY', 'USDJPY', 'USDJPY', 'EURJPY', 'USDJPY', 'USDJPY'],
+        'entry_time': ['23:50:00', '0:10:00', '1:00:00', '23:50:00', '23:30:00', '9:00:00'],
+        'close_time': ['0:20:00', '0:30:00', '2:00:00', '0:20:00', '23:00:00', '10:00:00'],
+        'pf': [2.0, 1.5, 1.5, 2.0, 1.4, 1.3],
+        'total_profit': [20.0, 30.0, 20.0, 20.0, 20.0, 10.0],
+        'total_loss': [10.0, 10.0, 10.0, 10.0, 10.0, 5.0],
+        'trades': [10, 10, 10, 10, 10, 10]
+    })
+    selected_df['entry_minutes'] = fx.time_to_minutes_array(selected_df['entry_time'])
+
+    scheduled = fx.FXAnalysisEngine(non_overlapping=True).schedule_portfolio(selected_df)
+
+    # A（月23:50〜火0:20）とB（月の24:10〜24:30）は重なり、期待値の大きいBを残す
+    # E（火23:30〜水23:00）は翌日のFと重なり、期待値の大きいEを残す。別の通貨ペアのDは影響を受けない
+    assert scheduled['name'].tolist() == ['B', 'C', 'D', 'E']
+
+
+def test_pf_snapshot_round_trip(report2_trades, tmp_path):
+    """
+    スナップショットに書き出したPFテーブルを開き直すと、同じセル・同じ値を参照できる
+    """
+    _, trades_df = report2_trades
+    engine = fx.FXAnalysisEngine(rank_by='pf_lower')
+    pf_table = engine.aggregate_weekly_profit_factor(trades_df, 13, BASE_DATE)
+    path = str(tmp_path / 'pf.snap')
+    engine.export_pf_snapshot(pf_table, path, BASE_DATE)
+
+    snapshot = fx.PFSnapshot.open(path)
+    assert snapshot.header['base_date'] == BASE_DATE
+    assert snapshot.fields[-2:] == ['pf_lower', 'pf_upper']
+    columns = fx.PF_KEY_COLUMNS + snapshot.fields
+    expected = pf_table.astype({'ポイント名': str}).sort_values(fx.PF_KEY_COLUMNS, ignore_index=True)[columns]
+    actual = snapshot.table().sort_values(fx.PF_KEY_COLUMNS, ignore_index=True)[columns]
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+    row = pf_table.iloc[0]
+    cell = snapshot.lookup(row['ポイント名'], row['取引日_曜日'], row['ポイント値'])
+    assert cell['trades'] == row['trades'] and cell['pf'] == row['pf']
+    assert snapshot.lookup('存在しないポイント', '月', 1) == {'trades': 0}
+
+
+def test_result_cache_hit_and_invalidation(tmp_path, monkeypatch):
+    """
+    入力・設定が同じ再実行は分析結果キャッシュを使い、設定または入力が変わると再計算する
+    """
+    fx_benchmark.generate_dataset(str(tmp_path), 300, 5000, BASE_DATE)
+    monkeypatch.chdir(tmp_path)
+
+    first = fx.FXAnalysisEngine().perform_analysis(BASE_DATE)
+    second = fx.FXAnalysisEngine().perform_analysis(BASE_DATE)
+    assert first['stats'].get('result_cache') != 'hit'
+    assert second['stats']['result_cache'] == 'hit'
+    assert second['weekly_summary'] == first['weekly_summary']
+
+    changed_settings = fx.FXAnalysisEngine(pf_threshold=1.5).perform_analysis(BASE_DATE)
+    assert changed_settings['stats'].get('result_cache') != 'hit'
+
+    report2_file = os.path.join(BASE_DATE, fx_benchmark.REPORT2_FILENAME)
+    with open(report2_file, 'a', encoding='utf-8') as f:
+        f.write('利益効率_STD_ポイント,1,2025-06-20,金,5.0\n')
+    changed_input = fx.FXAnalysisEngine().perform_analysis(BASE_DATE)
+    assert changed_input['stats'].get('result_cache') != 'hit'
+    assert fx.FXAnalysisEngine().perform_analysis(BASE_DATE)['stats']['result_cache'] == 'hit'
+
+
+def test_trade_store_ignores_duplicate_rows(report2_trades, tmp_path):
+    """
+    同じレポート2の再取り込みや重複行は追加されず、新しい取引日の行のみ追加される
+    """
+    report2_file, trades_df = report2_trades
+    store = fx.TradeStore(str(tmp_path / 'trades.db'))
+    try:
+        first = store.ingest_report2(report2_file, chunksize=3000)
+        assert first['rows_inserted'] == store.count() == len(trades_df)
+
+        again = store.ingest_report2(report2_file, chunksize=3000)
+        assert again['rows_inserted'] == 0
+        assert store.count() == len(trades_df)
+
+        with open(report2_file, 'a', encoding='utf-8') as f:
+            f.write('利益効率_STD_ポイント,1,2025-06-23,月,5.0\n')
+            f.write('利益効率_STD_ポイント,1,2025-06-23,月,5.0\n')
+        appended = store.ingest_report2(report2_file)
+        assert appended['rows_inserted'] == 1
+        assert store.count() == len(trades_df) + 1
+    finally:
+        store.close()